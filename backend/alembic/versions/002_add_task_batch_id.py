@@ -0,0 +1,27 @@
+"""Add batch_id to tasks
+
+Group tasks created by the batch generation endpoints
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('batch_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_index('ix_tasks_batch_id', 'tasks', ['batch_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_batch_id', table_name='tasks')
+    op.drop_column('tasks', 'batch_id')
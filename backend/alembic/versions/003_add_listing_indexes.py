@@ -0,0 +1,41 @@
+"""Add composite indexes for keyset pagination
+
+Listings page on (created_at, id) newest first, scoped to a user and
+optionally filtered by task type and status
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_tasks_user_created',
+        'tasks',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+    )
+    op.create_index(
+        'ix_tasks_user_type_status_created',
+        'tasks',
+        ['user_id', 'task_type', 'status', sa.text('created_at DESC'), sa.text('id DESC')],
+    )
+    op.create_index(
+        'ix_workflows_user_created',
+        'workflows',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_workflows_user_created', table_name='workflows')
+    op.drop_index('ix_tasks_user_type_status_created', table_name='tasks')
+    op.drop_index('ix_tasks_user_created', table_name='tasks')
@@ -0,0 +1,60 @@
+"""Add full-text search columns to tasks
+
+Generated tsvector and plain-text columns over the prompt fields of
+input_data, with a GIN index for ranked word search and a pg_trgm GIN
+index for partial-word and CJK matching.
+Adding stored generated columns rewrites the table; run off-peak.
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+# Snapshot of app.models.task.SEARCH_FIELDS at this revision
+SEARCH_FIELDS = (
+    ("prompt", "A"),
+    ("text", "A"),
+    ("lyrics", "B"),
+    ("negative_prompt", "D"),
+)
+
+SEARCH_TEXT_SQL = " || ' ' || ".join(
+    f"coalesce(input_data->>'{field}', '')" for field, _ in SEARCH_FIELDS
+)
+
+SEARCH_VECTOR_SQL = " || ".join(
+    f"setweight(to_tsvector('simple', coalesce(input_data->>'{field}', '')), '{weight}')"
+    for field, weight in SEARCH_FIELDS
+)
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    op.add_column('tasks', sa.Column('search_text', sa.Text(), sa.Computed(SEARCH_TEXT_SQL, persisted=True)))
+    op.add_column('tasks', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_SQL, persisted=True)))
+
+    op.create_index('ix_tasks_search_vector', 'tasks', ['search_vector'], postgresql_using='gin')
+    op.create_index(
+        'ix_tasks_search_text_trgm',
+        'tasks',
+        ['search_text'],
+        postgresql_using='gin',
+        postgresql_ops={'search_text': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_search_text_trgm', table_name='tasks')
+    op.drop_index('ix_tasks_search_vector', table_name='tasks')
+    op.drop_column('tasks', 'search_vector')
+    op.drop_column('tasks', 'search_text')
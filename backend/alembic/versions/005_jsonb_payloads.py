@@ -0,0 +1,105 @@
+"""Convert task and workflow payloads to JSONB
+
+JSONB allows GIN and expression indexes on payload keys. The search
+columns from 004 are generated from input_data, so they are dropped
+and recreated around the type change.
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+TASK_COLUMNS = ('input_data', 'output_data', 'output_urls', 'error_details')
+WORKFLOW_COLUMNS = (
+    'story_data',
+    'script_data',
+    'config_data',
+    'character_data',
+    'shots_data',
+    'edit_data',
+    'asset_urls',
+)
+
+# Snapshot of app.models.task.SEARCH_FIELDS at this revision
+SEARCH_FIELDS = (
+    ("prompt", "A"),
+    ("text", "A"),
+    ("lyrics", "B"),
+    ("negative_prompt", "D"),
+)
+
+SEARCH_TEXT_SQL = " || ' ' || ".join(
+    f"coalesce(input_data->>'{field}', '')" for field, _ in SEARCH_FIELDS
+)
+
+SEARCH_VECTOR_SQL = " || ".join(
+    f"setweight(to_tsvector('simple', coalesce(input_data->>'{field}', '')), '{weight}')"
+    for field, weight in SEARCH_FIELDS
+)
+
+
+def _drop_search_columns() -> None:
+    op.drop_index('ix_tasks_search_text_trgm', table_name='tasks')
+    op.drop_index('ix_tasks_search_vector', table_name='tasks')
+    op.drop_column('tasks', 'search_vector')
+    op.drop_column('tasks', 'search_text')
+
+
+def _create_search_columns() -> None:
+    op.add_column('tasks', sa.Column('search_text', sa.Text(), sa.Computed(SEARCH_TEXT_SQL, persisted=True)))
+    op.add_column('tasks', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_SQL, persisted=True)))
+    op.create_index('ix_tasks_search_vector', 'tasks', ['search_vector'], postgresql_using='gin')
+    op.create_index(
+        'ix_tasks_search_text_trgm',
+        'tasks',
+        ['search_text'],
+        postgresql_using='gin',
+        postgresql_ops={'search_text': 'gin_trgm_ops'},
+    )
+
+
+def _alter_types(table: str, columns, type_name: str) -> None:
+    # One ALTER TABLE so the table is rewritten once
+    clauses = ', '.join(
+        f'ALTER COLUMN {column} TYPE {type_name} USING {column}::{type_name}' for column in columns
+    )
+    op.execute(f'ALTER TABLE {table} {clauses}')
+
+
+def upgrade() -> None:
+    _drop_search_columns()
+    _alter_types('tasks', TASK_COLUMNS, 'jsonb')
+    _alter_types('workflows', WORKFLOW_COLUMNS, 'jsonb')
+    _create_search_columns()
+
+    op.create_index(
+        'ix_tasks_input_data',
+        'tasks',
+        ['input_data'],
+        postgresql_using='gin',
+        postgresql_ops={'input_data': 'jsonb_path_ops'},
+    )
+    op.create_index('ix_tasks_user_input_model', 'tasks', ['user_id', sa.text("(input_data ->> 'model')")])
+    op.create_index('ix_tasks_user_input_seed', 'tasks', ['user_id', sa.text("(input_data ->> 'seed')")])
+    op.create_index('ix_tasks_user_provider', 'tasks', ['user_id', 'provider'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_user_provider', table_name='tasks')
+    op.drop_index('ix_tasks_user_input_seed', table_name='tasks')
+    op.drop_index('ix_tasks_user_input_model', table_name='tasks')
+    op.drop_index('ix_tasks_input_data', table_name='tasks')
+
+    _drop_search_columns()
+    _alter_types('workflows', WORKFLOW_COLUMNS, 'json')
+    _alter_types('tasks', TASK_COLUMNS, 'json')
+    _create_search_columns()
@@ -0,0 +1,124 @@
+"""Partition tasks by month and add task_archives
+
+Rebuilds tasks as a table range-partitioned on created_at (created_at joins
+the primary key), with one tasks_yYYYYmMM partition per month from the
+oldest row to a few months ahead. task_archives records months moved to
+cold storage by app.services.archive_service.
+Copies every row; run during a maintenance window.
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 00:00:00
+
+"""
+from datetime import date, datetime
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+# Stored columns; the generated search columns are recomputed on insert
+COLUMNS = (
+    'id', 'user_id', 'task_type', 'status', 'priority',
+    'input_data', 'output_data', 'output_urls',
+    'progress', 'progress_message', 'error_message', 'error_details',
+    'provider', 'model', 'fallback_used', 'attempts',
+    'created_at', 'started_at', 'completed_at', 'celery_task_id', 'batch_id',
+)
+
+INDEXES = (
+    ('ix_tasks_user_id', 'user_id'),
+    ('ix_tasks_status', 'status'),
+    ('ix_tasks_created_at', 'created_at'),
+    ('ix_tasks_celery_task_id', 'celery_task_id'),
+    ('ix_tasks_batch_id', 'batch_id'),
+    ('ix_tasks_user_created', 'user_id, created_at DESC, id DESC'),
+    ('ix_tasks_user_type_status_created', 'user_id, task_type, status, created_at DESC, id DESC'),
+    ('ix_tasks_search_vector', 'search_vector', 'gin'),
+    ('ix_tasks_search_text_trgm', 'search_text gin_trgm_ops', 'gin'),
+    ('ix_tasks_input_data', 'input_data jsonb_path_ops', 'gin'),
+    ('ix_tasks_user_input_model', "user_id, (input_data ->> 'model')"),
+    ('ix_tasks_user_input_seed', "user_id, (input_data ->> 'seed')"),
+    ('ix_tasks_user_provider', 'user_id, provider'),
+)
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _drop_indexes() -> None:
+    for name, *_ in INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+def _create_indexes() -> None:
+    # On a partitioned table each index cascades to every partition
+    for name, columns, *using in INDEXES:
+        method = f' USING {using[0]}' if using else ''
+        op.execute(f'CREATE INDEX {name} ON tasks{method} ({columns})')
+
+
+def _copy_rows(source: str) -> None:
+    columns = ', '.join(COLUMNS)
+    op.execute(f'INSERT INTO tasks ({columns}) SELECT {columns} FROM {source}')
+
+
+def upgrade() -> None:
+    op.execute('UPDATE tasks SET created_at = now() WHERE created_at IS NULL')
+
+    op.execute('ALTER TABLE tasks RENAME TO tasks_legacy')
+    op.execute('ALTER INDEX tasks_pkey RENAME TO tasks_legacy_pkey')
+    _drop_indexes()
+
+    op.execute(
+        'CREATE TABLE tasks (LIKE tasks_legacy INCLUDING DEFAULTS INCLUDING GENERATED) '
+        'PARTITION BY RANGE (created_at)'
+    )
+    op.execute('ALTER TABLE tasks ADD PRIMARY KEY (id, created_at)')
+
+    oldest = op.get_bind().execute(sa.text('SELECT min(created_at) FROM tasks_legacy')).scalar()
+    now = datetime.utcnow()
+    month = date((oldest or now).year, (oldest or now).month, 1)
+    last = _add_months(date(now.year, now.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        op.execute(
+            f'CREATE TABLE tasks_y{month.year}m{month.month:02d} PARTITION OF tasks '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+
+    _copy_rows('tasks_legacy')
+    op.execute('DROP TABLE tasks_legacy')
+    _create_indexes()
+
+    op.create_table(
+        'task_archives',
+        sa.Column('month', sa.Date(), primary_key=True),
+        sa.Column('location', sa.String(500), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True)),
+    )
+
+
+def downgrade() -> None:
+    # Archived months are not restored; reload them from the archive store first if needed
+    op.drop_table('task_archives')
+
+    op.execute('ALTER TABLE tasks RENAME TO tasks_partitioned')
+    op.execute('ALTER INDEX tasks_pkey RENAME TO tasks_partitioned_pkey')
+    _drop_indexes()
+
+    op.execute('CREATE TABLE tasks (LIKE tasks_partitioned INCLUDING DEFAULTS INCLUDING GENERATED)')
+    op.execute('ALTER TABLE tasks ADD PRIMARY KEY (id)')
+
+    _copy_rows('tasks_partitioned')
+    # Dropping the parent drops every partition with it
+    op.execute('DROP TABLE tasks_partitioned')
+    _create_indexes()
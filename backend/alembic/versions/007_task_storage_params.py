@@ -0,0 +1,40 @@
+"""Narrow task heap tuples
+
+Sets toast_tuple_target and fillfactor on every tasks partition, so the
+JSONB payloads are stored out of line and progress/status UPDATEs copy
+only the small state columns. Partitioned parents take no storage
+parameters; new partitions get them from ArchiveService.ensure_partitions.
+Existing rows move out of line as they are next updated.
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def _partitions():
+    result = op.get_bind().execute(sa.text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'tasks'"
+    ))
+    return [name for (name,) in result]
+
+
+def upgrade() -> None:
+    for name in _partitions():
+        op.execute(f'ALTER TABLE {name} SET (toast_tuple_target = 128, fillfactor = 85)')
+
+
+def downgrade() -> None:
+    for name in _partitions():
+        op.execute(f'ALTER TABLE {name} RESET (toast_tuple_target, fillfactor)')
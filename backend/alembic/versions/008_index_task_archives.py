@@ -0,0 +1,52 @@
+"""Index task archives by user
+
+task_archive_segments locates each user's zstd frame inside a monthly
+archive, with the user's per type/status counts; archived_tasks maps an
+archived task ID to its owner and month. Together they let history,
+lookups by ID and statistics read only one user's slice of cold storage.
+Archives written before this revision hold a single frame per month and
+have no segments, so they are not read back; re-archive them if needed.
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'task_archive_segments',
+        sa.Column('month', sa.Date(), primary_key=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('offset', sa.BigInteger(), nullable=False),
+        sa.Column('length', sa.BigInteger(), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('counts', postgresql.JSONB(), nullable=False),
+    )
+    op.create_index(
+        'ix_task_archive_segments_user_month',
+        'task_archive_segments',
+        ['user_id', sa.text('month DESC')],
+    )
+
+    op.create_table(
+        'archived_tasks',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('archived_tasks')
+    op.drop_index('ix_task_archive_segments_user_month', table_name='task_archive_segments')
+    op.drop_table('task_archive_segments')
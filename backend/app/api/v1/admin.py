@@ -0,0 +1,95 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from app.config import get_settings
+from app.dependencies import get_admin_user
+from app.core.profiling import (
+    dump_tasks,
+    get_loop_monitor,
+    get_profile_store,
+    sample_process,
+)
+
+settings = get_settings()
+
+
+async def require_profiling() -> None:
+    """Hide the profiling routes on workers where profiling is disabled"""
+    if not settings.profiling_enabled:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profiling is disabled"
+        )
+
+
+# Every route here needs an admin token on a worker with profiling enabled
+router = APIRouter(dependencies=[Depends(get_admin_user), Depends(require_profiling)])
+
+# Profile kind -> (media type, file extension) of its download
+PROFILE_FORMATS = {
+    "cprofile": ("application/octet-stream", "prof"),  # pstats
+    "sample": ("text/plain", "collapsed.txt"),         # Collapsed stacks
+}
+
+
+@router.get("/profiling/loop")
+async def get_loop_stats():
+    """
+    Event loop lag of this worker and the blocking calls caught stalling it
+    """
+    monitor = get_loop_monitor()
+    return {**monitor.stats(), "last_task_dump": monitor.last_task_dump}
+
+
+@router.get("/profiling/tasks")
+async def get_top_coroutines(limit: int = Query(50, ge=1, le=1000)):
+    """
+    Pending coroutines of this worker, grouped by where they wait
+    """
+    return {"tasks": dump_tasks()[:limit]}
+
+
+@router.post("/profiling/sample")
+async def sample_worker(seconds: float = Query(10.0, gt=0)):
+    """
+    Sample this worker's event loop thread for a while
+
+    Returns flamegraph-ready collapsed stacks (flamegraph.pl, speedscope).
+    """
+    seconds = min(seconds, settings.profiling_max_seconds)
+    stacks = await sample_process(seconds)
+    profile_id = get_profile_store().add("sample", stacks.encode(), seconds=seconds, path="*")
+    return Response(
+        content=stacks,
+        media_type="text/plain",
+        headers={
+            "X-Profile-ID": profile_id,
+            "Content-Disposition": f'attachment; filename="{profile_id}.collapsed.txt"',
+        },
+    )
+
+
+@router.get("/profiling/profiles")
+async def list_profiles():
+    """
+    Profiles kept by this worker, newest first
+    """
+    return {"profiles": get_profile_store().list()}
+
+
+@router.get("/profiling/profiles/{profile_id}")
+async def download_profile(profile_id: str):
+    """
+    Download a profile: pstats for cProfile runs (pstats.Stats, snakeviz),
+    collapsed stacks for sampled ones
+    """
+    profile = get_profile_store().get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found on this worker"
+        )
+    media_type, extension = PROFILE_FORMATS[profile["kind"]]
+    return Response(
+        content=profile["data"],
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.{extension}"'},
+    )
@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.audio import (
     MusicGenerationRequest,
     TTSServiceRequest,
     AudioGenerationResponse,
 )
 from app.services.audio_service import AudioService
+from app.models.task import TaskType
 from app.core.ai_router import TaskType as RouterTaskType
+from app.core.quotas import generation_quota
+from app.dependencies import get_quota_identity
 import uuid
 import os
+from app.core.task_cache import compute_etag, etag_matches
 from app.config import get_settings
 
 router = APIRouter()
@@ -20,18 +24,22 @@ settings = get_settings()
 @router.post("/music/generate", response_model=AudioGenerationResponse)
 async def generate_music(
     request: MusicGenerationRequest,
+    quota_identity: str = Depends(get_quota_identity),
     db: AsyncSession = Depends(get_db),
 ):
     """Generate music using Suno AI"""
     try:
-        service = AudioService(db)
-        task_id = await service.generate_music(request)
+        async with generation_quota(quota_identity, TaskType.MUSIC_GENERATION, request.model_dump()):
+            service = AudioService(db)
+            task_id = await service.generate_music(request)
         return AudioGenerationResponse(
             task_id=task_id,
             status="pending",
             message="Music generation task queued",
             estimated_time=60
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -47,6 +55,7 @@ async def generate_music_with_lyrics(
     mood: str = Form("upbeat"),
     duration: int = Form(180),
     instrumental: bool = Form(False),
+    quota_identity: str = Depends(get_quota_identity),
     db: AsyncSession = Depends(get_db),
 ):
     """Generate music with custom lyrics using Suno"""
@@ -60,14 +69,17 @@ async def generate_music_with_lyrics(
             instrumental=instrumental,
         )
 
-        service = AudioService(db)
-        task_id = await service.generate_music(request)
+        async with generation_quota(quota_identity, TaskType.MUSIC_GENERATION, request.model_dump()):
+            service = AudioService(db)
+            task_id = await service.generate_music(request)
         return AudioGenerationResponse(
             task_id=task_id,
             status="pending",
             message="Music generation with lyrics task queued",
             estimated_time=90
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -81,6 +93,7 @@ async def text_to_speech(
     voice: str = Form("default"),
     speed: float = Form(1.0),
     language: str = Form("zh"),
+    quota_identity: str = Depends(get_quota_identity),
     db: AsyncSession = Depends(get_db),
 ):
     """Convert text to speech using Minimax TTS"""
@@ -94,14 +107,17 @@ async def text_to_speech(
             language=language,
         )
 
-        service = VoiceService(db)
-        task_id = await service.text_to_speech(request)
+        async with generation_quota(quota_identity, TaskType.TTS, request.model_dump()):
+            service = VoiceService(db)
+            task_id = await service.text_to_speech(request)
         return AudioGenerationResponse(
             task_id=task_id,
             status="pending",
             message="TTS task queued",
             estimated_time=15
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -115,6 +131,7 @@ async def text_to_speech_with_file(
     voice: str = Form("default"),
     speed: float = Form(1.0),
     language: str = Form("zh"),
+    quota_identity: str = Depends(get_quota_identity),
     db: AsyncSession = Depends(get_db),
 ):
     """Convert text file to speech"""
@@ -132,14 +149,17 @@ async def text_to_speech_with_file(
             language=language,
         )
 
-        service = VoiceService(db)
-        task_id = await service.text_to_speech(request)
+        async with generation_quota(quota_identity, TaskType.TTS, request.model_dump()):
+            service = VoiceService(db)
+            task_id = await service.text_to_speech(request)
         return AudioGenerationResponse(
             task_id=task_id,
             status="pending",
             message="TTS task queued",
             estimated_time=15
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -150,14 +170,16 @@ async def text_to_speech_with_file(
 @router.get("/task/{task_id}")
 async def get_audio_task_status(
     task_id: str,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get audio generation task status and results"""
     try:
         from app.services.history_service import HistoryService
 
         history_service = HistoryService(db)
-        task = await history_service.get_task_by_id(task_id)
+        task = await history_service.get_task_status(task_id)
 
         if not task:
             raise HTTPException(
@@ -165,8 +187,13 @@ async def get_audio_task_status(
                 detail="Task not found"
             )
 
+        etag = compute_etag(task)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        response.headers["ETag"] = etag
         return {
-            "task_id": task["id"],
+            "task_id": task["task_id"],
             "status": task["status"],
             "output_data": task["output_data"],
             "error_message": task.get("error_message"),
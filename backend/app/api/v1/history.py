@@ -1,8 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
-from app.services.history_service import HistoryService
+from app.database import get_db, get_read_db
+from app.services.history_service import HistoryService, parse_fields
+from app.services.export_service import (
+    ExportFormat,
+    export_history,
+    export_filename,
+    export_media_type,
+)
 from app.models.task import TaskType, TaskStatus
+from app.core.pagination import TotalMode
 
 router = APIRouter()
 
@@ -10,10 +18,16 @@ router = APIRouter()
 @router.get("/")
 async def get_history(
     task_type: str = Query(None, description="Filter by task type"),
-    status: str = Query(None, description="Filter by status"),
+    status_filter: str = Query(None, alias="status", description="Filter by status"),
     limit: int = Query(50, ge=1, le=100, description="Items per page"),
-    offset: int = Query(0, ge=0, description="Items to skip"),
-    db: AsyncSession = Depends(get_db),
+    cursor: str = Query(None, description="next_cursor of the previous page"),
+    total: TotalMode = Query(None, description="Include an exact or estimated total"),
+    model: str = Query(None, description="Filter by requested model"),
+    provider: str = Query(None, description="Filter by provider used"),
+    seed: int = Query(None, description="Filter by seed"),
+    fields: str = Query(None, description="Comma-separated fields to return, e.g. id,status,created_at"),
+    include_archived: bool = Query(False, description="Continue into archived months after the live history"),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get user generation history with optional filters"""
     try:
@@ -21,13 +35,19 @@ async def get_history(
 
         # Convert string to enum if provided
         task_type_enum = TaskType(task_type) if task_type else None
-        status_enum = TaskStatus(status) if status else None
+        status_enum = TaskStatus(status_filter) if status_filter else None
 
         result = await service.get_user_history(
             task_type=task_type_enum,
             status=status_enum,
             limit=limit,
-            offset=offset,
+            cursor=cursor,
+            total_mode=total,
+            model=model,
+            provider=provider,
+            seed=seed,
+            fields=parse_fields(fields),
+            include_archived=include_archived,
         )
         return result
     except ValueError as e:
@@ -42,10 +62,44 @@ async def get_history(
         )
 
 
+@router.get("/export")
+async def export_history_file(
+    format: ExportFormat = Query(ExportFormat.NDJSON, description="ndjson or csv"),
+    gzip: bool = Query(False, description="Gzip the file"),
+    task_type: str = Query(None, description="Filter by task type"),
+    status_filter: str = Query(None, alias="status", description="Filter by status"),
+    fields: str = Query(None, description="Comma-separated fields to export"),
+):
+    """Download the complete generation history as a streamed file"""
+    try:
+        task_type_enum = TaskType(task_type) if task_type else None
+        status_enum = TaskStatus(status_filter) if status_filter else None
+        field_list = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid filter value: {str(e)}"
+        )
+
+    return StreamingResponse(
+        export_history(
+            format,
+            compress=gzip,
+            task_type=task_type_enum,
+            status=status_enum,
+            fields=field_list,
+        ),
+        media_type=export_media_type(format, gzip),
+        headers={
+            "Content-Disposition": f'attachment; filename="{export_filename(format, gzip)}"',
+        },
+    )
+
+
 @router.get("/task/{task_id}")
 async def get_task_details(
     task_id: str,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get detailed information about a specific task"""
     try:
@@ -96,7 +150,7 @@ async def delete_task(
 
 @router.get("/statistics")
 async def get_statistics(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get user generation statistics"""
     try:
@@ -114,13 +168,25 @@ async def get_statistics(
 async def search_tasks(
     query: str = Query(..., min_length=1, description="Search query"),
     limit: int = Query(20, ge=1, le=100, description="Results limit"),
-    db: AsyncSession = Depends(get_db),
+    offset: int = Query(0, ge=0, le=1000, description="Results to skip"),
+    fields: str = Query(None, description="Comma-separated fields to return"),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Search tasks by prompt or output content"""
+    """Search tasks by prompt text, ranked by relevance"""
     try:
         service = HistoryService(db)
-        results = await service.search_tasks(query=query, limit=limit)
-        return {"results": results, "total": len(results)}
+        page = await service.search_tasks(
+            query=query,
+            limit=limit,
+            offset=offset,
+            fields=parse_fields(fields),
+        )
+        return {**page, "total": len(page["results"])}
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -132,8 +198,10 @@ async def search_tasks(
 async def get_tasks_by_type(
     task_type: str,
     limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0),
-    db: AsyncSession = Depends(get_db),
+    cursor: str = Query(None),
+    total: TotalMode = Query(None),
+    fields: str = Query(None),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get tasks filtered by type"""
     try:
@@ -142,13 +210,15 @@ async def get_tasks_by_type(
         result = await service.get_user_history(
             task_type=task_type_enum,
             limit=limit,
-            offset=offset,
+            cursor=cursor,
+            total_mode=total,
+            fields=parse_fields(fields),
         )
         return result
-    except ValueError:
+    except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid task type: {task_type}"
+            detail=f"Invalid filter value: {str(e)}"
         )
     except Exception as e:
         raise HTTPException(
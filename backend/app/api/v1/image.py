@@ -1,16 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Header, Response
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.schemas.image import (
     TextToImageRequest,
+    BatchTextToImageRequest,
     ImageToImageRequest,
     InpaintingRequest,
     ControlNetRequest,
     ImageGenerationResponse,
 )
+from app.schemas.task import BatchResponse
 from app.services.image_service import ImageService
+from app.services.batch_service import BatchService
+from app.models.task import TaskType
+from app.core.ai_router import TaskType as RouterTaskType
+from app.core.quotas import generation_quota
+from app.dependencies import get_quota_identity
 from app.utils.file_upload import upload_image
+from app.core.idempotency import run_idempotent
 from app.config import get_settings
 
 router = APIRouter()
@@ -21,20 +30,39 @@ settings = get_settings()
 @router.post("/text-to-image", response_model=ImageGenerationResponse)
 async def text_to_image(
     request: TextToImageRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    quota_identity: str = Depends(get_quota_identity),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Generate image from text prompt using AI Router priority system
+
+    Retries carrying the same Idempotency-Key return the original task
+    instead of creating a new task and a new provider call.
     """
-    try:
-        service = ImageService(db)
-        task_id = await service.text_to_image(request)
+    async def create(task_id: Optional[str]) -> ImageGenerationResponse:
+        async with generation_quota(quota_identity, TaskType.IMAGE_GENERATION, request.model_dump()):
+            service = ImageService(db)
+            task_id = await service.text_to_image(request, task_id=task_id)
         return ImageGenerationResponse(
             task_id=task_id,
             status="pending",
             message="Image generation task queued",
             estimated_time=30
         )
+
+    try:
+        return await run_idempotent(
+            idempotency_key,
+            scope="image:text-to-image",
+            payload=request.model_dump(mode="json"),
+            response_model=ImageGenerationResponse,
+            create=create,
+            response=response,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -42,6 +70,35 @@ async def text_to_image(
         )
 
 
+@router.post("/batch", response_model=BatchResponse)
+async def batch_text_to_image(
+    request: BatchTextToImageRequest,
+    quota_identity: str = Depends(get_quota_identity),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Queue many text-to-image generations with one bulk insert
+    """
+    try:
+        async with generation_quota(quota_identity, TaskType.IMAGE_GENERATION, *[item.model_dump() for item in request.items]):
+            service = BatchService(db)
+            return await service.create_batch(
+                TaskType.IMAGE_GENERATION,
+                RouterTaskType.IMAGE_GENERATION,
+                [
+                    ({"type": "text_to_image", **item.model_dump()}, ImageService.text_to_image_params(item))
+                    for item in request.items
+                ],
+            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to queue image batch: {str(e)}"
+        )
+
+
 @router.post("/image-to-image", response_model=ImageGenerationResponse)
 async def image_to_image(
     source_image: UploadFile = File(...),
@@ -51,6 +108,7 @@ async def image_to_image(
     steps: int = Form(30),
     cfg_scale: float = Form(7.5),
     seed: int = Form(None),
+    quota_identity: str = Depends(get_quota_identity),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -70,14 +128,17 @@ async def image_to_image(
             seed=seed,
         )
 
-        service = ImageService(db)
-        task_id = await service.image_to_image(request)
+        async with generation_quota(quota_identity, TaskType.IMAGE_GENERATION, request.model_dump()):
+            service = ImageService(db)
+            task_id = await service.image_to_image(request)
         return ImageGenerationResponse(
             task_id=task_id,
             status="pending",
             message="Image-to-image task queued",
             estimated_time=45
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -92,6 +153,7 @@ async def inpainting(
     prompt: str = Form(...),
     negative_prompt: str = Form(None),
     strength: float = Form(0.9),
+    quota_identity: str = Depends(get_quota_identity),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -110,14 +172,17 @@ async def inpainting(
             strength=strength,
         )
 
-        service = ImageService(db)
-        task_id = await service.inpainting(request)
+        async with generation_quota(quota_identity, TaskType.IMAGE_GENERATION, request.model_dump()):
+            service = ImageService(db)
+            task_id = await service.inpainting(request)
         return ImageGenerationResponse(
             task_id=task_id,
             status="pending",
             message="Inpainting task queued",
             estimated_time=40
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -133,6 +198,7 @@ async def controlnet(
     control_weight: float = Form(1.0),
     negative_prompt: str = Form(None),
     steps: int = Form(30),
+    quota_identity: str = Depends(get_quota_identity),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -151,14 +217,17 @@ async def controlnet(
             steps=steps,
         )
 
-        service = ImageService(db)
-        task_id = await service.controlnet(request)
+        async with generation_quota(quota_identity, TaskType.IMAGE_GENERATION, request.model_dump()):
+            service = ImageService(db)
+            task_id = await service.controlnet(request)
         return ImageGenerationResponse(
             task_id=task_id,
             status="pending",
             message="ControlNet task queued",
             estimated_time=50
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
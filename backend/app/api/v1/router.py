@@ -8,6 +8,7 @@ from app.api.v1 import (
     voice,
     tasks,
     router_health,
+    admin,
 )
 
 api_router = APIRouter()
@@ -23,3 +24,6 @@ api_router.include_router(tasks.router, prefix="/tasks", tags=["Task Management"
 
 # Include router health endpoint
 api_router.include_router(router_health.router, prefix="/router", tags=["AI Router Health"])
+
+# Include admin endpoints (admin token required)
+api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
@@ -1,51 +1,97 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
-from app.schemas.task import TaskResponse, TaskListResponse
+from app.database import get_db, get_read_db
+from app.schemas.task import TaskResponse, TaskListResponse, BatchProgressResponse
 from app.services.task_service import TaskService
+from app.services.batch_service import BatchService
+from app.core.task_cache import compute_etag, etag_matches
+from app.core.pagination import TotalMode
 
 router = APIRouter()
 
 
+@router.get("/batch/{batch_id}", response_model=BatchProgressResponse)
+async def get_batch_progress(
+    batch_id: str,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Get aggregate progress of a batch submission
+    """
+    try:
+        service = BatchService(db)
+        return await service.get_batch_progress(batch_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get batch progress: {str(e)}"
+        )
+
+
 @router.get("/{task_id}", response_model=TaskResponse)
 async def get_task(
     task_id: str,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Get task status and result
+
+    Supports If-None-Match: unchanged tasks return 304 with no body.
     """
     try:
         service = TaskService(db)
         task = await service.get_task(task_id)
-        return task
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Task not found: {str(e)}"
         )
 
+    # The time estimate drifts on every poll, so it is left out of the ETag
+    etag = compute_etag(task.model_dump(mode="json", exclude={"estimated_time_remaining"}))
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return task
+
 
 @router.get("/", response_model=TaskListResponse)
 async def list_tasks(
-    skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: str = Query(None),
+    total: TotalMode = Query(None),
     task_type: str = Query(None),
-    status: str = Query(None),
-    db: AsyncSession = Depends(get_db),
+    status_filter: str = Query(None, alias="status"),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     List tasks with filtering
+
+    Keyset-paginated: pass next_cursor from the previous page as cursor.
     """
     try:
         service = TaskService(db)
         tasks = await service.list_tasks(
-            skip=skip,
             limit=limit,
+            cursor=cursor,
             task_type=task_type,
-            status=status
+            status=status_filter,
+            total_mode=total,
         )
         return tasks
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -65,6 +111,13 @@ async def cancel_task(
         service = TaskService(db)
         await service.cancel_task(task_id)
         return {"message": "Task cancelled successfully"}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
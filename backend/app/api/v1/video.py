@@ -1,15 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Header, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.video import (
     TextToVideoRequest,
+    BatchTextToVideoRequest,
     ImageToVideoRequest,
     VideoToVideoRequest,
     VideoUpscalingRequest,
     VideoGenerationResponse,
 )
+from app.schemas.task import BatchResponse
 from app.services.video_service import VideoService
+from app.services.batch_service import BatchService
+from app.models.task import TaskType
+from app.core.ai_router import TaskType as RouterTaskType
+from app.core.quotas import generation_quota
+from app.dependencies import get_quota_identity
 from app.utils.file_upload import upload_image, upload_video
+from app.core.idempotency import run_idempotent
+from app.core.task_cache import compute_etag, etag_matches
 from app.config import get_settings
 
 router = APIRouter()
@@ -20,18 +30,39 @@ settings = get_settings()
 @router.post("/text-to-video", response_model=VideoGenerationResponse)
 async def text_to_video(
     request: TextToVideoRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    quota_identity: str = Depends(get_quota_identity),
     db: AsyncSession = Depends(get_db),
 ):
-    """Generate video from text using AI providers (Sora, Kling, Jimeng)"""
-    try:
-        service = VideoService(db)
-        task_id = await service.text_to_video(request)
+    """
+    Generate video from text using AI providers (Sora, Kling, Jimeng)
+
+    Retries carrying the same Idempotency-Key return the original task
+    instead of creating a new task and a new provider call.
+    """
+    async def create(task_id: Optional[str]) -> VideoGenerationResponse:
+        async with generation_quota(quota_identity, TaskType.VIDEO_GENERATION, request.model_dump()):
+            service = VideoService(db)
+            task_id = await service.text_to_video(request, task_id=task_id)
         return VideoGenerationResponse(
             task_id=task_id,
             status="pending",
             message="Video generation task queued",
             estimated_time=120  # 2 minutes estimate
         )
+
+    try:
+        return await run_idempotent(
+            idempotency_key,
+            scope="video:text-to-video",
+            payload=request.model_dump(mode="json"),
+            response_model=VideoGenerationResponse,
+            create=create,
+            response=response,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -39,6 +70,33 @@ async def text_to_video(
         )
 
 
+@router.post("/batch", response_model=BatchResponse)
+async def batch_text_to_video(
+    request: BatchTextToVideoRequest,
+    quota_identity: str = Depends(get_quota_identity),
+    db: AsyncSession = Depends(get_db),
+):
+    """Queue many text-to-video generations with one bulk insert"""
+    try:
+        async with generation_quota(quota_identity, TaskType.VIDEO_GENERATION, *[item.model_dump() for item in request.items]):
+            service = BatchService(db)
+            return await service.create_batch(
+                TaskType.VIDEO_GENERATION,
+                RouterTaskType.VIDEO_GENERATION,
+                [
+                    ({"type": "text_to_video", **item.model_dump(mode="json")}, VideoService.text_to_video_params(item))
+                    for item in request.items
+                ],
+            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to queue video batch: {str(e)}"
+        )
+
+
 @router.post("/image-to-video", response_model=VideoGenerationResponse)
 async def image_to_video(
     image: UploadFile = File(...),
@@ -47,6 +105,7 @@ async def image_to_video(
     duration: int = Form(4),
     fps: int = Form(8),
     model: str = Form("sora"),
+    quota_identity: str = Depends(get_quota_identity),
     db: AsyncSession = Depends(get_db),
 ):
     """Animate image to video"""
@@ -63,14 +122,17 @@ async def image_to_video(
             model=model,
         )
 
-        service = VideoService(db)
-        task_id = await service.image_to_video(request)
+        async with generation_quota(quota_identity, TaskType.VIDEO_GENERATION, request.model_dump()):
+            service = VideoService(db)
+            task_id = await service.image_to_video(request)
         return VideoGenerationResponse(
             task_id=task_id,
             status="pending",
             message="Image-to-video task queued",
             estimated_time=90
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -84,6 +146,7 @@ async def video_to_video(
     prompt: str = Form(...),
     strength: float = Form(0.7),
     duration: int = Form(None),
+    quota_identity: str = Depends(get_quota_identity),
     db: AsyncSession = Depends(get_db),
 ):
     """Apply style transfer to video"""
@@ -98,14 +161,17 @@ async def video_to_video(
             duration=duration,
         )
 
-        service = VideoService(db)
-        task_id = await service.video_to_video(request)
+        async with generation_quota(quota_identity, TaskType.VIDEO_GENERATION, request.model_dump()):
+            service = VideoService(db)
+            task_id = await service.video_to_video(request)
         return VideoGenerationResponse(
             task_id=task_id,
             status="pending",
             message="Video-to-video task queued",
             estimated_time=180
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -118,6 +184,7 @@ async def video_upscaling(
     video: UploadFile = File(...),
     scale_factor: float = Form(2.0),
     target_resolution: str = Form(None),
+    quota_identity: str = Depends(get_quota_identity),
     db: AsyncSession = Depends(get_db),
 ):
     """Upscale video to higher resolution"""
@@ -131,14 +198,17 @@ async def video_upscaling(
             target_resolution=target_resolution,
         )
 
-        service = VideoService(db)
-        task_id = await service.upscaling(request)
+        async with generation_quota(quota_identity, TaskType.VIDEO_GENERATION, request.model_dump()):
+            service = VideoService(db)
+            task_id = await service.upscaling(request)
         return VideoGenerationResponse(
             task_id=task_id,
             status="pending",
             message="Video upscaling task queued",
             estimated_time=300
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -149,7 +219,9 @@ async def video_upscaling(
 @router.get("/task/{task_id}")
 async def get_video_task_status(
     task_id: str,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get video generation task status and results"""
     try:
@@ -157,7 +229,7 @@ async def get_video_task_status(
         from app.models.task import TaskStatus
 
         history_service = HistoryService(db)
-        task = await history_service.get_task_by_id(task_id)
+        task = await history_service.get_task_status(task_id)
 
         if not task:
             raise HTTPException(
@@ -165,8 +237,13 @@ async def get_video_task_status(
                 detail="Task not found"
             )
 
+        etag = compute_etag(task)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        response.headers["ETag"] = etag
         return {
-            "task_id": task["id"],
+            "task_id": task["task_id"],
             "status": task["status"],
             "output_data": task["output_data"],
             "error_message": task.get("error_message"),
@@ -3,10 +3,17 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.schemas.voice import (
     TTSRequest,
+    BatchTTSRequest,
     VoiceCloneRequest,
     TTSResponse,
 )
+from app.schemas.task import BatchResponse
 from app.services.voice_service import VoiceService
+from app.services.batch_service import BatchService
+from app.models.task import TaskType
+from app.core.ai_router import TaskType as RouterTaskType
+from app.core.quotas import generation_quota
+from app.dependencies import get_quota_identity
 
 router = APIRouter()
 
@@ -14,20 +21,24 @@ router = APIRouter()
 @router.post("/speak", response_model=TTSResponse)
 async def text_to_speech(
     request: TTSRequest,
+    quota_identity: str = Depends(get_quota_identity),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Convert text to speech using Minimax or OpenAI
     """
     try:
-        service = VoiceService(db)
-        task_id = await service.text_to_speech(request)
+        async with generation_quota(quota_identity, TaskType.TTS, request.model_dump()):
+            service = VoiceService(db)
+            task_id = await service.text_to_speech(request)
         return TTSResponse(
             task_id=task_id,
             status="pending",
             message="TTS task queued",
             estimated_time=15
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -35,23 +46,56 @@ async def text_to_speech(
         )
 
 
+@router.post("/batch", response_model=BatchResponse)
+async def batch_text_to_speech(
+    request: BatchTTSRequest,
+    quota_identity: str = Depends(get_quota_identity),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Queue many TTS conversions with one bulk insert
+    """
+    try:
+        async with generation_quota(quota_identity, TaskType.TTS, *[item.model_dump() for item in request.items]):
+            service = BatchService(db)
+            return await service.create_batch(
+                TaskType.TTS,
+                RouterTaskType.TTS,
+                [
+                    (item.model_dump(mode="json"), VoiceService.text_to_speech_params(item))
+                    for item in request.items
+                ],
+            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to queue TTS batch: {str(e)}"
+        )
+
+
 @router.post("/clone", response_model=TTSResponse)
 async def voice_clone(
     request: VoiceCloneRequest,
+    quota_identity: str = Depends(get_quota_identity),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Clone voice from reference audio and generate new speech
     """
     try:
-        service = VoiceService(db)
-        task_id = await service.voice_clone(request)
+        async with generation_quota(quota_identity, TaskType.TTS, request.model_dump()):
+            service = VoiceService(db)
+            task_id = await service.voice_clone(request)
         return TTSResponse(
             task_id=task_id,
             status="pending",
             message="Voice cloning task queued",
             estimated_time=30
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
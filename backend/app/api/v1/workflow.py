@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.workflow import (
     CreateWorkflowRequest,
     WorkflowResponse,
@@ -9,6 +9,7 @@ from app.schemas.workflow import (
     WorkflowListResponse,
 )
 from app.services.workflow_service import WorkflowService
+from app.core.pagination import TotalMode
 
 router = APIRouter()
 
@@ -32,15 +33,21 @@ async def create_workflow(
 
 @router.get("/", response_model=WorkflowListResponse)
 async def list_workflows(
-    skip: int = 0,
-    limit: int = 20,
-    db: AsyncSession = Depends(get_db),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str = Query(None),
+    total: TotalMode = Query(None),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """List user workflows"""
+    """List user workflows, keyset-paginated via next_cursor"""
     try:
         service = WorkflowService(db)
-        result = await service.list_workflows(skip=skip, limit=limit)
+        result = await service.list_workflows(limit=limit, cursor=cursor, total_mode=total)
         return WorkflowListResponse(**result)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -51,7 +58,7 @@ async def list_workflows(
 @router.get("/{workflow_id}", response_model=WorkflowResponse)
 async def get_workflow(
     workflow_id: str,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get workflow details"""
     try:
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-from typing import List, Union
+from typing import List, Tuple, Union
 
 
 class Settings(BaseSettings):
@@ -18,9 +18,76 @@ class Settings(BaseSettings):
     # Database
     database_url: str
     database_test_url: str
+    database_replica_urls: str = ""  # Comma-separated read replicas; empty disables routing
+    replica_max_lag: float = 10.0  # Seconds; replicas further behind are skipped
+    replica_lag_check_interval: float = 5.0  # Seconds between lag probes per replica
+    replica_read_your_writes_window: float = 5.0  # Seconds a writer's reads stay on the primary
+
+    # Connection pools, sized per process role. Every API and Celery worker
+    # process has its own pool, so keep workers * (db_pool_size + db_max_overflow)
+    # + celery processes * (worker_db_pool_size + worker_db_max_overflow)
+    # below Postgres max_connections minus its reserved connections
+    process_role: str = "api"  # "api", or "worker"; defaulted to worker under the celery command (see celery_app)
+    db_pool_size: int = 10
+    db_max_overflow: int = 5
+    worker_db_pool_size: int = 2  # Celery runs one task per process at a time
+    worker_db_max_overflow: int = 1
+    db_pool_timeout: float = 30.0  # Seconds a checkout waits before failing
+    db_pool_recycle: int = 3600  # Seconds before a connection is replaced
+    db_statement_cache_size: int = 100  # asyncpg prepared statements per connection; 0 behind PgBouncer transaction pooling
+    db_prepared_statement_cache_size: int = 100  # SQLAlchemy's per-connection cache of asyncpg statements
 
     # Redis
     redis_url: str
+    task_status_cache_ttl: int = 86400  # 24 hours
+    idempotency_ttl: int = 86400  # Completed responses are replayed for 24 hours
+    idempotency_in_flight_ttl: int = 1800  # Claim expires if a request dies mid-flight
+
+    # Logging
+    log_level: str = "INFO"
+    log_json: bool = True  # One JSON object per record; false for plain text in development
+    request_log_sample_rate: float = 0.01  # Share of successful GETs logged per route
+    request_log_slow_threshold: float = 1.0  # Seconds; slower requests are always logged
+    request_log_buffer_size: int = 1000  # Recent requests kept in memory for /health/requests
+
+    # Metrics
+    metrics_publish_interval: float = 5.0  # Seconds between snapshots shared with the host's other workers
+    metrics_tracked_jobs: int = 2000  # Jobs whose status polls are counted, least recently polled dropped
+    metrics_poll_window: int = 600  # Seconds a job stays in the polls-per-job figures after its last poll
+
+    # Tracing
+    trace_exporter: str = "none"  # "none" (disabled), "file" (OTLP JSON lines) or "otlp" (OTLP/HTTP JSON)
+    trace_sample_rate: float = 0.01  # Share of new traces recorded; callers' traceparent flags are honoured
+    trace_file_path: str = "traces.jsonl"
+    trace_otlp_endpoint: str = "http://localhost:4318"  # Collector base URL; spans go to /v1/traces
+    trace_export_interval: float = 5.0  # Seconds between batched exports
+    trace_max_queue: int = 10000  # Finished spans buffered between exports; more are dropped
+
+    # Profiling (admin only)
+    profiling_enabled: bool = False  # X-Profile request profiling and the event loop monitor
+    profiling_sample_interval: float = 0.005  # Seconds between stack samples
+    profiling_max_seconds: float = 60.0  # Longest on-demand worker sample
+    profiling_max_profiles: int = 20  # Profiles kept per worker for download
+    profiling_task_dump_interval: float = 60.0  # Seconds between top coroutine dumps; 0 disables
+    loop_lag_check_interval: float = 0.25  # Seconds between event loop heartbeats
+    loop_block_threshold: float = 0.1  # Stall that gets the loop's stack captured as a blocking call
+
+    # Rate limiting
+    rate_limit_backend: str = "memory"  # "memory" (per process), "redis" (exact) or "hybrid" (local + batched Redis)
+    rate_limit_local_fraction: float = 0.05  # Hybrid: share of a limit a process admits between syncs
+    rate_limit_sync_interval: float = 0.5  # Hybrid: seconds between batched syncs to Redis
+    rate_limit_memory_max_keys: int = 100000  # Clients tracked by the in-memory fallback; least recent evicted
+    generation_quota_units: int = 200  # Cost units per user per window (one 1024x1024 image = 1 unit)
+    generation_quota_window: int = 60  # Seconds
+    daily_generation_budget: int = 5000  # Cost units per user per UTC day
+
+    # Task progress write-behind
+    progress_flush_interval: float = 2.0  # Seconds between batched progress UPDATEs
+
+    # Task partitioning and archival
+    task_partition_months_ahead: int = 3  # Monthly partitions created in advance
+    task_archive_after_days: int = 180  # Partitions entirely older than this are archived
+    archive_dir: str = "./archive"  # Compressed NDJSON archives of old partitions
 
     # Celery
     celery_broker_url: str
@@ -57,6 +124,17 @@ class Settings(BaseSettings):
         env_file = ".env"
         case_sensitive = False
 
+    @property
+    def db_pool_limits(self) -> Tuple[int, int]:
+        """(pool_size, max_overflow) for this process's role"""
+        if self.process_role == "worker":
+            return self.worker_db_pool_size, self.worker_db_max_overflow
+        return self.db_pool_size, self.db_max_overflow
+
+    @property
+    def replica_urls(self) -> List[str]:
+        return [url.strip() for url in self.database_replica_urls.split(",") if url.strip()]
+
     @property
     def comfyui_ws_url(self) -> str:
         return f"ws://{self.comfyui_host}:{self.comfyui_port}/ws"
@@ -2,6 +2,7 @@ from typing import Dict, Any, Optional, List
 from enum import Enum
 from loguru import logger
 import asyncio
+import time
 
 from app.integrations.base import BaseProvider, ProviderStatus
 from app.integrations.huggingface import HuggingFaceProvider
@@ -13,6 +14,13 @@ from app.integrations.minimax import MinimaxProvider
 
 from app.config import get_settings
 from app.core.router import MODEL_PRIORITIES
+from app.core.metrics import (
+    AI_PROVIDER_DURATION,
+    AI_PROVIDER_ERRORS,
+    AI_ROUTER_FALLBACKS,
+    AI_ROUTER_EXHAUSTED,
+)
+from app.core.tracing import current_span, span, traced
 
 settings = get_settings()
 
@@ -137,6 +145,7 @@ class AIRouter:
             except Exception as e:
                 logger.error(f"{name} health check error: {e}")
 
+    @traced("ai_router.route")
     async def route(
         self,
         task_type: TaskType,
@@ -150,6 +159,9 @@ class AIRouter:
             await self.initialize()
 
         request = AIRequest(task_type, params, fallback_enabled)
+        route_span = current_span.get()
+        if route_span is not None:
+            route_span.set_attribute("ai.task_type", task_type.value)
 
         # Get provider priority list for this task type
         priority_list = MODEL_PRIORITIES.get(task_type.value, [])
@@ -181,14 +193,20 @@ class AIRouter:
                 logger.warning(f"Provider {provider_name} doesn't support {task_type}, skipping")
                 continue
 
+            started = time.perf_counter()
             try:
                 logger.info(f"Routing to provider: {provider_name}")
 
                 # Execute request
-                result = await self._execute_provider(provider, task_type, params)
+                with span("ai_provider.call", provider=provider_name, task_type=task_type.value):
+                    result = await self._execute_provider(provider, task_type, params)
+                AI_PROVIDER_DURATION.observe(time.perf_counter() - started, provider_name, task_type.value, "success")
 
                 request.success_provider = provider_name
                 request.attempted_providers.append(provider_name)
+                if route_span is not None:
+                    route_span.set_attribute("ai.provider", provider_name)
+                    route_span.set_attribute("ai.attempts", len(request.attempted_providers))
 
                 # Add routing metadata
                 result["routing"] = {
@@ -200,6 +218,7 @@ class AIRouter:
 
                 # Log if fallback was used
                 if len(request.attempted_providers) > 1:
+                    AI_ROUTER_FALLBACKS.inc(provider_name, task_type.value)
                     logger.info(f"Request completed after {len(request.attempted_providers)} attempts")
                     result["routing"]["message"] = f"Successfully switched to {provider_name}"
 
@@ -207,6 +226,8 @@ class AIRouter:
 
             except Exception as e:
                 logger.error(f"Provider {provider_name} failed: {str(e)}")
+                AI_PROVIDER_DURATION.observe(time.perf_counter() - started, provider_name, task_type.value, "error")
+                AI_PROVIDER_ERRORS.inc(provider_name, task_type.value, type(e).__name__)
                 provider.record_failure()
                 request.attempted_providers.append(provider_name)
 
@@ -215,6 +236,7 @@ class AIRouter:
                     raise
 
         # All providers failed
+        AI_ROUTER_EXHAUSTED.inc(task_type.value)
         error_msg = f"All providers failed. Attempted: {request.attempted_providers}"
         logger.error(error_msg)
         raise Exception(error_msg)
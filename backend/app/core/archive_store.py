@@ -0,0 +1,125 @@
+"""
+Archive Store - Compressed NDJSON blobs for cold task data
+"""
+import json
+import os
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class Segment:
+    """Location and totals of one user's frame within an archive"""
+    __slots__ = ("user_id", "offset", "length", "row_count", "counts")
+
+    def __init__(self, user_id: str, offset: int):
+        self.user_id = user_id
+        self.offset = offset
+        self.length = 0
+        self.row_count = 0
+        self.counts: Counter = Counter()  # (task_type, status) -> tasks
+
+
+class ArchiveWriter:
+    """
+    Writes records grouped by user, one zstd frame per user
+
+    Records must arrive sorted by user_id. All methods block on compression
+    and file I/O; async callers run them in a thread.
+    """
+
+    def __init__(self, path: str):
+        import zstandard
+
+        self.path = path
+        self._tmp_path = f"{path}.tmp"
+        self._file = open(self._tmp_path, "wb")
+        self._compressor = zstandard.ZstdCompressor(level=10)
+        self._frame = None
+        self._segment: Optional[Segment] = None
+        self.segments: List[Segment] = []
+        self.count = 0
+
+    def _finish_frame(self) -> None:
+        if self._segment is None:
+            return
+        self._file.write(self._frame.flush())
+        self._segment.length = self._file.tell() - self._segment.offset
+        self.segments.append(self._segment)
+        self._segment = None
+
+    def write_batch(self, records: List[Dict[str, Any]]) -> None:
+        for record in records:
+            user_id = str(record["user_id"])
+            if self._segment is None or self._segment.user_id != user_id:
+                self._finish_frame()
+                self._segment = Segment(user_id, self._file.tell())
+                self._frame = self._compressor.compressobj()
+            line = json.dumps(record, default=str, ensure_ascii=False).encode() + b"\n"
+            self._file.write(self._frame.compress(line))
+            self._segment.row_count += 1
+            self._segment.counts[(record["task_type"], record["status"])] += 1
+            self.count += 1
+
+    def close(self) -> None:
+        """
+        Finish the archive
+
+        It only appears under its key once closed, so readers never see a
+        partially written file.
+        """
+        self._finish_frame()
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+class ArchiveStore:
+    """
+    Write-once store of zstd-compressed NDJSON archives
+
+    Backed by a local directory (settings.archive_dir), which can be a mounted
+    bucket; keys are relative paths such as "tasks/2026-01.ndjson.zst".
+    Archives are a concatenation of independent frames, so one user's
+    records can be read by offset without decompressing the rest.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or settings.archive_dir
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def create_writer(self, key: str) -> ArchiveWriter:
+        """Start a new archive; close() publishes it, abort() discards it"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return ArchiveWriter(path)
+
+    def read_segment(self, key: str, offset: int, length: int) -> List[Dict[str, Any]]:
+        """Read and decode one frame of an archive"""
+        import zstandard
+
+        with open(self._path(key), "rb") as f:
+            f.seek(offset)
+            compressed = f.read(length)
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(compressed)
+        return [json.loads(line) for line in data.splitlines() if line]
+
+
+# Global store instance
+_archive_store: Optional[ArchiveStore] = None
+
+
+def get_archive_store() -> ArchiveStore:
+    """Get or create global archive store"""
+    global _archive_store
+    if _archive_store is None:
+        _archive_store = ArchiveStore()
+    return _archive_store
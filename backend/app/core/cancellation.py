@@ -0,0 +1,90 @@
+"""
+Task Cancellation - Redis flags that stop running workers and their poll loops
+"""
+import asyncio
+from typing import Optional
+from loguru import logger
+from app.config import get_settings
+
+settings = get_settings()
+
+CANCEL_KEY_PREFIX = "task_cancel:"
+CANCEL_FLAG_TTL = 24 * 3600  # Longer than any task may stay queued
+CANCEL_CHECK_INTERVAL = 1.0  # Seconds between flag checks in running workers
+
+
+def _cancel_key(task_id: str) -> str:
+    return f"{CANCEL_KEY_PREFIX}{task_id}"
+
+
+class CancellationRegistry:
+    """
+    Cross-process cancellation flags
+
+    The API sets a flag when a task is cancelled, workers check it before
+    starting and while running, and cancel the routing coroutine once it is set.
+    """
+
+    def __init__(self, redis_client=None):
+        self.redis_client = redis_client
+        self._sync_client = None
+
+    async def _get_client(self):
+        if self.redis_client is None:
+            import redis.asyncio as redis
+            self.redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+        return self.redis_client
+
+    def _get_sync_client(self):
+        if self._sync_client is None:
+            import redis
+            self._sync_client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+        return self._sync_client
+
+    async def request_cancel(self, task_id: str) -> None:
+        """Flag a task as cancelled"""
+        client = await self._get_client()
+        await client.set(_cancel_key(task_id), "1", ex=CANCEL_FLAG_TTL)
+
+    async def is_cancelled(self, task_id: str) -> bool:
+        """Check whether a task has been cancelled"""
+        try:
+            client = await self._get_client()
+            return bool(await client.exists(_cancel_key(task_id)))
+        except Exception as e:
+            logger.warning(f"Cancellation check failed for {task_id}: {str(e)}")
+            return False
+
+    def is_cancelled_sync(self, task_id: str) -> bool:
+        """Synchronous variant of is_cancelled() for Celery workers"""
+        try:
+            return bool(self._get_sync_client().exists(_cancel_key(task_id)))
+        except Exception as e:
+            logger.warning(f"Cancellation check failed for {task_id}: {str(e)}")
+            return False
+
+    async def watch(
+        self,
+        task_id: str,
+        target: asyncio.Future,
+        interval: float = CANCEL_CHECK_INTERVAL,
+    ) -> None:
+        """Cancel target as soon as the task is flagged; run alongside it"""
+        while not target.done():
+            if await self.is_cancelled(task_id):
+                logger.info(f"Cancelling running task: {task_id}")
+                target.cancel()
+                return
+            await asyncio.sleep(interval)
+
+
+# Global registry instance
+_registry: Optional[CancellationRegistry] = None
+
+
+def get_cancellation_registry() -> CancellationRegistry:
+    """Get or create global cancellation registry"""
+    global _registry
+    if _registry is None:
+        _registry = CancellationRegistry()
+    return _registry
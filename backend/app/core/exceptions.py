@@ -43,6 +43,16 @@ class TaskNotFoundException(APIException):
         )
 
 
+class TaskNotCancellableException(APIException):
+    """Task already reached a final state"""
+    def __init__(self, task_id: str, task_status: str):
+        super().__init__(
+            detail=f"Task '{task_id}' is already {task_status} and cannot be cancelled",
+            status_code=status.HTTP_409_CONFLICT,
+            error_code="TASK_NOT_CANCELLABLE",
+        )
+
+
 class ValidationException(APIException):
     """Input validation failed"""
     def __init__(self, detail: str, field: str = None):
@@ -54,3 +64,14 @@ class ValidationException(APIException):
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             error_code="VALIDATION_ERROR",
         )
+
+
+class QuotaExceededException(APIException):
+    """Cost-weighted generation quota or daily budget used up"""
+    def __init__(self, detail: str, retry_after: int):
+        super().__init__(
+            detail=detail,
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            error_code="QUOTA_EXCEEDED",
+        )
+        self.headers = {"Retry-After": str(max(retry_after, 1))}
@@ -0,0 +1,179 @@
+"""
+Idempotency Keys - Redis-backed deduplication for POST generation endpoints
+"""
+import hashlib
+import json
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Type, TypeVar
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel
+from loguru import logger
+from app.config import get_settings
+
+settings = get_settings()
+
+IDEMPOTENCY_KEY_PREFIX = "idempotency:"
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+ResponseT = TypeVar("ResponseT", bound=BaseModel)
+
+
+def request_fingerprint(payload: Dict[str, Any]) -> str:
+    """Stable hash of a request body, used to detect key reuse with a different body"""
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Stores one record per (scope, Idempotency-Key) in Redis
+
+    A record is claimed atomically with SET NX while the first request is in
+    flight, then replaced with the final response once it completes.
+    """
+
+    def __init__(self, redis_client=None):
+        self.redis_client = redis_client
+
+    async def _get_client(self):
+        if self.redis_client is None:
+            import redis.asyncio as redis
+            self.redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+        return self.redis_client
+
+    @staticmethod
+    def _key(scope: str, key: str) -> str:
+        return f"{IDEMPOTENCY_KEY_PREFIX}{scope}:{key}"
+
+    async def claim(self, scope: str, key: str, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Claim a key for an in-flight request
+
+        Returns None when the claim succeeded, otherwise the existing record.
+        """
+        client = await self._get_client()
+        redis_key = self._key(scope, key)
+
+        # Two attempts cover a record expiring between SET NX and GET
+        for _ in range(2):
+            claimed = await client.set(
+                redis_key,
+                json.dumps(record),
+                nx=True,
+                ex=settings.idempotency_in_flight_ttl,
+            )
+            if claimed:
+                return None
+
+            existing = await client.get(redis_key)
+            if existing is not None:
+                return json.loads(existing)
+
+        raise RuntimeError(f"Could not claim idempotency key: {key}")
+
+    async def complete(self, scope: str, key: str, record: Dict[str, Any]) -> None:
+        """Store the final response for replay"""
+        client = await self._get_client()
+        await client.set(self._key(scope, key), json.dumps(record), ex=settings.idempotency_ttl)
+
+    async def release(self, scope: str, key: str) -> None:
+        """Drop an in-flight claim so a retry can run again"""
+        client = await self._get_client()
+        await client.delete(self._key(scope, key))
+
+
+# Global store instance
+_store: Optional[IdempotencyStore] = None
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """Get or create global idempotency store"""
+    global _store
+    if _store is None:
+        _store = IdempotencyStore()
+    return _store
+
+
+async def run_idempotent(
+    idempotency_key: Optional[str],
+    scope: str,
+    payload: Dict[str, Any],
+    response_model: Type[ResponseT],
+    create: Callable[[Optional[str]], Awaitable[ResponseT]],
+    response: Optional[Response] = None,
+) -> ResponseT:
+    """
+    Run a task-creating handler at most once per Idempotency-Key
+
+    Args:
+        idempotency_key: Value of the Idempotency-Key header (None disables dedup)
+        scope: Endpoint scope, e.g. "image:text-to-image"
+        payload: Request body, fingerprinted to reject key reuse with another body
+        response_model: Response schema used to rebuild replayed responses
+        create: Handler receiving the pre-allocated task ID
+        response: Outgoing response, used to flag replays
+
+    Duplicates of a completed request get the stored response. Duplicates of
+    an in-flight request get the pre-allocated task ID with a pending status;
+    handlers commit the PENDING row under that ID before doing the slow work,
+    so it can be polled right away.
+    """
+    if not idempotency_key:
+        return await create(None)
+
+    if len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be at most {MAX_IDEMPOTENCY_KEY_LENGTH} characters",
+        )
+
+    store = get_idempotency_store()
+    fingerprint = request_fingerprint(payload)
+    task_id = str(uuid.uuid4())
+    record = {"state": "in_flight", "task_id": task_id, "fingerprint": fingerprint}
+
+    try:
+        existing = await store.claim(scope, idempotency_key, record)
+    except Exception as e:
+        # Fail open: without Redis we lose deduplication, not availability
+        logger.warning(f"Idempotency check failed for {scope}: {str(e)}")
+        return await create(None)
+
+    if existing is not None:
+        if existing.get("fingerprint") != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with a different request body",
+            )
+
+        logger.info(f"Idempotent replay for {scope} (task: {existing.get('task_id')})")
+        if response is not None:
+            response.headers["Idempotent-Replayed"] = "true"
+
+        if existing.get("state") == "completed":
+            return response_model(**existing["response"])
+        return response_model(
+            task_id=existing["task_id"],
+            status="pending",
+            message="Request with this Idempotency-Key is still in progress",
+        )
+
+    try:
+        result = await create(task_id)
+    except Exception:
+        try:
+            await store.release(scope, idempotency_key)
+        except Exception as e:
+            logger.warning(f"Failed to release idempotency key for {scope}: {str(e)}")
+        raise
+
+    try:
+        await store.complete(
+            scope,
+            idempotency_key,
+            {**record, "state": "completed", "response": result.model_dump(mode="json")},
+        )
+    except Exception as e:
+        logger.warning(f"Failed to store idempotent response for {scope}: {str(e)}")
+
+    return result
@@ -0,0 +1,403 @@
+"""
+Metrics - In-process counters and histograms, merged across workers for /metrics
+"""
+import asyncio
+import bisect
+import json
+import os
+import socket
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+from app.config import get_settings
+from app.core.pool_metrics import WAIT_BUCKETS, instrumented_pools
+
+settings = get_settings()
+
+# Upper bounds (seconds); generation calls can take minutes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+WORKERS_KEY_PREFIX = "metrics:workers:"
+WORKER_KEY_PREFIX = "metrics:worker:"
+
+# Every metric family, in exposition order
+_families: List[Any] = []
+# Functions producing snapshot families at collection time (gauges etc.)
+_collectors: List[Callable[[], Dict[str, Dict[str, Any]]]] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_string(labelnames: Tuple[str, ...], labelvalues: Tuple[str, ...]) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(labelnames, labelvalues))
+
+
+class Counter:
+    """Monotonic counter per label combination"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: Dict[Tuple[str, ...], float] = {}
+        _families.append(self)
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "type": "counter",
+            "help": self.documentation,
+            "series": {_label_string(self.labelnames, key): value for key, value in self.values.items()},
+        }
+
+
+class Histogram:
+    """Bucketed observations per label combination"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # Per label combination: count per bucket (last one +Inf), then the sum
+        self.series: Dict[Tuple[str, ...], List[float]] = {}
+        _families.append(self)
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        series = self.series.get(labelvalues)
+        if series is None:
+            series = self.series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "type": "histogram",
+            "help": self.documentation,
+            "buckets": list(self.buckets),
+            "series": {_label_string(self.labelnames, key): list(value) for key, value in self.series.items()},
+        }
+
+
+class JobPolls:
+    """
+    Status polls per job over a recent window
+
+    Jobs are tracked least recently polled first and dropped once idle for
+    metrics_poll_window or beyond metrics_tracked_jobs, so memory stays
+    bounded however many tasks are polled.
+    """
+
+    def __init__(self, max_jobs: Optional[int] = None, window: Optional[int] = None):
+        self.max_jobs = max_jobs or settings.metrics_tracked_jobs
+        self.window = window or settings.metrics_poll_window
+        self._jobs: "OrderedDict[str, List[float]]" = OrderedDict()  # job id -> [polls, last poll]
+
+    def record(self, job_id: str) -> None:
+        now = time.monotonic()
+        entry = self._jobs.get(job_id)
+        if entry is None:
+            self._jobs[job_id] = [1, now]
+            if len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        else:
+            entry[0] += 1
+            entry[1] = now
+            self._jobs.move_to_end(job_id)
+
+    def snapshot(self) -> Dict[str, int]:
+        cutoff = time.monotonic() - self.window
+        while self._jobs:
+            job_id, (_, last_poll) = next(iter(self._jobs.items()))
+            if last_poll >= cutoff:
+                break
+            del self._jobs[job_id]
+        return {job_id: int(polls) for job_id, (polls, _) in self._jobs.items()}
+
+
+# Metric families
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template and status",
+    ("method", "route", "status"),
+    LATENCY_BUCKETS,
+)
+AI_PROVIDER_DURATION = Histogram(
+    "ai_provider_request_duration_seconds",
+    "AI provider call latency by outcome",
+    ("provider", "task_type", "outcome"),
+    LATENCY_BUCKETS,
+)
+AI_PROVIDER_ERRORS = Counter(
+    "ai_provider_errors_total",
+    "AI provider call failures by exception class",
+    ("provider", "task_type", "error"),
+)
+AI_ROUTER_FALLBACKS = Counter(
+    "ai_router_fallbacks_total",
+    "Requests served by a provider after an earlier one failed",
+    ("provider", "task_type"),
+)
+AI_ROUTER_EXHAUSTED = Counter(
+    "ai_router_exhausted_total",
+    "Requests for which every provider failed",
+    ("task_type",),
+)
+TASK_STATUS_POLLS = Counter(
+    "task_status_polls_total",
+    "Task and batch status polls by route template",
+    ("route",),
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total",
+    "Requests rejected by the rate limiting middleware",
+    ("rule",),
+)
+QUOTA_REJECTIONS = Counter(
+    "generation_quota_rejections_total",
+    "Generation requests rejected by per-user quotas",
+    ("quota", "task_type"),
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the loop monitor's heartbeat ran",
+    (),
+    (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+EVENT_LOOP_BLOCKS = Counter(
+    "event_loop_blocks_total",
+    "Times the event loop stalled past loop_block_threshold",
+)
+
+# Global job poll tracker
+_job_polls: Optional[JobPolls] = None
+
+
+def get_job_polls() -> JobPolls:
+    """Get or create global job poll tracker"""
+    global _job_polls
+    if _job_polls is None:
+        _job_polls = JobPolls()
+    return _job_polls
+
+
+def collector(fn: Callable[[], Dict[str, Dict[str, Any]]]) -> Callable:
+    """Register a function adding families to every snapshot"""
+    _collectors.append(fn)
+    return fn
+
+
+@collector
+def _pool_families() -> Dict[str, Dict[str, Any]]:
+    """Connection pool usage; summed across workers it is this host's Postgres connections"""
+    gauges = {
+        "db_pool_size": ("Configured pool size", lambda pool: pool.size()),
+        "db_pool_checked_out": ("Connections in use", lambda pool: pool.checkedout()),
+        "db_pool_overflow": ("Connections open beyond the pool size", lambda pool: max(pool.overflow(), 0)),
+    }
+    families = {
+        name: {"type": "gauge", "help": documentation, "series": {}}
+        for name, (documentation, _) in gauges.items()
+    }
+    wait = {"type": "histogram", "help": "Pool checkout wait", "buckets": list(WAIT_BUCKETS), "series": {}}
+    timeouts = {"type": "counter", "help": "Checkouts that hit pool_timeout", "series": {}}
+
+    for name, pool in instrumented_pools():
+        labels = _label_string(("pool",), (name,))
+        for family, (_, read) in gauges.items():
+            families[family]["series"][labels] = read(pool)
+        wait["series"][labels] = list(pool.metrics.bucket_counts) + [pool.metrics.wait_sum]
+        timeouts["series"][labels] = pool.metrics.timeouts
+
+    families["db_pool_checkout_wait_seconds"] = wait
+    families["db_pool_checkout_timeouts_total"] = timeouts
+    return families
+
+
+def snapshot() -> Dict[str, Any]:
+    """This process's metrics as plain data"""
+    families = {family.name: family.snapshot() for family in _families}
+    for fn in _collectors:
+        families.update(fn())
+    return {"families": families, "job_polls": get_job_polls().snapshot()}
+
+
+def merge(snapshots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum snapshots of several workers series by series"""
+    families: Dict[str, Dict[str, Any]] = {}
+    job_polls: Dict[str, int] = {}
+    for worker in snapshots:
+        for name, family in worker["families"].items():
+            merged = families.get(name)
+            if merged is None:
+                families[name] = {**family, "series": dict(family["series"])}
+                continue
+            series = merged["series"]
+            for labels, value in family["series"].items():
+                current = series.get(labels)
+                if current is None:
+                    series[labels] = value
+                elif isinstance(value, list):
+                    series[labels] = [a + b for a, b in zip(current, value)]
+                else:
+                    series[labels] = current + value
+        for job_id, polls in worker["job_polls"].items():
+            job_polls[job_id] = job_polls.get(job_id, 0) + polls
+    return {"families": families, "job_polls": job_polls}
+
+
+def _poll_families(job_polls: Dict[str, int]) -> Dict[str, Dict[str, Any]]:
+    """Distribution of polls per recently polled job"""
+    counts = sorted(job_polls.values())
+    series = {}
+    if counts:
+        for quantile in (0.5, 0.9, 0.99):
+            series[f'quantile="{quantile}"'] = counts[min(int(len(counts) * quantile), len(counts) - 1)]
+        series['quantile="1"'] = counts[-1]
+    return {
+        "task_status_polls_per_job": {
+            "type": "gauge",
+            "help": f"Status polls per job, over jobs polled in the last {settings.metrics_poll_window}s",
+            "series": series,
+        },
+        "task_status_jobs_polled": {
+            "type": "gauge",
+            "help": f"Jobs polled in the last {settings.metrics_poll_window}s",
+            "series": {"": len(counts)},
+        },
+    }
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render(merged: Dict[str, Any]) -> str:
+    """Prometheus text exposition format (0.0.4)"""
+    families = {**merged["families"], **_poll_families(merged["job_polls"])}
+    lines = []
+    for name, family in families.items():
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for labels, value in family["series"].items():
+            if family["type"] != "histogram":
+                lines.append(f"{name}{{{labels}}} {_format_value(value)}" if labels else f"{name} {_format_value(value)}")
+                continue
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0
+            for bound, count in zip(family["buckets"] + ["+Inf"], value[:-1]):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {_format_value(cumulative)}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{name}_sum{suffix} {_format_value(value[-1])}")
+            lines.append(f"{name}_count{suffix} {_format_value(cumulative)}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsPublisher:
+    """
+    Shares this worker's metrics with the other workers on the host
+
+    Each uvicorn worker aggregates in memory and writes a snapshot to Redis
+    every metrics_publish_interval; /metrics, served by whichever worker
+    takes the scrape, merges the snapshots of every live worker on the same
+    host. A worker's snapshot expires a few intervals after it stops, and
+    its counters then drop out of the sums, which Prometheus treats as a
+    counter reset.
+    """
+
+    def __init__(self, redis_client=None, interval: Optional[float] = None):
+        self.redis_client = redis_client
+        self.interval = interval or settings.metrics_publish_interval
+        host = socket.gethostname()
+        self.workers_key = f"{WORKERS_KEY_PREFIX}{host}"
+        self.worker_key = f"{WORKER_KEY_PREFIX}{host}:{os.getpid()}"
+        self._task: Optional[asyncio.Task] = None
+
+    def _get_client(self):
+        if self.redis_client is None:
+            import redis.asyncio as redis
+            self.redis_client = redis.from_url(settings.redis_url)
+        return self.redis_client
+
+    async def publish(self, data: Optional[Dict[str, Any]] = None) -> None:
+        """Write this worker's snapshot"""
+        data = data or snapshot()
+        try:
+            async with self._get_client().pipeline(transaction=False) as pipe:
+                pipe.set(self.worker_key, json.dumps(data), ex=int(self.interval * 3) + 1)
+                pipe.sadd(self.workers_key, self.worker_key)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to publish metrics: {str(e)}")
+
+    async def collect(self) -> Dict[str, Any]:
+        """Merged metrics of every live worker on this host; only this one if Redis fails"""
+        own = snapshot()
+        await self.publish(own)
+        try:
+            client = self._get_client()
+            worker_keys = [key.decode() if isinstance(key, bytes) else key for key in await client.smembers(self.workers_key)]
+            others = [key for key in worker_keys if key != self.worker_key]
+            values = await client.mget(others) if others else []
+        except Exception as e:
+            logger.warning(f"Failed to collect worker metrics: {str(e)}")
+            return merge([own])
+
+        snapshots = [own]
+        expired = []
+        for key, value in zip(others, values):
+            if value is None:
+                expired.append(key)
+            else:
+                snapshots.append(json.loads(value))
+        if expired:
+            try:
+                await client.srem(self.workers_key, *expired)
+            except Exception as e:
+                logger.warning(f"Failed to prune expired metrics workers: {str(e)}")
+        return merge(snapshots)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.publish()
+
+    def start(self) -> None:
+        """Start periodic publishing on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop publishing and withdraw this worker's snapshot"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            client = self._get_client()
+            await client.srem(self.workers_key, self.worker_key)
+            await client.delete(self.worker_key)
+        except Exception as e:
+            logger.warning(f"Failed to withdraw metrics: {str(e)}")
+
+
+# Global metrics publisher instance
+_metrics_publisher: Optional[MetricsPublisher] = None
+
+
+def get_metrics_publisher() -> MetricsPublisher:
+    """Get or create global metrics publisher"""
+    global _metrics_publisher
+    if _metrics_publisher is None:
+        _metrics_publisher = MetricsPublisher()
+    return _metrics_publisher
@@ -1,119 +1,174 @@
-from fastapi import Request, status
+from fastapi import status
 from fastapi.responses import JSONResponse
 from loguru import logger
 import time
 import uuid
-from typing import Callable
+from typing import Dict
+from app.core.metrics import HTTP_REQUEST_DURATION, TASK_STATUS_POLLS, get_job_polls
+from app.core.request_log import get_request_log, request_entry
+from app.core.tracing import KIND_SERVER, STATUS_ERROR, current_span, parse_traceparent, start_span
 
 
-async def error_handler_middleware(request: Request, call_next: Callable):
+# Pure ASGI middleware: each layer is one coroutine call that wraps `send`,
+# without BaseHTTPMiddleware's extra task and response stream per request,
+# so streaming responses pass straight through.
+
+
+def scope_headers(scope) -> Dict[str, str]:
+    """Request headers of an ASGI scope, lower-cased names; the last duplicate wins"""
+    return {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+
+
+def get_client_ip(scope, headers: Dict[str, str]) -> str:
+    """Client IP address, honouring proxy headers"""
+    # Check for forwarded IP (behind proxy)
+    forwarded = headers.get("x-forwarded-for")
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+
+    # Check for real IP
+    real_ip = headers.get("x-real-ip")
+    if real_ip:
+        return real_ip
+
+    # Fall back to direct IP
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def record_request_metrics(scope, status_code, seconds: float) -> None:
+    """Latency by route template, plus status polls per job"""
+    route = getattr(scope.get("route"), "path", None) or "unmatched"
+    HTTP_REQUEST_DURATION.observe(seconds, scope["method"], route, str(status_code or "none"))
+
+    if scope["method"] == "GET":
+        path_params = scope.get("path_params") or {}
+        job_id = path_params.get("task_id") or path_params.get("batch_id")
+        if job_id:
+            TASK_STATUS_POLLS.inc(route)
+            get_job_polls().record(job_id)
+
+
+class ErrorHandlerMiddleware:
     """
     Global error handling middleware
     """
-    try:
-        response = await call_next(request)
-        return response
-    except Exception as e:
-        # Generate request ID for tracking
-        request_id = getattr(request.state, "request_id", str(uuid.uuid4()))
-
-        logger.error(
-            f"Unhandled error [RequestID: {request_id}]: {str(e)}",
-            exc_info=True,
-            extra={
-                "request_id": request_id,
-                "path": request.url.path,
-                "method": request.method,
-                "error_type": type(e).__name__,
-            }
-        )
-
-        # Return structured error response
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={
-                "detail": "Internal server error",
-                "error_type": type(e).__name__,
-                "request_id": request_id,
-            }
-        )
 
-
-async def request_logging_middleware(request: Request, call_next: Callable):
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        response_started = False
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            # Generate request ID for tracking
+            request_id = scope.get("state", {}).get("request_id") or str(uuid.uuid4())
+
+            logger.error(
+                f"Unhandled error [RequestID: {request_id}]: {str(e)}",
+                exc_info=True,
+                extra={
+                    "request_id": request_id,
+                    "path": scope["path"],
+                    "method": scope["method"],
+                    "error_type": type(e).__name__,
+                }
+            )
+
+            # Too late for an error response once the body is on its way
+            if response_started:
+                raise
+
+            # Return structured error response
+            response = JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={
+                    "detail": "Internal server error",
+                    "error_type": type(e).__name__,
+                    "request_id": request_id,
+                }
+            )
+            await response(scope, receive, send)
+
+
+class RequestLoggingMiddleware:
     """
-    Enhanced request/response logging middleware with security audit
+    Request logging middleware with security audit
+
+    Each request becomes one structured record in the request log ring
+    buffer; errors, slow requests and state-changing methods are always
+    logged, other requests are sampled per route (see app.core.request_log).
     """
-    # Generate unique request ID
-    request_id = str(uuid.uuid4())
-    request.state.request_id = request_id
-
-    start_time = time.time()
-
-    # Extract client information
-    client_ip = request.client.host if request.client else "unknown"
-
-    # Check for forwarded headers (proxy)
-    forwarded_for = request.headers.get("X-Forwarded-For")
-    real_ip = request.headers.get("X-Real-IP")
-    if forwarded_for:
-        client_ip = forwarded_for.split(",")[0].strip()
-    elif real_ip:
-        client_ip = real_ip
-
-    # Log request with enhanced information
-    log_data = {
-        "request_id": request_id,
-        "method": request.method,
-        "path": request.url.path,
-        "query_params": str(request.query_params),
-        "client_ip": client_ip,
-        "user_agent": request.headers.get("user-agent", "unknown"),
-    }
-
-    # Log sensitive operations
-    if request.method in ["POST", "PUT", "DELETE"]:
-        log_data["content_type"] = request.headers.get("content-type", "unknown")
-        logger.info(f"[SECURITY] Sensitive operation: {request.method} {request.url.path}", extra=log_data)
-
-    logger.info(f"Request [ID: {request_id}]: {request.method} {request.url.path}", extra=log_data)
-
-    # Process request
-    try:
-        response = await call_next(request)
-    except Exception as e:
-        # Log error with request ID
-        logger.error(
-            f"Request failed [ID: {request_id}]: {str(e)}",
-            extra={
-                "request_id": request_id,
-                "path": request.url.path,
-                "method": request.method,
-                "error": str(e),
-            }
+
+    def __init__(self, app):
+        self.app = app
+        self.request_log = get_request_log()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        # Generate unique request ID; request.state reads scope["state"]
+        request_id = str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id
+
+        start_time = time.time()
+        status_code = None
+
+        # Root span of the request, continuing the caller's trace if it sent one
+        headers = scope_headers(scope)
+        request_span = start_span(
+            f"HTTP {scope['method']}",
+            parse_traceparent(headers.get("traceparent")),
+            KIND_SERVER,
+            request_id=request_id,
         )
-        raise
-
-    # Calculate processing time
-    process_time = time.time() - start_time
-
-    # Log response with enhanced information
-    response_log_data = {
-        "request_id": request_id,
-        "method": request.method,
-        "path": request.url.path,
-        "status_code": response.status_code,
-        "process_time": round(process_time, 3),
-        "client_ip": client_ip,
-    }
-
-    # Log slow requests (> 1 second)
-    if process_time > 1.0:
-        logger.warning(f"Slow request [ID: {request_id}]", extra=response_log_data)
-    else:
-        logger.info(f"Response [ID: {request_id}]: {response.status_code}", extra=response_log_data)
-
-    # Add headers to response
-    response.headers["X-Request-ID"] = request_id
-    response.headers["X-Process-Time"] = str(round(process_time, 3))
-
-    return response
+        response_headers = [(b"x-request-id", request_id.encode())]
+        if request_span is not None:
+            response_headers.append((b"x-trace-id", request_span.trace_id.encode()))
+        token = current_span.set(request_span)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Time to the response headers; streamed bodies keep going after this
+                message["headers"] = list(message.get("headers", [])) + response_headers + [
+                    (b"x-process-time", str(round(time.time() - start_time, 3)).encode()),
+                ]
+            await send(message)
+
+        # Process request; a failure is recorded without a status
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_span.reset(token)
+            record_request_metrics(scope, status_code, time.time() - start_time)
+            entry = request_entry(
+                scope,
+                request_id,
+                get_client_ip(scope, headers),
+                headers.get("user-agent", "unknown"),
+                status_code,
+                start_time,
+            )
+            if request_span is not None:
+                entry["trace_id"] = request_span.trace_id
+                request_span.name = f"HTTP {scope['method']} {entry['route'] or 'unmatched'}"
+                request_span.set_attribute("http.route", entry["route"] or "unmatched")
+                request_span.set_attribute("http.status_code", status_code or 500)
+                if status_code is None or status_code >= 500:
+                    request_span.status = STATUS_ERROR
+                request_span.end()
+            self.request_log.record(entry)
@@ -0,0 +1,106 @@
+"""
+Connection Pool Metrics - Live pool usage and checkout wait times per engine
+"""
+import bisect
+import time
+from typing import Any, Dict, List, Tuple
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Upper bounds (seconds) of the checkout wait histogram buckets; the last
+# ones bracket the default pool_timeout of 30s
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class PoolMetrics:
+    """Checkout wait histogram of one pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.bucket_counts = [0] * (len(WAIT_BUCKETS) + 1)  # last bucket: +Inf
+        self.wait_count = 0
+        self.wait_sum = 0.0
+        self.timeouts = 0
+
+    def observe_wait(self, seconds: float) -> None:
+        self.bucket_counts[bisect.bisect_left(WAIT_BUCKETS, seconds)] += 1
+        self.wait_count += 1
+        self.wait_sum += seconds
+
+    def histogram(self) -> Dict[str, int]:
+        """Cumulative bucket counts keyed by upper bound, Prometheus style"""
+        buckets = {}
+        total = 0
+        for bound, count in zip(WAIT_BUCKETS + (float("inf"),), self.bucket_counts):
+            total += count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = total
+        return buckets
+
+
+class MeteredPool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool that times every checkout
+
+    The wait covers queueing for a free connection and, when the pool grows,
+    opening a new one; checkouts that hit pool_timeout are counted apart.
+    """
+
+    metrics: PoolMetrics = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.timeouts += 1
+            raise
+        if self.metrics is not None:
+            self.metrics.observe_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+# Instrumented engines by name ("primary", "replica-0", ...)
+_engines: Dict[str, Any] = {}
+
+
+def instrument_engine(name: str, engine) -> None:
+    """Attach wait metrics to an engine created with poolclass=MeteredPool"""
+    pool = engine.pool
+    if isinstance(pool, MeteredPool):
+        pool.metrics = PoolMetrics(name)
+        _engines[name] = engine
+
+
+def instrumented_pools() -> List[Tuple[str, MeteredPool]]:
+    """(name, pool) of every instrumented engine"""
+    return [(name, engine.pool) for name, engine in _engines.items()]
+
+
+def pool_stats() -> List[Dict[str, Any]]:
+    """Live usage and checkout wait statistics of every instrumented pool"""
+    stats = []
+    for name, engine in _engines.items():
+        pool = engine.pool
+        metrics = pool.metrics
+        stats.append({
+            "name": name,
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            # Negative while fewer than pool_size connections are open
+            "overflow": max(pool.overflow(), 0),
+            "wait": {
+                "count": metrics.wait_count,
+                "sum": round(metrics.wait_sum, 6),
+                "timeouts": metrics.timeouts,
+                "buckets": metrics.histogram(),
+            },
+        })
+    return stats
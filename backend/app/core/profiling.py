@@ -0,0 +1,334 @@
+"""
+Profiling - On-demand request profiles, event loop lag and blocking call detection
+"""
+import asyncio
+import cProfile
+import io
+import marshal
+import pstats
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter as StackCounter, OrderedDict, deque
+from typing import Any, Dict, List, Optional
+from loguru import logger
+from app.config import get_settings
+from app.core.metrics import EVENT_LOOP_BLOCKS, EVENT_LOOP_LAG
+from app.core.security import decode_access_token, is_admin_claims
+
+settings = get_settings()
+
+PROFILE_HEADER = b"x-profile"  # Value: one of PROFILE_KINDS
+PROFILE_KINDS = ("cprofile", "sample")
+# Deepest stack kept in collapsed output and blocking call reports
+MAX_STACK_DEPTH = 64
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{frame.f_lineno})"
+
+
+def collapse_stack(frame) -> str:
+    """Root-first, semicolon-separated stack of a frame, as flamegraph tools read it"""
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """
+    Statistical profiler of one thread
+
+    A daemon thread reads the target thread's current frame every
+    profiling_sample_interval and counts collapsed stacks. On the event loop
+    thread this sees whatever coroutine is running, so concurrent requests
+    share one profile.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: Optional[float] = None):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval or settings.profiling_sample_interval
+        self.stacks: StackCounter = StackCounter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        """Stop sampling; returns collapsed stacks, one "stack count" per line"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+
+def pstats_bytes(profile: cProfile.Profile) -> bytes:
+    """A profile in the format pstats.Stats(path) and snakeviz load"""
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    return marshal.dumps(stats.stats)
+
+
+class ProfileStore:
+    """Recent profiles, oldest dropped past profiling_max_profiles"""
+
+    def __init__(self, max_profiles: Optional[int] = None):
+        self.max_profiles = max_profiles or settings.profiling_max_profiles
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def add(self, kind: str, data: bytes, profile_id: Optional[str] = None, **details: Any) -> str:
+        profile_id = profile_id or uuid.uuid4().hex
+        self._profiles[profile_id] = {"id": profile_id, "kind": kind, "data": data, "created_at": time.time(), **details}
+        while len(self._profiles) > self.max_profiles:
+            self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [
+            {key: value for key, value in profile.items() if key != "data"} | {"size": len(profile["data"])}
+            for profile in reversed(self._profiles.values())
+        ]
+
+
+class ProfilingMiddleware:
+    """
+    Profiles single requests on demand
+
+    A request carrying `X-Profile: cprofile` or `X-Profile: sample` and an
+    admin bearer token is run under cProfile or the stack sampler; the
+    response carries X-Profile-ID for downloading the result from
+    /api/v1/admin/profiling/profiles/{id}. Both profilers observe the whole
+    event loop thread while the request runs, other requests included.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.store = get_profile_store()
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        kind = None
+        authorization = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                kind = value.decode("latin-1").strip().lower()
+            elif name == b"authorization":
+                authorization = value.decode("latin-1")
+        if kind not in PROFILE_KINDS or not _is_admin(authorization):
+            return await self.app(scope, receive, send)
+
+        # One profile at a time: cProfile can't nest and samples would mix
+        if self._lock.locked():
+            return await self.app(scope, receive, send)
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        async with self._lock:
+            started = time.perf_counter()
+            if kind == "cprofile":
+                profile = cProfile.Profile()
+                profile.enable()
+                try:
+                    await self.app(scope, receive, send_wrapper)
+                finally:
+                    profile.disable()
+                    data = pstats_bytes(profile)
+            else:
+                sampler = StackSampler()
+                sampler.start()
+                try:
+                    await self.app(scope, receive, send_wrapper)
+                finally:
+                    data = sampler.stop().encode()
+
+            self.store.add(
+                kind,
+                data,
+                profile_id,
+                path=scope["path"],
+                method=scope["method"],
+                seconds=round(time.perf_counter() - started, 3),
+            )
+
+
+def _is_admin(authorization: Optional[str]) -> bool:
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return False
+    try:
+        return is_admin_claims(decode_access_token(authorization[7:]))
+    except Exception:
+        return False
+
+
+class LoopMonitor:
+    """
+    Event loop lag and blocking call detector
+
+    A heartbeat task wakes every loop_lag_check_interval; how late it wakes
+    is the loop's lag. A watchdog thread checks the heartbeat, and when the
+    loop has not run it for loop_block_threshold it captures the loop
+    thread's stack, which points at the blocking call (synchronous file or
+    socket I/O, CPU-heavy work). Every profiling_task_dump_interval the
+    pending coroutines are grouped by where they wait and logged.
+    """
+
+    def __init__(self):
+        self.interval = settings.loop_lag_check_interval
+        self.threshold = settings.loop_block_threshold
+        self.lags: deque = deque(maxlen=1000)
+        self.blocking_calls: deque = deque(maxlen=100)
+        self.last_task_dump: List[Dict[str, Any]] = []
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    async def _run(self) -> None:
+        next_dump = time.monotonic() + settings.profiling_task_dump_interval
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = max(now - expected, 0.0)
+            self.lags.append(lag)
+            EVENT_LOOP_LAG.observe(lag)
+
+            if settings.profiling_task_dump_interval and now >= next_dump:
+                next_dump = now + settings.profiling_task_dump_interval
+                self.last_task_dump = dump_tasks()
+                top = ", ".join(f"{row['count']}x {row['coroutine']} @ {row['waiting_at']}" for row in self.last_task_dump[:5])
+                logger.info(f"Top coroutines: {top}")
+
+    def _watch(self) -> None:
+        reported = None
+        while not self._stop.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            stalled = time.monotonic() - heartbeat - self.interval
+            if stalled < self.threshold or heartbeat == reported:
+                continue
+            # One report per stall; the heartbeat moves once the loop runs again
+            reported = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.format_stack(frame, limit=MAX_STACK_DEPTH)
+            self.blocking_calls.append({
+                "at": time.time(),
+                "blocked_for": round(stalled, 3),
+                "location": _frame_label(frame),
+                "stack": stack,
+            })
+            EVENT_LOOP_BLOCKS.inc()
+            logger.warning(f"Event loop blocked for {stalled:.3f}s at {_frame_label(frame)}")
+
+    def stats(self) -> Dict[str, Any]:
+        lags = sorted(self.lags)
+        return {
+            "samples": len(lags),
+            "lag_p50": round(lags[len(lags) // 2], 6) if lags else None,
+            "lag_p99": round(lags[min(int(len(lags) * 0.99), len(lags) - 1)], 6) if lags else None,
+            "lag_max": round(lags[-1], 6) if lags else None,
+            "blocking_calls": list(reversed(self.blocking_calls)),
+        }
+
+    def start(self) -> None:
+        """Start monitoring the running event loop"""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.ensure_future(self._run())
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def _waiting_at(coro) -> str:
+    """Innermost frame a suspended coroutine chain is waiting in"""
+    frame = None
+    depth = 0
+    while coro is not None and depth < MAX_STACK_DEPTH:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "ag_frame", None) or frame
+        coro = getattr(coro, "cr_await", None)
+        depth += 1
+    return _frame_label(frame) if frame is not None else "?"
+
+
+def dump_tasks() -> List[Dict[str, Any]]:
+    """Pending tasks grouped by coroutine and wait location, most common first"""
+    groups: StackCounter = StackCounter()
+    for task in asyncio.all_tasks():
+        coro = task.get_coro()
+        name = getattr(getattr(coro, "cr_code", None), "co_qualname", None) or repr(coro)
+        groups[(name, _waiting_at(coro))] += 1
+    return [
+        {"coroutine": name, "waiting_at": location, "count": count}
+        for (name, location), count in groups.most_common()
+    ]
+
+
+async def sample_process(seconds: float) -> str:
+    """Collapsed stacks of the event loop thread over the next `seconds`"""
+    sampler = StackSampler()
+    sampler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        stacks = sampler.stop()
+    return stacks
+
+
+# Global instances
+_profile_store: Optional[ProfileStore] = None
+_loop_monitor: Optional[LoopMonitor] = None
+
+
+def get_profile_store() -> ProfileStore:
+    """Get or create global profile store"""
+    global _profile_store
+    if _profile_store is None:
+        _profile_store = ProfileStore()
+    return _profile_store
+
+
+def get_loop_monitor() -> LoopMonitor:
+    """Get or create global loop monitor"""
+    global _loop_monitor
+    if _loop_monitor is None:
+        _loop_monitor = LoopMonitor()
+    return _loop_monitor
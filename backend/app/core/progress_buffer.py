@@ -0,0 +1,143 @@
+"""
+Progress Buffer - Coalesced write-behind for task progress updates
+"""
+import asyncio
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+from sqlalchemy import update, bindparam
+from loguru import logger
+from app.config import get_settings
+from app.models.task import Task, TERMINAL_STATUSES
+from app.core.task_cache import get_task_cache
+
+settings = get_settings()
+
+# Task whose progress is being reported in the current context (set by workers)
+current_task_id: ContextVar[Optional[str]] = ContextVar("current_task_id", default=None)
+
+tasks_table = Task.__table__
+
+# One statement executed with many parameter sets; finished tasks are never touched
+_FLUSH_STATEMENT = (
+    update(tasks_table)
+    .where(
+        tasks_table.c.id == bindparam("b_id"),
+        # Plain comparisons rather than NOT IN: expanding IN can't be used with executemany
+        *[tasks_table.c.status != terminal for terminal in TERMINAL_STATUSES],
+    )
+    .values(
+        progress=bindparam("b_progress"),
+        progress_message=bindparam("b_message"),
+    )
+)
+
+
+class ProgressBuffer:
+    """
+    Write-behind buffer for task progress
+
+    Progress reports only overwrite an in-memory entry per task, so N reports
+    between flushes cost one row update. A periodic flush writes all pending
+    entries with one batched UPDATE and one pipelined status cache write.
+    Terminal states bypass the buffer and are written synchronously by
+    HistoryService, which also discards anything still pending for the task.
+    """
+
+    def __init__(self, session_factory=None, interval: Optional[float] = None):
+        self._session_factory = session_factory
+        self.interval = interval or settings.progress_flush_interval
+        self._pending: Dict[str, Tuple[int, Optional[str]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def record(self, task_id: str, progress: int, message: Optional[str] = None) -> None:
+        """Buffer a progress report, replacing any pending one for the task"""
+        self._pending[str(task_id)] = (max(0, min(100, int(progress))), message)
+
+    def discard(self, task_id: str) -> None:
+        """Drop pending progress for a task that reached a final state"""
+        self._pending.pop(str(task_id), None)
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def flush(self) -> int:
+        """Write all pending progress; returns the number of tasks flushed"""
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, {}
+        params = [
+            {"b_id": task_id, "b_progress": progress, "b_message": message}
+            for task_id, (progress, message) in pending.items()
+        ]
+
+        try:
+            session_factory = self._session_factory
+            if session_factory is None:
+                from app.database import AsyncSessionLocal
+                session_factory = AsyncSessionLocal
+
+            async with session_factory() as db:
+                await db.execute(_FLUSH_STATEMENT, params)
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Progress flush failed for {len(params)} tasks: {str(e)}")
+            # Requeue unless a newer report arrived meanwhile
+            for task_id, entry in pending.items():
+                self._pending.setdefault(task_id, entry)
+            return 0
+
+        # Tasks that finished meanwhile were skipped by the UPDATE; the cache
+        # write skips them too, even if their terminal state landed after it
+        await get_task_cache().set_many_unless_final({
+            task_id: {"progress": progress, "message": message}
+            for task_id, (progress, message) in pending.items()
+        })
+        return len(params)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    def start(self) -> None:
+        """Start periodic flushing on the running event loop"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop periodic flushing and write whatever is still pending"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+
+# Global buffer instance
+_progress_buffer: Optional[ProgressBuffer] = None
+
+
+def get_progress_buffer() -> ProgressBuffer:
+    """Get or create global progress buffer"""
+    global _progress_buffer
+    if _progress_buffer is None:
+        _progress_buffer = ProgressBuffer()
+    return _progress_buffer
+
+
+def report_progress(progress: int, message: Optional[str] = None, task_id: Optional[str] = None) -> None:
+    """
+    Report progress for a task
+
+    task_id defaults to the task bound to the current context, so provider
+    poll loops can report without knowing which Task row they serve.
+    """
+    task_id = task_id or current_task_id.get()
+    if task_id is None:
+        return
+    get_progress_buffer().record(task_id, progress, message)
@@ -0,0 +1,192 @@
+"""
+Generation Quotas - Cost-weighted per-user rate limits and daily budgets
+"""
+import math
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
+from loguru import logger
+from app.config import get_settings
+from app.core.exceptions import QuotaExceededException
+from app.core.metrics import QUOTA_REJECTIONS
+from app.core.rate_limit import RateLimiter, RateLimitAlgorithm
+from app.models.task import TaskType
+
+settings = get_settings()
+
+# Units are calibrated to provider load: one 1024x1024 image is 1 unit
+IMAGE_UNIT_PIXELS = 1024 * 1024
+VIDEO_UNITS_PER_SECOND = 4  # At 1280x720
+VIDEO_UNIT_PIXELS = 1280 * 720
+VIDEO_DEFAULT_DURATION = 5.0
+UPSCALING_UNITS = {2: 10, 4: 40}  # By scale factor; a 4k target counts as 4x
+MUSIC_UNITS_PER_30S = 3
+TTS_CHARACTERS_PER_UNIT = 1000
+
+
+def generation_cost(task_type: TaskType, params: Dict[str, Any]) -> int:
+    """Quota units one generation request consumes"""
+    if task_type == TaskType.IMAGE_GENERATION:
+        pixels = (params.get("width") or 1024) * (params.get("height") or 1024)
+        return (params.get("num_images") or 1) * max(1, math.ceil(pixels / IMAGE_UNIT_PIXELS))
+
+    if task_type == TaskType.VIDEO_GENERATION:
+        if params.get("scale_factor"):
+            factor = 4 if params.get("target_resolution") == "4k" else params["scale_factor"]
+            return UPSCALING_UNITS.get(factor, UPSCALING_UNITS[4])
+        duration = params.get("duration") or VIDEO_DEFAULT_DURATION
+        pixels = (params.get("width") or 1280) * (params.get("height") or 720)
+        return max(1, math.ceil(duration * VIDEO_UNITS_PER_SECOND * pixels / VIDEO_UNIT_PIXELS))
+
+    if task_type == TaskType.MUSIC_GENERATION:
+        return max(1, math.ceil((params.get("duration") or 30.0) / 30 * MUSIC_UNITS_PER_30S))
+
+    if task_type == TaskType.TTS:
+        return max(1, math.ceil(len(params.get("text") or "") / TTS_CHARACTERS_PER_UNIT))
+
+    return 1
+
+
+def _day_end(now: datetime) -> int:
+    """Epoch seconds of the next UTC midnight"""
+    tomorrow = (now + timedelta(days=1)).date()
+    return int((datetime(tomorrow.year, tomorrow.month, tomorrow.day) - datetime(1970, 1, 1)).total_seconds())
+
+
+class QuotaManager:
+    """
+    Cost-weighted generation quotas per caller
+
+    Every generation request consumes units proportional to its cost from
+    two allowances: a per-minute rate (GCRA, so bursts up to the allowance
+    are fine) and a daily budget that resets at UTC midnight. The
+    IP-based middleware rules still apply on top of this.
+    """
+
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None):
+        self.rate_limiter = rate_limiter
+
+    def _get_rate_limiter(self) -> RateLimiter:
+        if self.rate_limiter is None:
+            import redis.asyncio as redis
+            self.rate_limiter = RateLimiter(redis.from_url(settings.redis_url))
+        return self.rate_limiter
+
+    async def charge(self, user_id: str, task_type: TaskType, items: Iterable[Dict[str, Any]]) -> "QuotaCharge":
+        """
+        Consume quota for one or more generations of a task type
+
+        Returns the charge, for refund() if the generation fails; raises
+        QuotaExceededException when either allowance is used up, in which
+        case nothing stays charged.
+        """
+        cost = sum(generation_cost(task_type, params) for params in items)
+        limiter = self._get_rate_limiter()
+
+        units = settings.generation_quota_units
+        window = settings.generation_quota_window
+        if cost > units:
+            QUOTA_REJECTIONS.inc("rate", task_type.value)
+            raise QuotaExceededException(
+                f"Request costs {cost} units, more than the {units} allowed per {window}s",
+                retry_after=window,
+            )
+
+        allowed, info = await limiter.is_allowed(
+            f"quota:{user_id}", units, window, RateLimitAlgorithm.GCRA, cost=cost
+        )
+        if not allowed:
+            QUOTA_REJECTIONS.inc("rate", task_type.value)
+            logger.warning(f"Generation quota exceeded for {user_id}: {cost} units of {task_type.value}")
+            raise QuotaExceededException(
+                f"Generation quota exceeded: {cost} units requested, {info['remaining']} left",
+                retry_after=info["reset"] - int(time.time()),
+            )
+
+        now = datetime.utcnow()
+        charge = QuotaCharge(user_id, cost, now.date().isoformat(), _day_end(now))
+        allowed, info = await limiter.consume_budget(
+            charge.budget_key, cost, settings.daily_generation_budget, charge.day_end
+        )
+        if not allowed:
+            # The request is never served, so give back its rate allowance
+            await self._refund_rate(charge)
+            QUOTA_REJECTIONS.inc("daily", task_type.value)
+            logger.warning(f"Daily generation budget exhausted for {user_id}")
+            raise QuotaExceededException(
+                f"Daily generation budget exceeded: {cost} units requested, {info['remaining']} left",
+                retry_after=info["reset"] - int(time.time()),
+            )
+
+        return charge
+
+    async def refund(self, charge: "QuotaCharge") -> None:
+        """Give back both allowances of a charge whose generation failed"""
+        await self._refund_rate(charge)
+        # A negative cost always fits the budget; the day's key is used even after midnight
+        await self._get_rate_limiter().consume_budget(
+            charge.budget_key, -charge.cost, settings.daily_generation_budget, charge.day_end
+        )
+
+    async def _refund_rate(self, charge: "QuotaCharge") -> None:
+        # GCRA with a negative cost moves the theoretical arrival time back
+        await self._get_rate_limiter().is_allowed(
+            f"quota:{charge.user_id}",
+            settings.generation_quota_units,
+            settings.generation_quota_window,
+            RateLimitAlgorithm.GCRA,
+            cost=-charge.cost,
+        )
+
+
+class QuotaCharge:
+    """Units taken from one user's allowances by a single charge"""
+    __slots__ = ("user_id", "cost", "day", "day_end")
+
+    def __init__(self, user_id: str, cost: int, day: str, day_end: int):
+        self.user_id = user_id
+        self.cost = cost
+        self.day = day
+        self.day_end = day_end
+
+    @property
+    def budget_key(self) -> str:
+        return f"daily:{self.user_id}:{self.day}"
+
+
+# Global quota manager instance
+_quota_manager: Optional[QuotaManager] = None
+
+
+def get_quota_manager() -> QuotaManager:
+    """Get or create global quota manager"""
+    global _quota_manager
+    if _quota_manager is None:
+        _quota_manager = QuotaManager()
+    return _quota_manager
+
+
+@asynccontextmanager
+async def generation_quota(
+    identity: str,
+    task_type: TaskType,
+    *items: Dict[str, Any],
+) -> AsyncIterator[QuotaCharge]:
+    """
+    Charge a caller's quotas around queuing generation requests
+
+    identity keys both allowances (see dependencies.get_quota_identity).
+    If the block raises (provider, validation or database errors), both
+    allowances are refunded, so failed requests cost nothing.
+    """
+    manager = get_quota_manager()
+    charge = await manager.charge(identity, task_type, items)
+    try:
+        yield charge
+    except BaseException:
+        try:
+            await manager.refund(charge)
+        except Exception as e:
+            logger.warning(f"Quota refund failed for {charge.user_id}: {str(e)}")
+        raise
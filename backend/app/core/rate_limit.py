@@ -1,48 +1,210 @@
 """
-Rate Limiting Middleware - Redis-based Sliding Window Implementation
+Rate Limiting Middleware - Redis-based Sliding Window and GCRA Implementations
 """
-from fastapi import Request, Response, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
-from typing import Dict, Optional
+from fastapi import status
+from fastapi.responses import JSONResponse
+from typing import Dict, Optional, Tuple
+from collections import OrderedDict, deque
 import asyncio
+import enum
+import math
 import time
+import uuid
 from loguru import logger
 from app.config import get_settings
+from app.core.metrics import RATE_LIMIT_REJECTIONS
+from app.core.middleware import scope_headers, get_client_ip
 
 settings = get_settings()
 
+# Sliding window log, evaluated atomically on the server:
+# KEYS[1] = window key, ARGV = limit, window (ms), unique member, cost.
+# Uses the Redis clock, so workers with skewed clocks share one window.
+# Returns {allowed, requests in window, reset (ms epoch)}.
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[4])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local current = redis.call('ZCARD', KEYS[1])
+
+if current + cost > limit then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    local reset = now + window
+    if oldest[2] then
+        reset = tonumber(oldest[2]) + window
+    end
+    return {0, current, reset}
+end
+
+for i = 1, cost do
+    redis.call('ZADD', KEYS[1], now, ARGV[3] .. ':' .. i)
+end
+redis.call('PEXPIRE', KEYS[1], window)
+return {1, current + cost, now + window}
+"""
+
+# Generic cell rate algorithm: the key holds a single "theoretical arrival
+# time" (TAT, ms epoch) instead of one entry per request. Each request
+# pushes the TAT forward by window / limit; a request is admitted while the
+# TAT stays within one window of now, which allows bursts of up to `limit`.
+# A request of weight `cost` counts as that many requests; a negative cost
+# refunds units.
+# KEYS[1] = TAT key, ARGV = limit, window (ms), cost.
+# Returns {allowed, remaining, reset (ms epoch)}.
+GCRA_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local interval = window / limit
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + tonumber(time[2]) / 1000
+
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval * cost
+local allow_at = new_tat - window
+
+-- A negative cost (refund) back to or past now leaves a full burst
+if new_tat <= now then
+    redis.call('DEL', KEYS[1])
+    return {1, limit, math.ceil(now)}
+end
+
+if now < allow_at then
+    return {0, math.floor((now - (tat - window)) / interval), math.ceil(allow_at)}
+end
+
+redis.call('SET', KEYS[1], string.format('%.3f', new_tat), 'PX', math.ceil(new_tat - now))
+return {1, math.floor((now - allow_at) / interval), math.ceil(new_tat)}
+"""
+
+# Fixed-period budget (e.g. per day): KEYS[1] = counter,
+# ARGV = cost (negative to refund), budget, period end (epoch seconds).
+# Returns {allowed, consumed}.
+BUDGET_SCRIPT = """
+local cost = tonumber(ARGV[1])
+local current = tonumber(redis.call('GET', KEYS[1])) or 0
+if current + cost > tonumber(ARGV[2]) then
+    return {0, current}
+end
+current = redis.call('INCRBY', KEYS[1], cost)
+if current < 0 then
+    -- A refund never leaves credit beyond the full budget
+    current = 0
+    redis.call('SET', KEYS[1], 0)
+end
+redis.call('EXPIREAT', KEYS[1], ARGV[3])
+return {1, current}
+"""
+
+# Hybrid mode fixed window counter: KEYS[1] = counter,
+# ARGV = units already admitted locally, cost, limit, window end (epoch seconds).
+# Adds the local units unconditionally, then the cost only if it fits.
+# Returns {allowed, count}.
+HYBRID_WINDOW_SCRIPT = """
+local current = redis.call('INCRBY', KEYS[1], ARGV[1])
+local allowed = 0
+if current + tonumber(ARGV[2]) <= tonumber(ARGV[3]) then
+    current = redis.call('INCRBY', KEYS[1], ARGV[2])
+    allowed = 1
+end
+redis.call('EXPIREAT', KEYS[1], ARGV[4])
+return {allowed, current}
+"""
+
+
+class RateLimitAlgorithm(str, enum.Enum):
+    """How a rule counts requests"""
+    SLIDING_WINDOW = "sliding_window"  # Exact, one entry per request in the window
+    GCRA = "gcra"                      # Constant memory: one timestamp per key
+
+
+class _MemoryStore:
+    """
+    Bounded per-key state for the in-memory fallback
+
+    Keys are kept in least-recently-used order, each with an expiry. Every
+    write drops expired keys from the cold end and evicts the coldest beyond
+    max_keys, so a spray of spoofed client addresses cannot grow it without
+    bound. It is only used from the event loop and never across an await,
+    so it needs no lock.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._entries: "OrderedDict[str, list]" = OrderedDict()  # key -> [state, expires_at]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, now: float):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def set(self, key: str, state, expires_at: float, now: float) -> None:
+        self._entries[key] = [state, expires_at]
+        self._entries.move_to_end(key)
+
+        while self._entries:
+            _, coldest_expires_at = next(iter(self._entries.values()))
+            if coldest_expires_at > now and len(self._entries) <= self.max_keys:
+                break
+            self._entries.popitem(last=False)
+
 
 class RateLimiter:
     """
-    Rate limiter using Redis with sliding window algorithm
+    Rate limiter using Redis with sliding window or GCRA algorithms
     """
 
     def __init__(self, redis_client=None):
         self.redis_client = redis_client
+        self._scripts: Dict[str, object] = {}
+        self._memory = _MemoryStore(settings.rate_limit_memory_max_keys)
 
     async def is_allowed(
         self,
         key: str,
         limit: int,
-        window: int
+        window: int,
+        algorithm: RateLimitAlgorithm = RateLimitAlgorithm.SLIDING_WINDOW,
+        cost: int = 1,
     ) -> tuple[bool, Dict[str, int]]:
         """
-        Check if request is allowed using sliding window
+        Check if request is allowed
 
         Args:
             key: Rate limit key (e.g., IP address, user ID)
-            limit: Maximum number of requests
+            limit: Maximum number of requests (or units) per window
             window: Time window in seconds
+            algorithm: Sliding window log, or GCRA for constant memory per key
+            cost: Units this request consumes
 
         Returns:
             (is_allowed, info): Tuple of allowed status and info dict
         """
         try:
+            if algorithm == RateLimitAlgorithm.GCRA:
+                if self.redis_client:
+                    return await self._redis_gcra(key, limit, window, cost)
+                return self._memory_gcra(key, limit, window, cost)
             if self.redis_client:
-                return await self._redis_sliding_window(key, limit, window)
+                return await self._redis_sliding_window(key, limit, window, cost)
             else:
                 # Fallback to in-memory rate limiting
-                return self._memory_sliding_window(key, limit, window)
+                return self._memory_sliding_window(key, limit, window, cost)
         except Exception as e:
             logger.error(f"Rate limit check failed: {str(e)}")
             # Fail open: allow request if rate limiter fails
@@ -52,42 +214,139 @@ class RateLimiter:
         self,
         key: str,
         limit: int,
-        window: int
+        window: int,
+        cost: int = 1,
+    ) -> tuple[bool, Dict[str, int]]:
+        """
+        Redis-based sliding window implementation
+
+        Trimming, counting and recording the request run as one Lua script,
+        so a check is a single EVALSHA round trip and concurrent workers can
+        never admit more than the limit between a count and an add.
+        """
+        script = self._script(SLIDING_WINDOW_SCRIPT)
+        allowed, current, reset_ms = await script(
+            keys=[f"rate_limit:{key}"],
+            args=[limit, window * 1000, uuid.uuid4().hex, cost],
+        )
+
+        return bool(allowed), {
+            "limit": limit,
+            "remaining": max(limit - int(current), 0),
+            "reset": int(reset_ms) // 1000,
+        }
+
+    async def _redis_gcra(
+        self,
+        key: str,
+        limit: int,
+        window: int,
+        cost: int = 1,
+    ) -> tuple[bool, Dict[str, int]]:
+        """Redis-based GCRA: one string key per client, one EVALSHA per check"""
+        script = self._script(GCRA_SCRIPT)
+        allowed, remaining, reset_ms = await script(
+            keys=[f"rate_limit_gcra:{key}"],
+            args=[limit, window * 1000, cost],
+        )
+
+        return bool(allowed), {
+            "limit": limit,
+            "remaining": int(remaining),
+            "reset": math.ceil(int(reset_ms) / 1000),
+        }
+
+    async def consume_budget(
+        self,
+        key: str,
+        cost: int,
+        budget: int,
+        period_end: int,
     ) -> tuple[bool, Dict[str, int]]:
-        """Redis-based sliding window implementation"""
-        import redis.asyncio as redis
+        """
+        Consume units from a fixed-period budget, such as a daily quota
+
+        Args:
+            key: Budget key, including the period (e.g. user and date)
+            cost: Units to consume
+            budget: Units available in the period
+            period_end: Epoch seconds at which the budget resets
 
+        Returns:
+            (is_allowed, info): Nothing is consumed when not allowed
+        """
+        try:
+            if self.redis_client:
+                script = self._script(BUDGET_SCRIPT)
+                allowed, consumed = await script(
+                    keys=[f"rate_limit_budget:{key}"],
+                    args=[cost, budget, period_end],
+                )
+                consumed = int(consumed)
+            else:
+                key = f"budget:{key}"
+                now = time.time()
+                consumed = self._memory.get(key, now) or 0
+                allowed = consumed + cost <= budget
+                if allowed:
+                    consumed = max(consumed + cost, 0)
+                    self._memory.set(key, consumed, period_end, now)
+        except Exception as e:
+            logger.error(f"Budget check failed: {str(e)}")
+            # Fail open, like rate limit checks
+            allowed, consumed = True, 0
+
+        return bool(allowed), {
+            "limit": budget,
+            "remaining": max(budget - consumed, 0),
+            "reset": period_end,
+        }
+
+    def _script(self, source: str):
+        """Registered script for the Redis client; called with EVALSHA"""
         if not self.redis_client:
-            self.redis_client = await redis.from_url(settings.redis_url)
+            import redis.asyncio as redis
+            self.redis_client = redis.from_url(settings.redis_url)
+
+        script = self._scripts.get(source)
+        if script is None:
+            script = self._scripts[source] = self.redis_client.register_script(source)
+        return script
 
+    def _memory_sliding_window(
+        self,
+        key: str,
+        limit: int,
+        window: int,
+        cost: int = 1,
+    ) -> tuple[bool, Dict[str, int]]:
+        """In-memory sliding window implementation (fallback)"""
         now = time.time()
         window_start = now - window
-        redis_key = f"rate_limit:{key}"
 
-        # Remove old entries
-        await self.redis_client.zremrangebyscore(redis_key, 0, window_start)
+        # Timestamps are appended in order, so expired ones are at the left
+        timestamps = self._memory.get(key, now)
+        if timestamps is None:
+            timestamps = deque()
+        while timestamps and timestamps[0] <= window_start:
+            timestamps.popleft()
 
-        # Count current requests
-        current = await self.redis_client.zcard(redis_key)
+        current = len(timestamps)
 
-        if current >= limit:
+        if current + cost > limit:
             # Rate limit exceeded
-            ttl = await self.redis_client.ttl(redis_key)
-            reset_at = int(now + max(ttl, 0))
+            reset_at = int(timestamps[0] + window) if timestamps else int(now + window)
             return False, {
                 "limit": limit,
-                "remaining": 0,
+                "remaining": max(limit - current, 0),
                 "reset": reset_at
             }
 
         # Add current request
-        await self.redis_client.zadd(redis_key, {str(now): now})
-
-        # Set expiry
-        await self.redis_client.expire(redis_key, window)
+        timestamps.extend([now] * cost)
+        self._memory.set(key, timestamps, now + window, now)
 
-        # Get remaining
-        remaining = limit - current - 1
+        remaining = limit - current - cost
 
         return True, {
             "limit": limit,
@@ -95,82 +354,262 @@ class RateLimiter:
             "reset": int(now + window)
         }
 
-    def _memory_sliding_window(
+    def _memory_gcra(
         self,
         key: str,
         limit: int,
-        window: int
+        window: int,
+        cost: int = 1,
     ) -> tuple[bool, Dict[str, int]]:
-        """In-memory sliding window implementation (fallback)"""
-        import threading
+        """In-memory GCRA (fallback): one theoretical arrival time per key"""
+        key = f"gcra:{key}"
+        now = time.time()
+        interval = window / limit
+        tat = max(self._memory.get(key, now) or now, now)
+        new_tat = tat + interval * cost
+        allow_at = new_tat - window
 
-        if not hasattr(self, "_memory_store"):
-            self._memory_store: Dict[str, list] = {}
-            self._lock = threading.Lock()
+        if now < allow_at:
+            return False, {
+                "limit": limit,
+                "remaining": math.floor((now - (tat - window)) / interval),
+                "reset": math.ceil(allow_at)
+            }
 
-        now = time.time()
-        window_start = now - window
+        # Once now passes the TAT the key is back to a full burst, like a new one
+        self._memory.set(key, new_tat, new_tat, now)
+        return True, {
+            "limit": limit,
+            "remaining": math.floor((now - allow_at) / interval),
+            "reset": math.ceil(new_tat)
+        }
 
-        with self._lock:
-            if key not in self._memory_store:
-                self._memory_store[key] = []
 
-            # Remove old entries
-            self._memory_store[key] = [
-                t for t in self._memory_store[key]
-                if t > window_start
-            ]
+class _LocalWindow:
+    """One client's fixed window as seen by this process"""
+    __slots__ = ("pending", "synced")
 
-            current = len(self._memory_store[key])
+    def __init__(self):
+        self.pending = 0  # Admitted here, not yet added to Redis
+        self.synced = 0   # Global count at the last sync
 
-            if current >= limit:
-                # Rate limit exceeded
-                oldest = min(self._memory_store[key]) if self._memory_store[key] else now
-                reset_at = int(oldest + window)
-                return False, {
-                    "limit": limit,
-                    "remaining": 0,
-                    "reset": reset_at
-                }
 
-            # Add current request
-            self._memory_store[key].append(now)
+class HybridRateLimiter:
+    """
+    Two-tier rate limiter: local admission with batched Redis sync
+
+    Each rule is counted as a fixed window in Redis. A process admits
+    requests locally, without a Redis round trip, while its unsynced
+    admissions fit in a slice of the limit (rate_limit_local_fraction) and
+    the last known global count leaves room for a slice in every process.
+    Local admissions are added to Redis in one pipeline every
+    rate_limit_sync_interval, which also refreshes the global counts. Once a
+    slice is used up, or near the limit, checks fall back to an exact atomic
+    Redis increment.
+    """
 
-            remaining = limit - current - 1
+    def __init__(
+        self,
+        redis_client=None,
+        processes: Optional[int] = None,
+        local_fraction: Optional[float] = None,
+        sync_interval: Optional[float] = None,
+    ):
+        self.redis_client = redis_client
+        self.processes = processes or settings.workers
+        self.local_fraction = local_fraction or settings.rate_limit_local_fraction
+        self.sync_interval = sync_interval or settings.rate_limit_sync_interval
+        self._windows = _MemoryStore(settings.rate_limit_memory_max_keys)
+        self._dirty: Dict[str, Tuple[_LocalWindow, int]] = {}  # counter key -> (window, window end)
+        self._script = None
+        self._sync_task: Optional[asyncio.Task] = None
+
+    def _get_client(self):
+        if self.redis_client is None:
+            import redis.asyncio as redis
+            self.redis_client = redis.from_url(settings.redis_url)
+        return self.redis_client
 
+    async def is_allowed(
+        self,
+        key: str,
+        limit: int,
+        window: int,
+        algorithm: RateLimitAlgorithm = RateLimitAlgorithm.SLIDING_WINDOW,
+        cost: int = 1,
+    ) -> tuple[bool, Dict[str, int]]:
+        """Same contract as RateLimiter.is_allowed; every rule uses fixed windows here"""
+        now = time.time()
+        index = int(now // window)
+        window_end = (index + 1) * window
+        counter_key = f"{key}:{index}"
+
+        state = self._windows.get(counter_key, now)
+        if state is None:
+            state = _LocalWindow()
+            self._windows.set(counter_key, state, window_end, now)
+
+        if state.synced + cost > limit:
+            # Window counts only grow, so it stays full until it ends
+            return False, {"limit": limit, "remaining": max(limit - state.synced, 0), "reset": window_end}
+
+        slice_size = max(1, int(limit * self.local_fraction))
+        headroom = limit - state.synced - slice_size * (self.processes - 1)
+        if state.pending + cost <= slice_size and state.pending + cost <= headroom:
+            state.pending += cost
+            self._dirty[counter_key] = (state, window_end)
+            self.start()
             return True, {
                 "limit": limit,
-                "remaining": remaining,
-                "reset": int(now + window)
+                "remaining": max(limit - state.synced - state.pending, 0),
+                "reset": window_end,
             }
 
+        return await self._exact(counter_key, state, limit, window_end, cost)
+
+    async def _exact(
+        self,
+        counter_key: str,
+        state: _LocalWindow,
+        limit: int,
+        window_end: int,
+        cost: int,
+    ) -> tuple[bool, Dict[str, int]]:
+        """Atomic Redis check, flushing this window's local admissions with it"""
+        flushed, state.pending = state.pending, 0
+        try:
+            client = self._get_client()
+            if self._script is None:
+                self._script = client.register_script(HYBRID_WINDOW_SCRIPT)
+            allowed, current = await self._script(
+                keys=[f"rate_limit_window:{counter_key}"],
+                args=[flushed, cost, limit, window_end],
+            )
+        except Exception as e:
+            logger.error(f"Rate limit check failed: {str(e)}")
+            state.pending += flushed
+            # Fail open: allow request if rate limiter fails
+            return True, {"limit": limit, "remaining": 1, "reset": window_end}
+
+        state.synced = max(state.synced, int(current))
+        return bool(allowed), {
+            "limit": limit,
+            "remaining": max(limit - state.synced - state.pending, 0),
+            "reset": window_end,
+        }
+
+    async def sync(self) -> int:
+        """Add local admissions to Redis in one pipeline; returns windows synced"""
+        if not self._dirty:
+            return 0
 
-# Rate limit rules configuration
+        dirty, self._dirty = self._dirty, {}
+        batch = []
+        for counter_key, (state, window_end) in dirty.items():
+            if state.pending:
+                batch.append((counter_key, state, state.pending, window_end))
+                state.pending = 0
+        if not batch:
+            return 0
+
+        try:
+            async with self._get_client().pipeline(transaction=False) as pipe:
+                for counter_key, _, units, window_end in batch:
+                    pipe.incrby(f"rate_limit_window:{counter_key}", units)
+                    pipe.expireat(f"rate_limit_window:{counter_key}", window_end)
+                results = await pipe.execute()
+        except Exception as e:
+            logger.error(f"Rate limit sync failed for {len(batch)} windows: {str(e)}")
+            for counter_key, state, units, window_end in batch:
+                state.pending += units
+                self._dirty[counter_key] = (state, window_end)
+            return 0
+
+        for (_, state, _, _), current in zip(batch, results[::2]):
+            state.synced = max(state.synced, int(current))
+        return len(batch)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            await self.sync()
+
+    def start(self) -> None:
+        """Start periodic syncing on the running event loop"""
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop periodic syncing and push whatever is still pending"""
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+            self._sync_task = None
+        await self.sync()
+
+
+# Global hybrid limiter instance, shared so shutdown can flush it
+_hybrid_rate_limiter: Optional[HybridRateLimiter] = None
+
+
+def get_hybrid_rate_limiter() -> HybridRateLimiter:
+    """Get or create global hybrid rate limiter"""
+    global _hybrid_rate_limiter
+    if _hybrid_rate_limiter is None:
+        _hybrid_rate_limiter = HybridRateLimiter()
+    return _hybrid_rate_limiter
+
+
+# Rate limit rules configuration; "algorithm" defaults to the sliding window.
+# High-volume rules use GCRA, whose state per client doesn't grow with the limit
 RATE_LIMIT_RULES = {
-    "default": {"limit": 100, "window": 60},  # 100 requests per minute
-    "api": {"limit": 60, "window": 60},       # 60 API calls per minute
+    "default": {"limit": 100, "window": 60, "algorithm": RateLimitAlgorithm.GCRA},  # 100 requests per minute
+    "api": {"limit": 60, "window": 60, "algorithm": RateLimitAlgorithm.GCRA},       # 60 API calls per minute
     "upload": {"limit": 10, "window": 60},    # 10 uploads per minute
     "generation": {"limit": 20, "window": 60}, # 20 generation tasks per minute
+    "status": {"limit": 300, "window": 60, "algorithm": RateLimitAlgorithm.GCRA},  # Cheap status and listing reads
 }
 
+# Generation endpoints additionally charge cost-weighted per-user quotas,
+# see app.core.quotas
+
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimitMiddleware:
     """
     Rate limiting middleware for FastAPI
+
+    Pure ASGI; rejected requests get a 429 JSON response right here, so
+    they never reach the routes or the error handler.
     """
 
     def __init__(self, app, redis_client=None, enabled: bool = True):
-        super().__init__(app)
-        self.rate_limiter = RateLimiter(redis_client)
+        self.app = app
+        self.rate_limiter = self._build_rate_limiter(redis_client)
         self.enabled = enabled
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        if not self.enabled:
-            return await call_next(request)
+    @staticmethod
+    def _build_rate_limiter(redis_client=None):
+        """Limiter for settings.rate_limit_backend: memory, redis or hybrid"""
+        if settings.rate_limit_backend == "hybrid":
+            limiter = get_hybrid_rate_limiter()
+            limiter.redis_client = redis_client or limiter.redis_client
+            return limiter
+        if settings.rate_limit_backend == "redis" and redis_client is None:
+            import redis.asyncio as redis
+            redis_client = redis.from_url(settings.redis_url)
+        return RateLimiter(redis_client)
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            return await self.app(scope, receive, send)
 
         # Determine rate limit key and rule
-        client_ip = self._get_client_ip(request)
-        rule_name = self._get_rate_limit_rule(request)
+        headers = scope_headers(scope)
+        client_ip = get_client_ip(scope, headers)
+        rule_name = self._get_rate_limit_rule(scope["method"], scope["path"], headers)
         rule = RATE_LIMIT_RULES.get(rule_name, RATE_LIMIT_RULES["default"])
 
         # Build unique key
@@ -180,61 +619,54 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         is_allowed, info = await self.rate_limiter.is_allowed(
             rate_limit_key,
             rule["limit"],
-            rule["window"]
+            rule["window"],
+            rule.get("algorithm", RateLimitAlgorithm.SLIDING_WINDOW),
         )
 
+        rate_limit_headers = [
+            (b"x-ratelimit-limit", str(info["limit"]).encode()),
+            (b"x-ratelimit-remaining", str(info["remaining"]).encode()),
+            (b"x-ratelimit-reset", str(info["reset"]).encode()),
+        ]
+
         if not is_allowed:
+            RATE_LIMIT_REJECTIONS.inc(rule_name)
             logger.warning(
-                f"Rate limit exceeded for {client_ip} on {request.url.path} "
+                f"Rate limit exceeded for {client_ip} on {scope['path']} "
                 f"(rule: {rule_name}, limit: {rule['limit']}/{rule['window']}s)"
             )
-            raise HTTPException(
+            response = JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="Rate limit exceeded",
-                headers={
-                    "X-RateLimit-Limit": str(info["limit"]),
-                    "X-RateLimit-Remaining": str(info["remaining"]),
-                    "X-RateLimit-Reset": str(info["reset"]),
-                    "Retry-After": str(info["reset"] - int(time.time()))
-                }
+                content={"detail": "Rate limit exceeded"},
+                headers={"Retry-After": str(max(info["reset"] - int(time.time()), 0))},
             )
+            response.raw_headers.extend(rate_limit_headers)
+            return await response(scope, receive, send)
 
-        response = await call_next(request)
-
-        # Add rate limit headers
-        response.headers["X-RateLimit-Limit"] = str(info["limit"])
-        response.headers["X-RateLimit-Remaining"] = str(info["remaining"])
-        response.headers["X-RateLimit-Reset"] = str(info["reset"])
-
-        return response
+        async def send_wrapper(message):
+            # Add rate limit headers
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + rate_limit_headers
+            await send(message)
 
-    def _get_client_ip(self, request: Request) -> str:
-        """Get client IP address from request"""
-        # Check for forwarded IP (behind proxy)
-        forwarded = request.headers.get("X-Forwarded-For")
-        if forwarded:
-            return forwarded.split(",")[0].strip()
+        await self.app(scope, receive, send_wrapper)
 
-        # Check for real IP
-        real_ip = request.headers.get("X-Real-IP")
-        if real_ip:
-            return real_ip
-
-        # Fall back to direct IP
-        return request.client.host if request.client else "unknown"
-
-    def _get_rate_limit_rule(self, request: Request) -> str:
+    def _get_rate_limit_rule(self, method: str, path: str, headers: Dict[str, str]) -> str:
         """Determine rate limit rule based on request path"""
-        path = request.url.path.lower()
+        path = path.lower()
+
+        # Task status polls and listings are cheap reads, even under /video/task/
+        if method == "GET" and any(x in path for x in ["/task/", "/tasks", "/batch/"]):
+            return "status"
 
         # Generation endpoints
-        if any(x in path for x in ["/image/", "/video/", "/audio/", "/music/", "/tts"]):
+        if method == "POST" and any(x in path for x in ["/image/", "/video/", "/audio/", "/music/", "/tts", "/voice/"]):
             return "generation"
 
         # Upload endpoints
-        if "upload" in path or request.method in ["POST", "PUT", "PATCH"]:
+        if "upload" in path or method in ["POST", "PUT", "PATCH"]:
             # Check content-type for file uploads
-            content_type = request.headers.get("content-type", "")
+            content_type = headers.get("content-type", "")
             if "multipart" in content_type:
                 return "upload"
 
@@ -251,7 +683,8 @@ async def check_rate_limit(
     key: str,
     limit: int,
     window: int,
-    redis_client=None
+    redis_client=None,
+    algorithm: RateLimitAlgorithm = RateLimitAlgorithm.SLIDING_WINDOW,
 ) -> tuple[bool, Dict[str, int]]:
     """
     Check rate limit manually
@@ -262,4 +695,4 @@ async def check_rate_limit(
             raise HTTPException(429, "Rate limit exceeded")
     """
     limiter = RateLimiter(redis_client)
-    return await limiter.is_allowed(key, limit, window)
+    return await limiter.is_allowed(key, limit, window, algorithm)
@@ -0,0 +1,132 @@
+"""
+Replica Routing - Lag-aware choice between read replicas and the primary
+"""
+import itertools
+import time
+from typing import Callable, List, Optional, Tuple
+from sqlalchemy import text
+from loguru import logger
+from app.config import get_settings
+
+settings = get_settings()
+
+WRITE_KEY_PREFIX = "last_write:"
+
+# Zero when the replica has replayed everything it received, so an idle
+# primary doesn't look like growing lag
+_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class _Replica:
+    def __init__(self, engine, session_factory):
+        self.engine = engine
+        self.session_factory = session_factory
+        self.lag: Optional[float] = None  # None until probed, or after a failed probe
+        self.checked_at = 0.0
+
+
+class ReplicaRouter:
+    """
+    Routes read-only sessions to replicas
+
+    Each replica's replication lag is probed at most every
+    replica_lag_check_interval seconds; replicas behind replica_max_lag (or
+    unreachable) are skipped. Writers record a timestamp in Redis, and a
+    user's reads stay on the primary until the replicas have caught up with
+    their last write, so a task is visible right after it was created.
+    """
+
+    def __init__(self, replicas: Optional[List[Tuple[object, Callable]]] = None, redis_client=None):
+        if replicas is None:
+            from app.database import replica_engines, ReplicaSessionLocals
+            replicas = list(zip(replica_engines, ReplicaSessionLocals))
+        self._replicas = [_Replica(engine, factory) for engine, factory in replicas]
+        self._order = itertools.cycle(range(len(self._replicas))) if self._replicas else None
+        self.redis_client = redis_client
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._replicas)
+
+    async def _get_client(self):
+        if self.redis_client is None:
+            import redis.asyncio as redis
+            self.redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+        return self.redis_client
+
+    async def record_write(self, user_id: str) -> None:
+        """Note that a user just wrote, pinning their reads to the primary for a while"""
+        if not self.enabled:
+            return
+        ttl = int(settings.replica_read_your_writes_window + settings.replica_max_lag) + 1
+        try:
+            client = await self._get_client()
+            await client.set(f"{WRITE_KEY_PREFIX}{user_id}", time.time(), ex=ttl)
+        except Exception as e:
+            logger.warning(f"Failed to record write for {user_id}: {str(e)}")
+
+    async def _last_write(self, user_id: str) -> Optional[float]:
+        try:
+            client = await self._get_client()
+            value = await client.get(f"{WRITE_KEY_PREFIX}{user_id}")
+        except Exception as e:
+            logger.warning(f"Failed to read last write for {user_id}: {str(e)}")
+            # Unknown: assume a recent write rather than risk a stale read
+            return time.time()
+        return float(value) if value else None
+
+    async def _probe(self, replica: _Replica) -> Optional[float]:
+        now = time.monotonic()
+        if now - replica.checked_at < settings.replica_lag_check_interval:
+            return replica.lag
+        replica.checked_at = now
+        try:
+            async with replica.engine.connect() as conn:
+                replica.lag = float((await conn.execute(_LAG_QUERY)).scalar() or 0)
+        except Exception as e:
+            logger.warning(f"Replica lag probe failed: {str(e)}")
+            replica.lag = None
+        return replica.lag
+
+    async def read_session_factory(self, user_id: str) -> Tuple[Callable, bool]:
+        """
+        Pick a session factory for a read-only request
+
+        Returns (factory, is_replica).
+        """
+        from app.database import ReadSessionLocal
+
+        if not self.enabled:
+            return ReadSessionLocal, False
+
+        last_write = await self._last_write(user_id)
+        since_write = time.time() - last_write if last_write is not None else None
+        if since_write is not None and since_write < settings.replica_read_your_writes_window:
+            return ReadSessionLocal, False
+
+        for _ in range(len(self._replicas)):
+            replica = self._replicas[next(self._order)]
+            lag = await self._probe(replica)
+            if lag is None or lag > settings.replica_max_lag:
+                continue
+            # The replica must have replayed past the user's last write
+            if since_write is not None and lag >= since_write:
+                continue
+            return replica.session_factory, True
+
+        return ReadSessionLocal, False
+
+
+# Global router instance
+_replica_router: Optional[ReplicaRouter] = None
+
+
+def get_replica_router() -> ReplicaRouter:
+    """Get or create global replica router"""
+    global _replica_router
+    if _replica_router is None:
+        _replica_router = ReplicaRouter()
+    return _replica_router
@@ -0,0 +1,133 @@
+"""
+Request Log - Non-blocking structured logging with per-route sampling
+"""
+import sys
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+from loguru import logger
+from app.config import get_settings
+
+settings = get_settings()
+
+# Share of successful requests logged per route template; routes not listed
+# use settings.request_log_sample_rate. Errors and slow requests are always kept.
+ROUTE_SAMPLE_RATES = {
+    "/health": 0.0,
+    "/health/db": 0.0,
+    "/health/requests": 0.0,
+    "/metrics": 0.0,
+}
+
+# Methods that change state; kept in full as the security audit trail
+AUDITED_METHODS = frozenset(("POST", "PUT", "PATCH", "DELETE"))
+
+
+def configure_logging() -> None:
+    """
+    Replace loguru's default sink with an enqueued one
+
+    Records are handed to a background thread, so a request never waits on
+    stderr; with log_json each record is one JSON object, extra fields included.
+    """
+    logger.remove()
+    logger.add(
+        sys.stderr,
+        level=settings.log_level,
+        serialize=settings.log_json,
+        enqueue=True,
+        backtrace=False,
+        diagnose=settings.debug,
+    )
+
+
+class RequestLog:
+    """
+    Sampling decisions and a ring buffer of recent requests
+
+    Every finished request is appended to the buffer as a small dict, which
+    is all a sampled-out request costs. Sampling is deterministic: a route
+    at rate 0.01 logs every 100th successful request.
+    """
+
+    def __init__(
+        self,
+        sample_rate: Optional[float] = None,
+        slow_threshold: Optional[float] = None,
+        buffer_size: Optional[int] = None,
+    ):
+        self.sample_rate = settings.request_log_sample_rate if sample_rate is None else sample_rate
+        self.slow_threshold = slow_threshold or settings.request_log_slow_threshold
+        self.recent_requests = deque(maxlen=buffer_size or settings.request_log_buffer_size)
+        self._counters: Dict[str, int] = {}
+        self._intervals: Dict[str, int] = {}
+
+    def _interval(self, route: str) -> int:
+        """Log every Nth success of a route; 0 never"""
+        interval = self._intervals.get(route)
+        if interval is None:
+            rate = ROUTE_SAMPLE_RATES.get(route, self.sample_rate)
+            interval = round(1 / rate) if rate > 0 else 0
+            self._intervals[route] = interval
+        return interval
+
+    def sampled(self, route: str) -> bool:
+        interval = self._interval(route)
+        if not interval:
+            return False
+        count = self._counters.get(route, 0) + 1
+        self._counters[route] = count
+        return count % interval == 0
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """Buffer a finished request and log it if it is kept"""
+        self.recent_requests.append(entry)
+
+        status_code = entry["status_code"]
+        if status_code is None or status_code >= 500:
+            logger.bind(request=entry).error(f"{entry['method']} {entry['path']} {status_code}")
+        elif entry["process_time"] > self.slow_threshold:
+            logger.bind(request=entry).warning(f"Slow request: {entry['method']} {entry['path']}")
+        elif status_code >= 400 or entry["method"] in AUDITED_METHODS or self.sampled(entry["route"] or "unmatched"):
+            logger.bind(request=entry).info(f"{entry['method']} {entry['path']} {status_code}")
+
+    def recent(self, limit: int = 100, errors_only: bool = False) -> List[Dict[str, Any]]:
+        """Latest requests, newest first"""
+        entries = []
+        for entry in reversed(self.recent_requests):
+            if errors_only and entry["status_code"] is not None and entry["status_code"] < 400:
+                continue
+            entries.append(entry)
+            if len(entries) >= limit:
+                break
+        return entries
+
+
+# Global request log instance
+_request_log: Optional[RequestLog] = None
+
+
+def get_request_log() -> RequestLog:
+    """Get or create global request log"""
+    global _request_log
+    if _request_log is None:
+        _request_log = RequestLog()
+    return _request_log
+
+
+def request_entry(scope, request_id: str, client_ip: str, user_agent: str, status_code: Optional[int], start_time: float) -> Dict[str, Any]:
+    """Structured record of one finished request"""
+    route = scope.get("route")
+    return {
+        "request_id": request_id,
+        "method": scope["method"],
+        "path": scope["path"],
+        # Route template, so /tasks/{task_id} is sampled as one route
+        "route": getattr(route, "path", None),
+        "query": scope["query_string"].decode("latin-1"),
+        "status_code": status_code,
+        "process_time": round(time.time() - start_time, 3),
+        "client_ip": client_ip,
+        "user_agent": user_agent,
+        "at": start_time,
+    }
@@ -1,20 +1,37 @@
 """
 Security Middleware - OWASP Security Headers Implementation
 """
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from loguru import logger
-import os
+from jose import jwt
+from app.config import get_settings
 
+settings = get_settings()
 
-class SecurityMiddleware(BaseHTTPMiddleware):
+
+def decode_access_token(token: str) -> dict:
+    """Claims of a signed access token; raises jose.JWTError if it is invalid"""
+    return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+
+
+def is_admin_claims(claims: dict) -> bool:
+    """Admin tokens carry role "admin" or it among their roles"""
+    return claims.get("role") == "admin" or "admin" in (claims.get("roles") or [])
+
+
+class SecurityMiddleware:
     """
     Security Middleware that adds OWASP recommended security headers
+
+    Pure ASGI: the header block is encoded once at startup and appended to
+    each response start message, replacing any headers of the same name.
     """
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        response = await call_next(request)
+    def __init__(self, app, env: str = None):
+        self.app = app
+        self.headers = self._build_headers(env or settings.app_env)
+        self._names = {name for name, _ in self.headers} | {b"x-powered-by"}
 
+    @staticmethod
+    def _build_headers(env: str) -> list:
         # Content Security Policy (CSP)
         # Prevents Cross-Site Scripting (XSS) and data injection attacks
         # Configured to allow inline scripts for development
@@ -28,33 +45,15 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             "frame-ancestors 'none'; "
             "form-action 'self';"
         )
-        response.headers["Content-Security-Policy"] = csp_policy
 
         # Strict-Transport-Security (HSTS)
         # Enforces HTTPS connections
         # Set to 1 year max-age with includeSubDomains
-        env = os.getenv("APP_ENV", "development")
         if env == "production":
-            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains; preload"
+            hsts = "max-age=31536000; includeSubDomains; preload"
         else:
             # Lower max-age for development
-            response.headers["Strict-Transport-Security"] = "max-age=3600"
-
-        # X-Content-Type-Options
-        # Prevents MIME-sniffing
-        response.headers["X-Content-Type-Options"] = "nosniff"
-
-        # X-Frame-Options
-        # Prevents clickjacking attacks
-        response.headers["X-Frame-Options"] = "DENY"
-
-        # X-XSS-Protection
-        # Enables XSS filter in modern browsers
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-
-        # Referrer-Policy
-        # Controls how much referrer information is sent
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+            hsts = "max-age=3600"
 
         # Permissions-Policy
         # Controls browser features and APIs
@@ -65,19 +64,37 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             "fullscreen=(self), "
             "payment=()"
         )
-        response.headers["Permissions-Policy"] = permissions_policy
 
-        # Server Header
-        # Removes server information disclosure
-        response.headers["Server"] = "AI-Creative-Hub"
+        headers = {
+            "Content-Security-Policy": csp_policy,
+            "Strict-Transport-Security": hsts,
+            # Prevents MIME-sniffing
+            "X-Content-Type-Options": "nosniff",
+            # Prevents clickjacking attacks
+            "X-Frame-Options": "DENY",
+            # Enables XSS filter in modern browsers
+            "X-XSS-Protection": "1; mode=block",
+            # Controls how much referrer information is sent
+            "Referrer-Policy": "strict-origin-when-cross-origin",
+            "Permissions-Policy": permissions_policy,
+            # Removes server information disclosure
+            "Server": "AI-Creative-Hub",
+        }
+        return [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
 
-        # X-Powered-By
-        # Removes technology stack disclosure
-        response.headers.pop("X-Powered-By", None)
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
 
-        logger.debug(f"Security headers applied to {request.url.path}")
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                # X-Powered-By is dropped too: removes technology stack disclosure
+                message["headers"] = [
+                    header for header in message.get("headers", []) if header[0].lower() not in self._names
+                ] + self.headers
+            await send(message)
 
-        return response
+        await self.app(scope, receive, send_wrapper)
 
 
 class SecurityHeaders:
@@ -0,0 +1,218 @@
+"""
+Task Status Cache - Compact Redis hash per task for cheap status polling
+"""
+import enum
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+from loguru import logger
+from app.config import get_settings
+from app.models.task import TERMINAL_STATUSES
+
+settings = get_settings()
+
+STATUS_KEY_PREFIX = "task_status:"
+
+# Only the small, frequently polled fields are cached; input_data is never stored
+JSON_FIELDS = {"output_data"}
+INT_FIELDS = {"progress"}
+
+# HSET unless the cached task is already final, so a progress flush racing
+# the terminal write can't put stale progress back. KEYS[1] = status hash,
+# ARGV = TTL, then field/value pairs. Returns 1 if written.
+SET_UNLESS_FINAL_SCRIPT = """
+local status = redis.call('HGET', KEYS[1], 'status')
+if %s then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+""" % " or ".join(f"status == '{status.value}'" for status in TERMINAL_STATUSES)
+
+
+def _status_key(task_id: str) -> str:
+    return f"{STATUS_KEY_PREFIX}{task_id}"
+
+
+def _encode_value(field: str, value: Any) -> str:
+    """Encode a single field into a Redis hash string value"""
+    if value is None:
+        return ""
+    if field in JSON_FIELDS:
+        return json.dumps(value, default=str)
+    if isinstance(value, enum.Enum):
+        return str(value.value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _decode_state(raw: Dict[str, str]) -> Dict[str, Any]:
+    """Decode a Redis hash back into a status dict"""
+    state: Dict[str, Any] = {}
+    for field, value in raw.items():
+        if value == "":
+            state[field] = None
+        elif field in JSON_FIELDS:
+            state[field] = json.loads(value)
+        elif field in INT_FIELDS:
+            state[field] = int(value)
+        else:
+            state[field] = value
+    return state
+
+
+def task_state(task) -> Dict[str, Any]:
+    """Build the compact status dict for a Task model"""
+    return {
+        "task_id": str(task.id),
+        "task_type": task.task_type.value,
+        "status": task.status.value,
+        "progress": task.progress or 0,
+        "message": task.progress_message,
+        "provider": task.provider,
+        "output_data": task.output_data,
+        "error_message": task.error_message,
+        "created_at": task.created_at.isoformat() if task.created_at else None,
+        "started_at": task.started_at.isoformat() if task.started_at else None,
+        "completed_at": task.completed_at.isoformat() if task.completed_at else None,
+    }
+
+
+def compute_etag(state: Dict[str, Any]) -> str:
+    """Compute a weak ETag from a task status dict"""
+    payload = json.dumps(state, sort_keys=True, default=str).encode()
+    return f'W/"{hashlib.blake2b(payload, digest_size=8).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: ignore the W/ prefix on both sides
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class TaskStatusCache:
+    """
+    Read-through cache of task status backed by one Redis hash per task
+
+    Writers (services and workers) update the hash on every state change,
+    status endpoints read it first and fall back to the database on a miss.
+    All operations fail open: a Redis outage only costs a database query.
+    """
+
+    def __init__(self, redis_client=None, ttl: Optional[int] = None):
+        self.redis_client = redis_client
+        self.ttl = ttl or settings.task_status_cache_ttl
+        self._sync_client = None
+        self._set_unless_final = None
+
+    async def _get_client(self):
+        if self.redis_client is None:
+            import redis.asyncio as redis
+            self.redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+        return self.redis_client
+
+    def _get_sync_client(self):
+        if self._sync_client is None:
+            import redis
+            self._sync_client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+        return self._sync_client
+
+    async def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get cached task status
+
+        Returns None on a miss, including hashes that only hold partial
+        worker progress and no full snapshot yet.
+        """
+        try:
+            client = await self._get_client()
+            raw = await client.hgetall(_status_key(task_id))
+        except Exception as e:
+            logger.warning(f"Task status cache read failed for {task_id}: {str(e)}")
+            return None
+
+        if not raw or "task_type" not in raw:
+            return None
+        return _decode_state(raw)
+
+    async def set(self, task_id: str, **fields) -> None:
+        """Write (a subset of) task status fields and refresh the TTL"""
+        if not fields:
+            return
+        mapping = {field: _encode_value(field, value) for field, value in fields.items()}
+        try:
+            client = await self._get_client()
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.hset(_status_key(task_id), mapping=mapping)
+                pipe.expire(_status_key(task_id), self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Task status cache write failed for {task_id}: {str(e)}")
+
+    async def set_many_unless_final(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Write fields for many tasks in a single pipelined round trip,
+        skipping tasks the cache already holds in a final state
+        """
+        if not updates:
+            return
+        try:
+            client = await self._get_client()
+            if self._set_unless_final is None:
+                self._set_unless_final = client.register_script(SET_UNLESS_FINAL_SCRIPT)
+            async with client.pipeline(transaction=False) as pipe:
+                for task_id, fields in updates.items():
+                    args = [self.ttl]
+                    for field, value in fields.items():
+                        args.extend([field, _encode_value(field, value)])
+                    await self._set_unless_final(keys=[_status_key(task_id)], args=args, client=pipe)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Task status cache bulk write failed: {str(e)}")
+
+    async def delete(self, task_id: str) -> None:
+        """Drop a task from the cache"""
+        try:
+            client = await self._get_client()
+            await client.delete(_status_key(task_id))
+        except Exception as e:
+            logger.warning(f"Task status cache delete failed for {task_id}: {str(e)}")
+
+    def set_sync(self, task_id: str, **fields) -> None:
+        """Synchronous variant of set() for Celery workers"""
+        if not fields:
+            return
+        mapping = {field: _encode_value(field, value) for field, value in fields.items()}
+        try:
+            pipe = self._get_sync_client().pipeline(transaction=False)
+            pipe.hset(_status_key(task_id), mapping=mapping)
+            pipe.expire(_status_key(task_id), self.ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Task status cache write failed for {task_id}: {str(e)}")
+
+
+# Global cache instance
+_task_cache: Optional[TaskStatusCache] = None
+
+
+def get_task_cache() -> TaskStatusCache:
+    """Get or create global task status cache"""
+    global _task_cache
+    if _task_cache is None:
+        _task_cache = TaskStatusCache()
+    return _task_cache
@@ -0,0 +1,198 @@
+"""
+Task Statistics - Incrementally maintained per-user counters in Redis
+"""
+from datetime import datetime, timedelta, date
+from typing import Any, Dict, Iterable, Optional, Tuple
+from loguru import logger
+from app.config import get_settings
+from app.models.task import TaskStatus, TaskType
+
+settings = get_settings()
+
+STATS_KEY_PREFIX = "task_stats:"
+# Counters are rebuilt from the database at most this often, which bounds drift
+STATS_TTL = 3600
+RECENT_DAYS = 7
+
+# Increment only when the hash exists: a missing hash is rebuilt from the
+# database on the next read, so blind increments would create partial counts
+_INCREMENT_IF_EXISTS = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 1, #ARGV, 2 do
+    redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+return 1
+"""
+
+
+def _stats_key(user_id: str) -> str:
+    return f"{STATS_KEY_PREFIX}{user_id}"
+
+
+def _day_field(day: date) -> str:
+    return f"day:{day.isoformat()}"
+
+
+def _recent_days(today: Optional[date] = None) -> list:
+    today = today or datetime.utcnow().date()
+    return [today - timedelta(days=offset) for offset in range(RECENT_DAYS)]
+
+
+def build_statistics(
+    by_type: Dict[str, int],
+    by_status: Dict[str, int],
+    recent: int,
+) -> Dict[str, Any]:
+    """Assemble the statistics response from counters"""
+    total_tasks = sum(by_type.values())
+    return {
+        "total_tasks": total_tasks,
+        "by_type": by_type,
+        "by_status": by_status,
+        "recent_7_days": recent,
+        "success_rate": (
+            (by_status.get(TaskStatus.SUCCESS.value, 0) / total_tasks * 100)
+            if total_tasks > 0 else 0
+        ),
+    }
+
+
+def aggregate_rows(
+    rows: Iterable[Tuple[Any, Any, Optional[date], int]],
+) -> Tuple[Dict[str, int], Dict[str, int], Dict[str, int]]:
+    """
+    Fold (task_type, status, recent_day, count) rows from the GROUP BY query
+    into by-type, by-status and per-day counters
+    """
+    by_type = {task_type.value: 0 for task_type in TaskType}
+    by_status = {task_status.value: 0 for task_status in TaskStatus}
+    by_day: Dict[str, int] = {}
+    for task_type, task_status, recent_day, count in rows:
+        by_type[task_type.value] = by_type.get(task_type.value, 0) + count
+        by_status[task_status.value] = by_status.get(task_status.value, 0) + count
+        if recent_day is not None:
+            field = _day_field(recent_day)
+            by_day[field] = by_day.get(field, 0) + count
+    return by_type, by_status, by_day
+
+
+class TaskStatsCounter:
+    """
+    Per-user task counters kept in one Redis hash
+
+    Fields: type:<task_type>, status:<status> and day:<YYYY-MM-DD> for task
+    creations. Services update them on creation, status transitions and
+    deletion, so reading statistics is one HGETALL regardless of history size.
+    """
+
+    def __init__(self, redis_client=None):
+        self.redis_client = redis_client
+        self._increment = None
+
+    async def _get_client(self):
+        if self.redis_client is None:
+            import redis.asyncio as redis
+            self.redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+        return self.redis_client
+
+    async def _apply(self, user_id: str, deltas: Dict[str, int]) -> None:
+        try:
+            client = await self._get_client()
+            if self._increment is None:
+                self._increment = client.register_script(_INCREMENT_IF_EXISTS)
+            args = []
+            for field, delta in deltas.items():
+                args.extend([field, delta])
+            await self._increment(keys=[_stats_key(str(user_id))], args=args)
+        except Exception as e:
+            logger.warning(f"Task stats update failed for {user_id}: {str(e)}")
+
+    async def record_created(self, user_id: str, task_type: TaskType, count: int = 1) -> None:
+        """Count newly created (pending) tasks"""
+        await self._apply(user_id, {
+            f"type:{task_type.value}": count,
+            f"status:{TaskStatus.PENDING.value}": count,
+            _day_field(datetime.utcnow().date()): count,
+        })
+
+    async def record_transition(
+        self,
+        user_id: str,
+        old_status: TaskStatus,
+        new_status: TaskStatus,
+        count: int = 1,
+    ) -> None:
+        """Move tasks between status counters"""
+        if old_status == new_status:
+            return
+        await self._apply(user_id, {
+            f"status:{old_status.value}": -count,
+            f"status:{new_status.value}": count,
+        })
+
+    async def record_deleted(
+        self,
+        user_id: str,
+        task_type: TaskType,
+        task_status: TaskStatus,
+        created_at: Optional[datetime] = None,
+    ) -> None:
+        """Remove a deleted task from the counters"""
+        deltas = {
+            f"type:{task_type.value}": -1,
+            f"status:{task_status.value}": -1,
+        }
+        if created_at is not None:
+            deltas[_day_field(created_at.date())] = -1
+        await self._apply(user_id, deltas)
+
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Read statistics, or None if the counters must be rebuilt"""
+        try:
+            client = await self._get_client()
+            raw = await client.hgetall(_stats_key(str(user_id)))
+        except Exception as e:
+            logger.warning(f"Task stats read failed for {user_id}: {str(e)}")
+            return None
+        if not raw:
+            return None
+
+        by_type = {task_type.value: int(raw.get(f"type:{task_type.value}", 0)) for task_type in TaskType}
+        by_status = {task_status.value: int(raw.get(f"status:{task_status.value}", 0)) for task_status in TaskStatus}
+        recent = sum(int(raw.get(_day_field(day), 0)) for day in _recent_days())
+        return build_statistics(by_type, by_status, recent)
+
+    async def seed(
+        self,
+        user_id: str,
+        by_type: Dict[str, int],
+        by_status: Dict[str, int],
+        by_day: Dict[str, int],
+    ) -> None:
+        """Replace the counters with a fresh database aggregate"""
+        mapping = {f"type:{k}": v for k, v in by_type.items()}
+        mapping.update({f"status:{k}": v for k, v in by_status.items()})
+        mapping.update(by_day)
+        try:
+            client = await self._get_client()
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.delete(_stats_key(str(user_id)))
+                pipe.hset(_stats_key(str(user_id)), mapping=mapping)
+                pipe.expire(_stats_key(str(user_id)), STATS_TTL)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Task stats seed failed for {user_id}: {str(e)}")
+
+
+# Global counter instance
+_task_stats: Optional[TaskStatsCounter] = None
+
+
+def get_task_stats() -> TaskStatsCounter:
+    """Get or create global task stats counter"""
+    global _task_stats
+    if _task_stats is None:
+        _task_stats = TaskStatsCounter()
+    return _task_stats
@@ -0,0 +1,354 @@
+"""
+Tracing - Lightweight spans propagated through contextvars, exported as OTLP JSON
+"""
+import asyncio
+import functools
+import json
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+from loguru import logger
+from app.config import get_settings
+
+settings = get_settings()
+
+# OTLP span kinds and status codes
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT, KIND_CONSUMER = 1, 2, 3, 5
+STATUS_OK, STATUS_ERROR = 1, 2
+
+# Longest SQL statement kept as a span attribute
+MAX_STATEMENT_LENGTH = 500
+
+
+class Span:
+    """One timed operation; only sampled spans are recorded and exported"""
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "sampled",
+                 "start_ns", "end_ns", "attributes", "status", "status_message")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool, kind: int = KIND_INTERNAL):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes: Dict[str, Any] = {}
+        self.status = STATUS_OK
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self.sampled:
+            self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    def end(self) -> None:
+        if self.end_ns:
+            return
+        self.end_ns = time.time_ns()
+        if self.sampled:
+            get_span_exporter().add(self)
+
+    @property
+    def traceparent(self) -> str:
+        """W3C trace context header value"""
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": self.status, "message": self.status_message},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+# Span of the code running in the current context; copied into tasks
+# created from it, so children started there attach to it
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def tracing_enabled() -> bool:
+    return settings.trace_exporter != "none"
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Span]:
+    """Remote parent from a W3C traceparent header, as a span that is never exported"""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    parent = Span("remote", parts[1], None, parts[3] == "01")
+    parent.span_id = parts[2]
+    parent.end_ns = -1  # Never exported from here
+    return parent
+
+
+def start_span(
+    name: str,
+    parent: Optional[Span] = None,
+    kind: int = KIND_INTERNAL,
+    **attributes: Any,
+) -> Optional[Span]:
+    """
+    Start a span under `parent`, or the current span
+
+    A new trace is sampled at trace_sample_rate; children follow the
+    decision of their root. Returns None while tracing is disabled.
+    """
+    if not tracing_enabled():
+        return None
+    parent = parent or current_span.get()
+    if parent is None:
+        span = Span(name, os.urandom(16).hex(), None, random.random() < settings.trace_sample_rate, kind)
+    else:
+        span = Span(name, parent.trace_id, parent.span_id, parent.sampled, kind)
+    if span.sampled:
+        span.attributes.update(attributes)
+    return span
+
+
+@contextmanager
+def span(name: str, parent: Optional[Span] = None, kind: int = KIND_INTERNAL, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Run a block as the current span; exceptions mark it as failed"""
+    started = start_span(name, parent, kind, **attributes)
+    if started is None:
+        yield None
+        return
+    token = current_span.set(started)
+    try:
+        yield started
+    except BaseException as e:
+        started.record_error(e)
+        raise
+    finally:
+        current_span.reset(token)
+        started.end()
+
+
+def traced(name: str):
+    """Decorator running an async function in a span"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_traceparent() -> Optional[str]:
+    """traceparent of the current span, for handing the trace to another process"""
+    active = current_span.get()
+    return active.traceparent if active is not None else None
+
+
+class _TracedTransport:
+    """
+    httpx transport wrapper recording a client span per request
+
+    Wrapping the transport rather than using event hooks means timeouts,
+    connection errors and cancellations end their span too, marked failed.
+    The span ends once response headers arrive.
+    """
+
+    def __init__(self, transport):
+        self._transport = transport
+
+    async def handle_async_request(self, request):
+        started = start_span(f"HTTP {request.method}", kind=KIND_CLIENT)
+        if started is None:
+            return await self._transport.handle_async_request(request)
+        started.set_attribute("http.method", request.method)
+        started.set_attribute("http.url", f"{request.url.scheme}://{request.url.host}{request.url.path}")
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException as e:
+            started.record_error(e)
+            started.end()
+            raise
+        started.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            started.status = STATUS_ERROR
+        started.end()
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    async def __aenter__(self):
+        await self._transport.__aenter__()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self._transport.__aexit__(*args)
+
+
+def trace_http_client(client) -> None:
+    """Record a client span for every request an httpx.AsyncClient sends"""
+    if not tracing_enabled() or isinstance(client._transport, _TracedTransport):
+        return
+    client._transport = _TracedTransport(client._transport)
+
+
+def trace_engine(engine) -> None:
+    """Record a span for every SQL statement an engine executes"""
+    if not tracing_enabled():
+        return
+    from sqlalchemy import event
+
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = start_span("db.query", kind=KIND_CLIENT)
+        if started is not None and started.sampled:
+            started.set_attribute("db.system", "postgresql")
+            started.set_attribute("db.statement", statement[:MAX_STATEMENT_LENGTH])
+            conn.info.setdefault("trace_spans", []).append(started)
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("trace_spans")
+        if spans:
+            spans.pop().end()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        spans = exception_context.connection.info.get("trace_spans") if exception_context.connection else None
+        if spans:
+            failed = spans.pop()
+            failed.record_error(exception_context.original_exception)
+            failed.end()
+
+
+class SpanExporter:
+    """
+    Buffers finished spans and ships them in batches
+
+    Every trace_export_interval the batch is written as one OTLP/JSON
+    ExportTraceServiceRequest, appended as a line to trace_file_path or
+    POSTed to trace_otlp_endpoint/v1/traces. The buffer is capped; spans
+    beyond it are dropped and counted.
+    """
+
+    def __init__(self, exporter: Optional[str] = None, max_queue: Optional[int] = None):
+        self.exporter = exporter or settings.trace_exporter
+        self.max_queue = max_queue or settings.trace_max_queue
+        self._spans: List[Span] = []
+        self.dropped = 0
+        self._client = None
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, finished: Span) -> None:
+        if len(self._spans) >= self.max_queue:
+            self.dropped += 1
+            return
+        self._spans.append(finished)
+
+    def _payload(self, spans: List[Span]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": settings.app_name}},
+                    {"key": "service.version", "value": {"stringValue": settings.app_version}},
+                    {"key": "deployment.environment", "value": {"stringValue": settings.app_env}},
+                    {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+                ]},
+                "scopeSpans": [{
+                    "scope": {"name": "app.core.tracing"},
+                    "spans": [finished.to_otlp() for finished in spans],
+                }],
+            }]
+        }
+
+    def _write_file(self, body: str) -> None:
+        with open(settings.trace_file_path, "a", encoding="utf-8") as f:
+            f.write(body + "\n")
+
+    async def flush(self) -> int:
+        """Export buffered spans; returns how many were sent"""
+        if not self._spans:
+            return 0
+        spans, self._spans = self._spans, []
+        body = json.dumps(self._payload(spans), separators=(",", ":"))
+        try:
+            if self.exporter == "otlp":
+                if self._client is None:
+                    import httpx
+                    self._client = httpx.AsyncClient(timeout=10.0)
+                response = await self._client.post(
+                    f"{settings.trace_otlp_endpoint.rstrip('/')}/v1/traces",
+                    content=body,
+                    headers={"Content-Type": "application/json"},
+                )
+                response.raise_for_status()
+            else:
+                await asyncio.get_running_loop().run_in_executor(None, self._write_file, body)
+        except Exception as e:
+            logger.warning(f"Failed to export {len(spans)} spans: {str(e)}")
+            return 0
+        return len(spans)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.trace_export_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        """Start periodic export on the running event loop"""
+        if not tracing_enabled():
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop periodic export and send whatever is buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Global span exporter instance
+_span_exporter: Optional[SpanExporter] = None
+
+
+def get_span_exporter() -> SpanExporter:
+    """Get or create global span exporter"""
+    global _span_exporter
+    if _span_exporter is None:
+        _span_exporter = SpanExporter()
+    return _span_exporter
@@ -1,26 +1,44 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.config import get_settings
+from app.core.pool_metrics import MeteredPool, instrument_engine
+from app.core.tracing import trace_engine
 
 settings = get_settings()
 
-# Create async engine with optimized connection pool
-engine = create_async_engine(
-    settings.database_url,
+pool_size, max_overflow = settings.db_pool_limits
+
+# Connection pool settings shared by the primary and replica engines
+ENGINE_OPTIONS = dict(
     echo=settings.debug,
-    # Optimized connection pool settings for production
-    pool_size=10,              # Reduced from 20 to 10 for better resource utilization
-    max_overflow=5,            # Reduced from 10 to 5
+    poolclass=MeteredPool,     # Records checkout waits for /health/db
+    pool_size=pool_size,       # Per process role, see Settings.db_pool_limits
+    max_overflow=max_overflow,
     pool_pre_ping=True,        # Enable connection health checks
-    pool_recycle=3600,         # Recycle connections after 1 hour
-    pool_timeout=30,           # Connection acquisition timeout (seconds)
+    pool_recycle=settings.db_pool_recycle,
+    pool_timeout=settings.db_pool_timeout,
     connect_args={
         "server_settings": {
-            "application_name": settings.app_name,
-        }
+            "application_name": f"{settings.app_name} ({settings.process_role})",
+        },
+        # Server-side prepared statements kept by asyncpg, and SQLAlchemy's
+        # cache of their handles; both must be 0 behind PgBouncer transaction pooling
+        "statement_cache_size": settings.db_statement_cache_size,
+        "prepared_statement_cache_size": settings.db_prepared_statement_cache_size,
     },
 )
 
+# Create async engine with optimized connection pool
+engine = create_async_engine(settings.database_url, **ENGINE_OPTIONS)
+instrument_engine("primary", engine)
+trace_engine(engine)
+
+# Optional read replicas, used by read-only endpoints through get_read_db
+replica_engines = [create_async_engine(url, **ENGINE_OPTIONS) for url in settings.replica_urls]
+for index, replica_engine in enumerate(replica_engines):
+    instrument_engine(f"replica-{index}", replica_engine)
+    trace_engine(replica_engine)
+
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -30,6 +48,27 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+
+def _read_sessionmaker(bind_engine) -> async_sessionmaker:
+    """
+    Session factory for read-only work
+
+    Autocommit connections send no BEGIN, COMMIT or ROLLBACK, so every query
+    costs a single round trip. Sessions from it must never write.
+    """
+    return async_sessionmaker(
+        bind_engine.execution_options(isolation_level="AUTOCOMMIT"),
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
+
+ReadSessionLocal = _read_sessionmaker(engine)
+
+ReplicaSessionLocals = [_read_sessionmaker(replica_engine) for replica_engine in replica_engines]
+
 # Base class for models
 Base = declarative_base()
 
@@ -39,9 +78,29 @@ async def get_db() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         try:
             yield session
-            await session.commit()
+            # Services commit their own writes; only flush what one left pending,
+            # so a request that just read costs no extra COMMIT
+            if session.new or session.dirty or session.deleted:
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
         finally:
             await session.close()
+
+
+# Dependency for read-only endpoints: a replica session when one is fresh
+# enough for this user, otherwise the primary, both in autocommit mode
+async def get_read_db() -> AsyncSession:
+    from app.core.replicas import get_replica_router
+
+    session_factory, is_replica = await get_replica_router().read_session_factory(
+        "default_user"  # TODO: Get from auth
+    )
+    async with session_factory() as session:
+        # Readers on a replica must not write what they saw into shared caches
+        session.info["replica"] = is_replica
+        try:
+            yield session
+        finally:
+            await session.close()
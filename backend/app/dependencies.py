@@ -1,20 +1,18 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from jose import JWTError, jwt
+from jose import JWTError
 from app.config import get_settings
+from app.core.security import decode_access_token, is_admin_claims
+from app.core.middleware import scope_headers, get_client_ip
 from app.database import get_db
 
 settings = get_settings()
 security = HTTPBearer()
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-) -> dict:
-    """
-    Get current authenticated user from JWT token
-    """
+def _token_claims(credentials: HTTPAuthorizationCredentials) -> dict:
+    """Claims of a valid bearer token naming a user; 401 otherwise"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -22,16 +20,56 @@ async def get_current_user(
     )
 
     try:
-        payload = jwt.decode(
-            credentials.credentials,
-            settings.secret_key,
-            algorithms=[settings.algorithm]
-        )
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
+        payload = decode_access_token(credentials.credentials)
     except JWTError:
         raise credentials_exception
+    if payload.get("sub") is None:
+        raise credentials_exception
+    return payload
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> dict:
+    """
+    Get current authenticated user from JWT token
+    """
+    payload = _token_claims(credentials)
 
     # TODO: Fetch user from database
-    return {"user_id": user_id}
+    return {"user_id": payload["sub"]}
+
+
+async def get_admin_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> dict:
+    """
+    Get current user, requiring an admin token
+    """
+    payload = _token_claims(credentials)
+    if not is_admin_claims(payload):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+    return {"user_id": payload["sub"]}
+
+
+async def get_quota_identity(request: Request) -> str:
+    """
+    Who generation quotas are charged to
+
+    The token's subject when the request carries a valid bearer token,
+    otherwise the client IP, so anonymous callers each get their own
+    allowance instead of sharing one.
+    """
+    headers = scope_headers(request.scope)
+    authorization = headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        try:
+            user_id = decode_access_token(authorization[7:]).get("sub")
+        except JWTError:
+            user_id = None
+        if user_id:
+            return f"user:{user_id}"
+    return f"ip:{get_client_ip(request.scope, headers)}"
@@ -3,6 +3,7 @@ from typing import Dict, Any, Optional, List
 from enum import Enum
 import asyncio
 from loguru import logger
+from app.core.tracing import trace_http_client
 
 
 class ProviderStatus(str, Enum):
@@ -88,6 +89,32 @@ class BaseProvider(ABC):
         """Generate text completion (optional, override if supported)"""
         raise NotImplementedError(f"{self.provider_name} does not support text generation")
 
+    async def cancel_task(
+        self,
+        task_id: str,
+        **kwargs
+    ) -> bool:
+        """
+        Cancel a remote job (optional, override if supported)
+        Returns True if the provider accepted the cancellation
+
+        Only override for a cancel endpoint the provider documents, and cite
+        it in the override's docstring; a guessed endpoint costs a paid API
+        call that fails on every cancellation.
+        """
+        return False
+
+    async def _cancel_remote_task(self, task_id: str, timeout: float = 10.0, **kwargs):
+        """
+        Best-effort remote cancel, called from poll loops on CancelledError
+        so abandoned jobs stop consuming provider quota
+        """
+        try:
+            cancelled = await asyncio.wait_for(self.cancel_task(task_id, **kwargs), timeout)
+            logger.info(f"{self.provider_name} remote task {task_id} cancel {'accepted' if cancelled else 'not supported'}")
+        except Exception as e:
+            logger.warning(f"{self.provider_name} remote task {task_id} cancel failed: {str(e)}")
+
     def record_failure(self):
         """Record a failure for health tracking"""
         self._failure_count += 1
@@ -109,10 +136,16 @@ class BaseProvider(ABC):
 
     async def __aenter__(self):
         """Async context manager entry"""
+        client = getattr(self, "client", None)
+        if client is not None:
+            trace_http_client(client)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit"""
+        if exc_type is not None and issubclass(exc_type, asyncio.CancelledError):
+            # A cancelled request says nothing about provider health
+            return
         if exc_type is not None:
             self.record_failure()
         else:
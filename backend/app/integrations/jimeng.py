@@ -1,9 +1,11 @@
 from typing import Dict, Any, Optional, List
 from app.integrations.base import BaseProvider, ProviderStatus
+from app.core.tracing import traced
 from app.core.exceptions import APILimitExceededException
 from loguru import logger
 import httpx
 import time
+import asyncio
 
 
 class JimengProvider(BaseProvider):
@@ -189,6 +191,7 @@ class JimengProvider(BaseProvider):
             logger.error(f"Jimeng video generation failed: {str(e)}")
             raise
 
+    @traced("jimeng.poll_image_task")
     async def _poll_image_task(self, task_id: str, max_wait: int = 300) -> Dict[str, Any]:
         """Poll image generation task until complete"""
         start_time = time.time()
@@ -211,9 +214,13 @@ class JimengProvider(BaseProvider):
             except httpx.HTTPStatusError as e:
                 logger.error(f"Polling task {task_id} failed: {e.response.status_code}")
                 raise
+            except asyncio.CancelledError:
+                await self._cancel_remote_task(task_id, kind="image")
+                raise
 
         raise TimeoutError(f"Image generation timed out after {max_wait} seconds")
 
+    @traced("jimeng.poll_video_task")
     async def _poll_video_task(self, task_id: str, max_wait: int = 600) -> Dict[str, Any]:
         """Poll video generation task until complete"""
         start_time = time.time()
@@ -236,6 +243,9 @@ class JimengProvider(BaseProvider):
             except httpx.HTTPStatusError as e:
                 logger.error(f"Polling video task {task_id} failed: {e.response.status_code}")
                 raise
+            except asyncio.CancelledError:
+                await self._cancel_remote_task(task_id, kind="video")
+                raise
 
         raise TimeoutError(f"Video generation timed out after {max_wait} seconds")
 
@@ -1,6 +1,8 @@
 from typing import Dict, Any, Optional, List
 from app.integrations.base import BaseProvider, ProviderStatus
+from app.core.tracing import traced
 from app.core.exceptions import APILimitExceededException
+from app.core.progress_buffer import report_progress
 from loguru import logger
 import httpx
 import time
@@ -229,6 +231,7 @@ class KlingProvider(BaseProvider):
             logger.error(f"Kling video upscaling failed: {str(e)}")
             raise
 
+    @traced("kling.poll_video_task")
     async def _poll_video_task(self, task_id: str, max_wait: int = 900) -> Dict[str, Any]:
         """
         Poll video generation task until complete
@@ -252,12 +255,16 @@ class KlingProvider(BaseProvider):
                     # Log progress if available
                     progress = data.get("progress", 0)
                     logger.info(f"Kling video task {task_id} progress: {progress}%")
+                    report_progress(progress, f"Generating video... {progress}%")
 
                 await asyncio.sleep(10)  # Poll every 10 seconds
 
             except httpx.HTTPStatusError as e:
                 logger.error(f"Polling video task {task_id} failed: {e.response.status_code}")
                 raise
+            except asyncio.CancelledError:
+                await self._cancel_remote_task(task_id)
+                raise
 
         raise TimeoutError(f"Video generation timed out after {max_wait} seconds")
 
@@ -1,9 +1,12 @@
 from typing import Dict, Any, Optional, List
 from app.integrations.base import BaseProvider, ProviderStatus
+from app.core.tracing import traced
 from app.core.exceptions import APILimitExceededException
+from app.core.progress_buffer import report_progress
 from loguru import logger
 import httpx
 import time
+import asyncio
 
 
 class SunoProvider(BaseProvider):
@@ -103,6 +106,7 @@ class SunoProvider(BaseProvider):
             logger.error(f"Suno music generation failed: {str(e)}")
             raise
 
+    @traced("suno.poll_music_task")
     async def _poll_music_task(self, task_id: str, max_wait: int = 300) -> Dict[str, Any]:
         """
         Poll music generation task until complete
@@ -124,12 +128,16 @@ class SunoProvider(BaseProvider):
                 elif status == "processing":
                     progress = data.get("progress", 0)
                     logger.info(f"Suno music task {task_id} progress: {progress}%")
+                    report_progress(progress, f"Generating music... {progress}%")
 
                 await asyncio.sleep(5)  # Poll every 5 seconds
 
             except httpx.HTTPStatusError as e:
                 logger.error(f"Polling music task {task_id} failed: {e.response.status_code}")
                 raise
+            except asyncio.CancelledError:
+                await self._cancel_remote_task(task_id)
+                raise
 
         raise TimeoutError(f"Music generation timed out after {max_wait} seconds")
 
@@ -1,21 +1,35 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from loguru import logger
 from app.config import settings
-from app.database import engine
+from app.database import engine, AsyncSessionLocal
 from app.models import Base  # Will be created in models/__init__.py
 from app.core.security import SecurityMiddleware
-from app.core.middleware import error_handler_middleware, request_logging_middleware
-from app.core.rate_limit import RateLimitMiddleware
+from app.core.middleware import ErrorHandlerMiddleware, RequestLoggingMiddleware
+from app.core.rate_limit import RateLimitMiddleware, get_hybrid_rate_limiter
+from app.core.progress_buffer import get_progress_buffer
+from app.core.pool_metrics import pool_stats
+from app.core.request_log import configure_logging, get_request_log
+from app.core.metrics import get_metrics_publisher, render
+from app.core.tracing import get_span_exporter
+from app.core.profiling import ProfilingMiddleware, get_loop_monitor
 
 # Create tables
 async def init_db():
+    from app.services.archive_service import ArchiveService
+
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    # tasks is partitioned and accepts no rows until its partitions exist
+    async with AsyncSessionLocal() as db:
+        await ArchiveService(db).ensure_partitions()
 
 
 def create_app() -> FastAPI:
+    configure_logging()
+
     app = FastAPI(
         title=settings.app_name,
         version=settings.app_version,
@@ -27,15 +41,19 @@ def create_app() -> FastAPI:
     # Security middleware (must be first)
     app.add_middleware(SecurityMiddleware)
 
+    # On-demand request profiling for admins; not installed unless enabled
+    if settings.profiling_enabled:
+        app.add_middleware(ProfilingMiddleware)
+
     # Rate limiting middleware (enabled in production)
     rate_limit_enabled = settings.app_env == "production"
     app.add_middleware(RateLimitMiddleware, enabled=rate_limit_enabled)
 
     # Error handling middleware
-    app.add_middleware(error_handler_middleware)
+    app.add_middleware(ErrorHandlerMiddleware)
 
     # Request logging middleware
-    app.add_middleware(request_logging_middleware)
+    app.add_middleware(RequestLoggingMiddleware)
 
     # CORS middleware
     # Parse CORS origins from environment variable
@@ -62,13 +80,27 @@ def create_app() -> FastAPI:
         logger.info(f"Environment: {settings.app_env}")
         logger.info(f"Debug mode: {settings.debug}")
         logger.info(f"Rate limiting enabled: {rate_limit_enabled}")
+        pool_size, max_overflow = settings.db_pool_limits
+        logger.info(f"DB pool ({settings.process_role}): {pool_size} + {max_overflow} overflow per process")
         await init_db()
         logger.info("Database initialized")
+        get_progress_buffer().start()
+        get_metrics_publisher().start()
+        get_span_exporter().start()
+        if settings.profiling_enabled:
+            get_loop_monitor().start()
 
     # Shutdown event
     @app.on_event("shutdown")
     async def shutdown_event():
         logger.info("Shutting down application")
+        await get_progress_buffer().stop()
+        await get_metrics_publisher().stop()
+        await get_span_exporter().stop()
+        if settings.profiling_enabled:
+            await get_loop_monitor().stop()
+        if settings.rate_limit_backend == "hybrid":
+            await get_hybrid_rate_limiter().stop()
 
     # Health check
     @app.get("/health")
@@ -80,6 +112,32 @@ def create_app() -> FastAPI:
             "environment": settings.app_env,
         }
 
+    # Connection pool usage and checkout wait times, for sizing pools
+    # against Postgres max_connections
+    @app.get("/health/db")
+    async def database_pool_health():
+        return {
+            "role": settings.process_role,
+            "pools": pool_stats(),
+        }
+
+    # Prometheus scrape target; merges every worker on this host
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(
+            render(await get_metrics_publisher().collect()),
+            media_type="text/plain; version=0.0.4",
+        )
+
+    # Latest requests from this process's ring buffer, for debugging
+    # without raising the log sampling rate; exposes client IPs, so debug only
+    if settings.debug:
+        @app.get("/health/requests")
+        async def recent_requests(limit: int = 100, errors_only: bool = False):
+            return {
+                "requests": get_request_log().recent(min(limit, settings.request_log_buffer_size), errors_only),
+            }
+
     # Include API routes
     from app.api.v1.router import api_router
     app.include_router(api_router, prefix="/api/v1")
@@ -1,6 +1,6 @@
 from app.database import Base
 from app.models.user import User
-from app.models.task import Task, TaskStatus, TaskType
+from app.models.task import Task, TaskStatus, TaskType, TaskArchive, TaskArchiveSegment, ArchivedTask
 from app.models.workflow import Workflow, WorkflowStep, WorkflowStatus
 
 __all__ = [
@@ -9,6 +9,9 @@ __all__ = [
     "Task",
     "TaskStatus",
     "TaskType",
+    "TaskArchive",
+    "TaskArchiveSegment",
+    "ArchivedTask",
     "Workflow",
     "WorkflowStep",
     "WorkflowStatus",
@@ -1,6 +1,7 @@
 from app.database import Base
-from sqlalchemy import Column, String, DateTime, Enum, Text, JSON, Integer, Boolean
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, Date, Enum, Text, Integer, BigInteger, Boolean, Index, Computed, text
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR, JSONB
+from sqlalchemy.orm import deferred
 import uuid
 from datetime import datetime
 import enum
@@ -14,6 +15,10 @@ class TaskStatus(str, enum.Enum):
     CANCELLED = "cancelled"
 
 
+# States a task never leaves
+TERMINAL_STATUSES = (TaskStatus.SUCCESS, TaskStatus.FAILED, TaskStatus.CANCELLED)
+
+
 class TaskType(str, enum.Enum):
     IMAGE_GENERATION = "image_generation"
     VIDEO_GENERATION = "video_generation"
@@ -22,6 +27,28 @@ class TaskType(str, enum.Enum):
     WORKFLOW = "workflow"
 
 
+# Text search configuration: 'simple' does no stemming, so it behaves the
+# same for every language; trigram matching covers partial words and CJK
+SEARCH_CONFIG = "simple"
+
+# Searchable text fields of input_data, with their ts_rank weight
+SEARCH_FIELDS = (
+    ("prompt", "A"),
+    ("text", "A"),
+    ("lyrics", "B"),
+    ("negative_prompt", "D"),
+)
+
+SEARCH_TEXT_SQL = " || ' ' || ".join(
+    f"coalesce(input_data->>'{field}', '')" for field, _ in SEARCH_FIELDS
+)
+
+SEARCH_VECTOR_SQL = " || ".join(
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(input_data->>'{field}', '')), '{weight}')"
+    for field, weight in SEARCH_FIELDS
+)
+
+
 class Task(Base):
     __tablename__ = "tasks"
 
@@ -31,12 +58,16 @@ class Task(Base):
     status = Column(Enum(TaskStatus), default=TaskStatus.PENDING, index=True)
     priority = Column(Integer, default=5)
 
+    # Heavy payloads live out of line in TOAST (see archive_service.PARTITION_STORAGE),
+    # so progress and status updates don't copy them. Those not needed for status
+    # reads are deferred and raise if used without being explicitly loaded.
+
     # Input parameters
-    input_data = Column(JSON, nullable=False)
+    input_data = deferred(Column(JSONB, nullable=False), raiseload=True)
 
     # Output results
-    output_data = Column(JSON, nullable=True)
-    output_urls = Column(JSON, nullable=True)  # List of URLs
+    output_data = Column(JSONB, nullable=True)
+    output_urls = deferred(Column(JSONB, nullable=True), raiseload=True)  # List of URLs
 
     # Progress tracking
     progress = Column(Integer, default=0)
@@ -44,7 +75,7 @@ class Task(Base):
 
     # Error handling
     error_message = Column(Text, nullable=True)
-    error_details = Column(JSON, nullable=True)
+    error_details = deferred(Column(JSONB, nullable=True), raiseload=True)
 
     # Metadata
     provider = Column(String(50), nullable=True)  # Which AI provider was used
@@ -53,9 +84,102 @@ class Task(Base):
     attempts = Column(Integer, default=0)
 
     # Timing
-    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, index=True)
+    # Partition key, so it is part of the primary key
+    created_at = Column(DateTime(timezone=True), primary_key=True, default=datetime.utcnow, index=True)
     started_at = Column(DateTime(timezone=True), nullable=True)
     completed_at = Column(DateTime(timezone=True), nullable=True)
 
     # Celery task ID
     celery_task_id = Column(String(255), nullable=True, index=True)
+
+    # Batch submission this task belongs to (None for single requests)
+    batch_id = Column(UUID(as_uuid=True), nullable=True, index=True)
+
+    # Full-text search, maintained by Postgres; deferred so listings never load them
+    search_text = deferred(Column(Text, Computed(SEARCH_TEXT_SQL, persisted=True)))
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True)))
+
+    __table_args__ = (
+        # Keyset pagination of listings, newest first
+        Index("ix_tasks_user_created", user_id, created_at.desc(), id.desc()),
+        Index("ix_tasks_user_type_status_created", user_id, task_type, status, created_at.desc(), id.desc()),
+        Index("ix_tasks_search_vector", "search_vector", postgresql_using="gin"),
+        # Containment (@>) queries on request parameters
+        Index(
+            "ix_tasks_input_data",
+            "input_data",
+            postgresql_using="gin",
+            postgresql_ops={"input_data": "jsonb_path_ops"},
+        ),
+        # History filters on the requested model and seed, and the provider used
+        Index("ix_tasks_user_input_model", user_id, text("(input_data ->> 'model')")),
+        Index("ix_tasks_user_input_seed", user_id, text("(input_data ->> 'seed')")),
+        Index("ix_tasks_user_provider", user_id, provider),
+        Index(
+            "ix_tasks_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
+        # Monthly partitions, managed by app.services.archive_service
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+# Everything task_cache.task_state reads, plus the owner: what writes return
+# (INSERT/UPDATE ... RETURNING) to refresh the status cache without a SELECT
+TASK_STATE_COLUMNS = (
+    Task.id,
+    Task.user_id,
+    Task.task_type,
+    Task.status,
+    Task.progress,
+    Task.progress_message,
+    Task.provider,
+    Task.output_data,
+    Task.error_message,
+    Task.created_at,
+    Task.started_at,
+    Task.completed_at,
+)
+
+
+class TaskArchive(Base):
+    """A monthly tasks partition moved to compressed cold storage"""
+    __tablename__ = "task_archives"
+
+    month = Column(Date, primary_key=True)  # First day of the archived month
+    location = Column(String(500), nullable=False)  # Archive store key
+    row_count = Column(Integer, nullable=False)
+    archived_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+
+
+class TaskArchiveSegment(Base):
+    """
+    One user's slice of an archived month
+
+    Each user's tasks are a separate zstd frame in the month's archive, so a
+    history read decompresses only that frame. counts holds the user's
+    [task_type, status, count] totals for statistics rebuilds.
+    """
+    __tablename__ = "task_archive_segments"
+
+    month = Column(Date, primary_key=True)
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    offset = Column(BigInteger, nullable=False)  # Byte offset of the frame in the archive
+    length = Column(BigInteger, nullable=False)  # Compressed frame size in bytes
+    row_count = Column(Integer, nullable=False)
+    counts = Column(JSONB, nullable=False)
+
+    __table_args__ = (
+        Index("ix_task_archive_segments_user_month", user_id, month.desc()),
+    )
+
+
+class ArchivedTask(Base):
+    """Where an archived task lives, so lookups by ID still find it"""
+    __tablename__ = "archived_tasks"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), nullable=False)
+    month = Column(Date, nullable=False)
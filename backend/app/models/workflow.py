@@ -1,6 +1,6 @@
 from app.database import Base
-from sqlalchemy import Column, String, DateTime, Enum, Text, JSON, Integer, Boolean
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, Enum, Text, Integer, Boolean, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 import uuid
 from datetime import datetime
 import enum
@@ -34,16 +34,16 @@ class Workflow(Base):
     status = Column(Enum(WorkflowStatus), default=WorkflowStatus.DRAFT, index=True)
     current_step = Column(Enum(WorkflowStep), default=WorkflowStep.STORY)
 
-    # Step data (JSON stores the output of each step)
-    story_data = Column(JSON, nullable=True)
-    script_data = Column(JSON, nullable=True)
-    config_data = Column(JSON, nullable=True)
-    character_data = Column(JSON, nullable=True)
-    shots_data = Column(JSON, nullable=True)
-    edit_data = Column(JSON, nullable=True)
+    # Step data (JSONB stores the output of each step)
+    story_data = Column(JSONB, nullable=True)
+    script_data = Column(JSONB, nullable=True)
+    config_data = Column(JSONB, nullable=True)
+    character_data = Column(JSONB, nullable=True)
+    shots_data = Column(JSONB, nullable=True)
+    edit_data = Column(JSONB, nullable=True)
 
     # Generated assets
-    asset_urls = Column(JSON, nullable=True)  # Character images, shots, etc.
+    asset_urls = Column(JSONB, nullable=True)  # Character images, shots, etc.
 
     # Metadata
     total_duration = Column(Integer, nullable=True)  # Total video duration in seconds
@@ -53,3 +53,8 @@ class Workflow(Base):
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow, index=True)
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
     completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Keyset pagination of listings, newest first
+        Index("ix_workflows_user_created", user_id, created_at.desc(), id.desc()),
+    )
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, HttpUrl, Field, confloat
 from typing import Optional, List
 from enum import Enum
+from app.schemas.task import MAX_BATCH_ITEMS
 
 
 class GenerationTaskStatus(str, Enum):
@@ -23,6 +24,11 @@ class TextToImageRequest(BaseModel):
     num_images: int = Field(default=1, ge=1, le=4, description="Number of images to generate")
 
 
+class BatchTextToImageRequest(BaseModel):
+    """Request to generate many images from text in one call"""
+    items: List[TextToImageRequest] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS, description="Generation requests")
+
+
 class ImageToImageRequest(BaseModel):
     """Request to generate image from image"""
     source_image_url: HttpUrl = Field(..., description="Source image URL")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Any
+from typing import Optional, Any, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -36,6 +36,27 @@ class TaskResponse(BaseModel):
 
 class TaskListResponse(BaseModel):
     tasks: list[TaskResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # Only set when requested
     page_size: int
+    has_more: bool
+    next_cursor: Optional[str] = None
+
+
+# Upper bound on items per batch submission
+MAX_BATCH_ITEMS = 500
+
+
+class BatchResponse(BaseModel):
+    batch_id: str
+    task_ids: list[str]
+    total: int
+    status: str
+    message: str
+
+
+class BatchProgressResponse(BaseModel):
+    batch_id: str
+    total: int
+    by_status: Dict[str, int]
+    progress: int
+    finished: bool
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, HttpUrl
 from typing import Optional, List, Literal
 from enum import Enum
+from app.schemas.task import MAX_BATCH_ITEMS
 
 
 class VideoModel(str, Enum):
@@ -30,6 +31,10 @@ class TextToVideoRequest(BaseModel):
     seed: Optional[int] = None
 
 
+class BatchTextToVideoRequest(BaseModel):
+    items: List[TextToVideoRequest] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+
+
 class ImageToVideoRequest(BaseModel):
     image_url: HttpUrl
     prompt: Optional[str] = Field(None, min_length=1, max_length=2000)
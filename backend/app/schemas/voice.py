@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, HttpUrl
 from typing import Optional, List, Literal
 from enum import Enum
+from app.schemas.task import MAX_BATCH_ITEMS
 
 
 class VoiceGender(str, Enum):
@@ -30,6 +31,10 @@ class TTSRequest(BaseModel):
     output_format: Literal["mp3", "wav", "flac"] = "mp3"
 
 
+class BatchTTSRequest(BaseModel):
+    items: List[TTSRequest] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+
+
 class VoiceCloneRequest(BaseModel):
     reference_audio_url: HttpUrl
     text: str = Field(..., min_length=1, max_length=10000)
@@ -93,6 +93,14 @@ class WorkflowResponse(BaseModel):
     created_at: datetime
 
 
+class WorkflowListResponse(BaseModel):
+    workflows: List[WorkflowResponse]
+    total: Optional[int] = None  # Only set when requested
+    page_size: int
+    has_more: bool
+    next_cursor: Optional[str] = None
+
+
 class WorkflowStepResponse(BaseModel):
     workflow_id: str
     step: str
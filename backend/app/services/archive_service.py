@@ -0,0 +1,278 @@
+import asyncio
+import re
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text
+from app.config import get_settings
+from app.models.task import Task, TaskArchive, TaskArchiveSegment, ArchivedTask, TaskStatus, TaskType
+from app.core.archive_store import ArchiveStore, get_archive_store
+from loguru import logger
+
+settings = get_settings()
+
+PARTITION_PATTERN = re.compile(r"^tasks_y(\d{4})m(\d{2})$")
+
+# Generated search columns are derived data and are not archived
+ARCHIVED_COLUMNS = [column for column in Task.__table__.columns if column.computed is None]
+
+# Storage parameters for every partition: payloads are moved out of line once
+# a row exceeds 128 bytes, keeping heap tuples narrow for status scans and
+# UPDATEs, and spare page space lets progress updates stay HOT
+PARTITION_STORAGE = "toast_tuple_target = 128, fillfactor = 85"
+
+UUID_COLUMNS = ("id", "user_id", "batch_id")
+DATETIME_COLUMNS = ("created_at", "started_at", "completed_at")
+
+# Rows handed to the archive writer thread at a time
+ARCHIVE_BATCH_SIZE = 1000
+
+
+def month_start(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"tasks_y{month.year}m{month.month:02d}"
+
+
+def archive_key(month: date) -> str:
+    return f"tasks/{month.year}-{month.month:02d}.ndjson.zst"
+
+
+def _archive_record(row) -> Dict[str, Any]:
+    record = dict(row)
+    record["task_type"] = record["task_type"].value
+    record["status"] = record["status"].value
+    for name in DATETIME_COLUMNS:
+        if record.get(name) is not None:
+            record[name] = record[name].isoformat()
+    return record
+
+
+def _task_from_record(record: Dict[str, Any]) -> Task:
+    """Rebuild a detached Task from an archived record"""
+    values = dict(record)
+    for name in UUID_COLUMNS:
+        if values.get(name):
+            try:
+                values[name] = uuid.UUID(values[name])
+            except ValueError:
+                pass
+    for name in DATETIME_COLUMNS:
+        if values.get(name):
+            values[name] = datetime.fromisoformat(values[name])
+    values["task_type"] = TaskType(values["task_type"])
+    values["status"] = TaskStatus(values["status"])
+    return Task(**values)
+
+
+class ArchiveService:
+    """
+    Monthly partitions of the tasks table and their cold-storage archives
+
+    Tasks are range-partitioned by created_at into tasks_yYYYYmMM tables.
+    Partitions are created ahead of time; once a month is entirely older than
+    settings.task_archive_after_days it is streamed to a zstd NDJSON archive,
+    recorded in task_archives, then detached and dropped, which keeps the hot
+    indexes small. Each user's tasks are a separate frame of the archive,
+    indexed in task_archive_segments, and archived_tasks keeps task IDs
+    resolvable. History listings read archived months only when asked to.
+    """
+
+    def __init__(self, db: AsyncSession, store: Optional[ArchiveStore] = None):
+        self.db = db
+        self.store = store or get_archive_store()
+
+    async def list_partitions(self) -> List[date]:
+        """Months that currently have a tasks partition, oldest first"""
+        result = await self.db.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = 'tasks'"
+        ))
+        months = []
+        for (name,) in result.all():
+            match = PARTITION_PATTERN.match(name)
+            if match:
+                months.append(date(int(match.group(1)), int(match.group(2)), 1))
+        return sorted(months)
+
+    async def ensure_partitions(self, months_ahead: Optional[int] = None) -> List[str]:
+        """Create partitions for the current month and the next few"""
+        if months_ahead is None:
+            months_ahead = settings.task_partition_months_ahead
+        current = month_start(datetime.utcnow())
+        created = []
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            name = partition_name(month)
+            await self.db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF tasks "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}') "
+                f"WITH ({PARTITION_STORAGE})"
+            ))
+            created.append(name)
+        await self.db.commit()
+        return created
+
+    async def archive_partition(self, month: date) -> int:
+        """Stream one month to the archive store, then drop its partition"""
+        key = archive_key(month)
+        name = partition_name(month)
+
+        # The range filter prunes the scan to exactly this partition; sorting
+        # by user groups each user's tasks into one frame of the archive
+        result = await self.db.stream(
+            select(*ARCHIVED_COLUMNS)
+            .where(Task.created_at >= month, Task.created_at < add_months(month, 1))
+            .order_by(Task.user_id, Task.created_at.desc(), Task.id.desc())
+        )
+        # Compression and file writes block, so they run in a thread a batch at a time
+        writer = await asyncio.to_thread(self.store.create_writer, key)
+        try:
+            batch = []
+            async for row in result:
+                batch.append(_archive_record(row._mapping))
+                if len(batch) >= ARCHIVE_BATCH_SIZE:
+                    await asyncio.to_thread(writer.write_batch, batch)
+                    batch = []
+            if batch:
+                await asyncio.to_thread(writer.write_batch, batch)
+            await asyncio.to_thread(writer.close)
+        except BaseException:
+            await asyncio.to_thread(writer.abort)
+            raise
+
+        self.db.add(TaskArchive(month=month, location=key, row_count=writer.count))
+        self.db.add_all([
+            TaskArchiveSegment(
+                month=month,
+                user_id=uuid.UUID(segment.user_id),
+                offset=segment.offset,
+                length=segment.length,
+                row_count=segment.row_count,
+                counts=[[task_type, task_status, count] for (task_type, task_status), count in segment.counts.items()],
+            )
+            for segment in writer.segments
+        ])
+        await self.db.execute(text(
+            f"INSERT INTO archived_tasks (id, user_id, month) "
+            f"SELECT id, user_id, '{month.isoformat()}' FROM {name}"
+        ))
+        await self.db.execute(text(f"ALTER TABLE tasks DETACH PARTITION {name}"))
+        await self.db.execute(text(f"DROP TABLE {name}"))
+        await self.db.commit()
+
+        logger.info(f"Archived partition {name}: {writer.count} tasks for {len(writer.segments)} users to {key}")
+        return writer.count
+
+    async def archive_expired(self, after_days: Optional[int] = None) -> List[date]:
+        """Archive every partition whose whole month is older than the cutoff"""
+        if after_days is None:
+            after_days = settings.task_archive_after_days
+        cutoff = (datetime.utcnow() - timedelta(days=after_days)).date()
+
+        archived = []
+        for month in await self.list_partitions():
+            if add_months(month, 1) <= cutoff:
+                await self.archive_partition(month)
+                archived.append(month)
+        return archived
+
+    async def read_archived_tasks(
+        self,
+        user_id: str,
+        limit: int,
+        before: Optional[Tuple[datetime, Any]] = None,
+        predicate: Optional[Callable[[Task], bool]] = None,
+    ) -> List[Task]:
+        """
+        Read a user's archived tasks, newest first
+
+        Only months holding the user's tasks are opened, newest first, and
+        only until enough tasks older than the (created_at, id) bound have
+        been found; each read decompresses just the user's frame.
+        """
+        tasks: List[Task] = []
+        for segment in await self._segments(user_id, before[0].date() if before else None):
+            tasks.extend(await self._read_segment(segment, before, predicate))
+            if len(tasks) >= limit:
+                break
+        return tasks[:limit]
+
+    async def iter_archived_tasks(
+        self,
+        user_id: str,
+        predicate: Optional[Callable[[Task], bool]] = None,
+    ) -> AsyncIterator[Task]:
+        """Yield all of a user's archived tasks, newest first, one month at a time"""
+        for segment in await self._segments(user_id):
+            for task in await self._read_segment(segment, None, predicate):
+                yield task
+
+    async def find_archived_task(self, task_id: str) -> Optional[Task]:
+        """An archived task by ID, read from its owner's frame of its month"""
+        result = await self.db.execute(
+            select(TaskArchiveSegment)
+            .join(
+                ArchivedTask,
+                (ArchivedTask.user_id == TaskArchiveSegment.user_id)
+                & (ArchivedTask.month == TaskArchiveSegment.month),
+            )
+            .where(ArchivedTask.id == task_id)
+        )
+        segment = result.scalar_one_or_none()
+        if segment is None:
+            return None
+        for task in await self._read_segment(segment, None, None):
+            if str(task.id) == str(task_id):
+                return task
+        return None
+
+    async def archived_counts(self, user_id: str) -> List[Tuple[TaskType, TaskStatus, int]]:
+        """A user's archived (task_type, status, count) totals, from the segment index"""
+        result = await self.db.execute(
+            select(TaskArchiveSegment.counts).where(TaskArchiveSegment.user_id == user_id)
+        )
+        rows = []
+        for (counts,) in result.all():
+            for task_type, task_status, count in counts:
+                rows.append((TaskType(task_type), TaskStatus(task_status), count))
+        return rows
+
+    async def _segments(self, user_id: str, until: Optional[date] = None) -> List[TaskArchiveSegment]:
+        """The user's archive segments, newest month first, up to the month of `until`"""
+        query = select(TaskArchiveSegment).where(TaskArchiveSegment.user_id == user_id)
+        if until is not None:
+            query = query.where(TaskArchiveSegment.month <= until)
+        result = await self.db.execute(query.order_by(TaskArchiveSegment.month.desc()))
+        return list(result.scalars().all())
+
+    async def _read_segment(
+        self,
+        segment: TaskArchiveSegment,
+        before: Optional[Tuple[datetime, Any]],
+        predicate: Optional[Callable[[Task], bool]],
+    ) -> List[Task]:
+        """A user's matching tasks from one archived month, newest first"""
+        records = await asyncio.to_thread(
+            self.store.read_segment, archive_key(segment.month), segment.offset, segment.length
+        )
+        matched = []
+        for record in records:
+            task = _task_from_record(record)
+            if before is not None and (task.created_at, task.id) >= before:
+                continue
+            if predicate is None or predicate(task):
+                matched.append(task)
+
+        # Frames are written newest first
+        return matched
@@ -1,8 +1,12 @@
 import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.task import Task, TaskStatus, TaskType
+from sqlalchemy import insert
+from app.models.task import Task, TaskStatus, TaskType, TASK_STATE_COLUMNS
 from app.schemas.audio import MusicGenerationRequest
 from app.core.ai_router import AIRouter, TaskType as RouterTaskType
+from app.core.task_cache import get_task_cache, task_state
+from app.core.task_stats import get_task_stats
+from app.core.replicas import get_replica_router
 from loguru import logger
 
 
@@ -51,14 +55,21 @@ class AudioService:
 
     async def _create_task(self, task_type: TaskType, input_data: dict) -> str:
         """Create a new task"""
-        task = Task(
-            id=str(uuid.uuid4()),
-            user_id="default_user",
-            task_type=task_type,
-            status=TaskStatus.PENDING,
-            input_data=input_data,
+        # RETURNING hands back the stored row, no refresh SELECT needed
+        result = await self.db.execute(
+            insert(Task)
+            .values(
+                id=str(uuid.uuid4()),
+                user_id="default_user",
+                task_type=task_type,
+                status=TaskStatus.PENDING,
+                input_data=input_data,
+            )
+            .returning(*TASK_STATE_COLUMNS)
         )
-        self.db.add(task)
+        task = result.one()
         await self.db.commit()
-        await self.db.refresh(task)
+        await get_task_cache().set(str(task.id), **task_state(task))
+        await get_task_stats().record_created(task.user_id, task_type)
+        await get_replica_router().record_write(task.user_id)
         return str(task.id)
@@ -0,0 +1,113 @@
+import asyncio
+import uuid
+from datetime import datetime
+from typing import List, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, update, func
+from app.models.task import Task, TaskStatus, TaskType, TERMINAL_STATUSES
+from app.schemas.task import BatchResponse, BatchProgressResponse
+from app.core.ai_router import TaskType as RouterTaskType
+from app.core.task_stats import get_task_stats
+from app.core.replicas import get_replica_router
+from loguru import logger
+
+
+class BatchService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create_batch(
+        self,
+        task_type: TaskType,
+        router_task_type: RouterTaskType,
+        items: List[Tuple[dict, dict]],
+    ) -> BatchResponse:
+        """
+        Create all tasks of a batch in one bulk INSERT and enqueue them in one pass
+
+        Args:
+            task_type: Task type stored on every row
+            router_task_type: AI Router task type the workers route with
+            items: (input_data, router params) per task
+        """
+        batch_id = str(uuid.uuid4())
+        now = datetime.utcnow()
+        rows = []
+        jobs = []
+        for input_data, params in items:
+            task_id = str(uuid.uuid4())
+            rows.append({
+                "id": task_id,
+                "user_id": "default_user",  # TODO: Get from auth
+                "task_type": task_type,
+                "status": TaskStatus.PENDING,
+                "input_data": input_data,
+                "batch_id": batch_id,
+                "celery_task_id": task_id,
+                "created_at": now,
+            })
+            jobs.append((task_id, router_task_type.value, params))
+
+        await self.db.execute(insert(Task), rows)
+        await self.db.commit()
+        await get_task_stats().record_created("default_user", task_type, count=len(rows))
+        await get_replica_router().record_write("default_user")
+
+        try:
+            from app.workers.generation_worker import enqueue_generation_jobs
+            # Broker publishing is blocking I/O, keep it off the event loop
+            await asyncio.to_thread(enqueue_generation_jobs, jobs)
+        except Exception as e:
+            logger.error(f"Failed to enqueue batch {batch_id}: {str(e)}")
+            result = await self.db.execute(
+                update(Task)
+                .where(Task.batch_id == batch_id, Task.status == TaskStatus.PENDING)
+                .values(
+                    status=TaskStatus.FAILED,
+                    error_message=f"Failed to enqueue: {str(e)}",
+                    completed_at=datetime.utcnow(),
+                )
+            )
+            await self.db.commit()
+            await get_task_stats().record_transition(
+                "default_user", TaskStatus.PENDING, TaskStatus.FAILED, count=result.rowcount
+            )
+            raise
+
+        logger.info(f"Batch {batch_id} queued with {len(rows)} {task_type.value} tasks")
+        return BatchResponse(
+            batch_id=batch_id,
+            task_ids=[row["id"] for row in rows],
+            total=len(rows),
+            status="pending",
+            message=f"{len(rows)} tasks queued",
+        )
+
+    async def get_batch_progress(self, batch_id: str) -> BatchProgressResponse:
+        """Aggregate progress of a batch in a single GROUP BY query"""
+        result = await self.db.execute(
+            select(Task.status, func.count(), func.coalesce(func.sum(Task.progress), 0))
+            .where(Task.batch_id == batch_id)
+            .group_by(Task.status)
+        )
+        rows = result.all()
+        if not rows:
+            raise ValueError("Batch not found")
+
+        by_status = {task_status.value: 0 for task_status in TaskStatus}
+        total = 0
+        progress_points = 0
+        for task_status, count, progress_sum in rows:
+            by_status[task_status.value] = count
+            total += count
+            # Finished tasks count as fully progressed whatever their last report
+            progress_points += count * 100 if task_status in TERMINAL_STATUSES else progress_sum
+
+        finished = sum(by_status[s.value] for s in TERMINAL_STATUSES)
+        return BatchProgressResponse(
+            batch_id=batch_id,
+            total=total,
+            by_status=by_status,
+            progress=int(progress_points / total),
+            finished=finished == total,
+        )
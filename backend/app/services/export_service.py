@@ -0,0 +1,118 @@
+import csv
+import enum
+import io
+import json
+import zlib
+from typing import AsyncIterator, Dict, List, Optional
+from app.models.task import TaskStatus, TaskType
+from app.services.history_service import HistoryService, HISTORY_FIELDS
+from loguru import logger
+
+# Bytes buffered before a chunk is sent to the client
+CHUNK_SIZE = 64 * 1024
+
+
+class ExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def export_filename(export_format: ExportFormat, compress: bool) -> str:
+    return f"history.{export_format.value}" + (".gz" if compress else "")
+
+
+def export_media_type(export_format: ExportFormat, compress: bool) -> str:
+    return "application/gzip" if compress else MEDIA_TYPES[export_format]
+
+
+class _CsvEncoder:
+    """Encodes rows as CSV lines; nested values are written as JSON"""
+
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _take(self) -> str:
+        text = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return text
+
+    def header(self) -> str:
+        self._writer.writerow(self.columns)
+        return self._take()
+
+    def encode(self, row: Dict) -> str:
+        values = []
+        for column in self.columns:
+            value = row.get(column)
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value, ensure_ascii=False)
+            values.append("" if value is None else value)
+        self._writer.writerow(values)
+        return self._take()
+
+
+async def export_history(
+    export_format: ExportFormat,
+    compress: bool = False,
+    user_id: str = "default_user",
+    task_type: Optional[TaskType] = None,
+    status: Optional[TaskStatus] = None,
+    fields: Optional[List[str]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Stream a user's history as NDJSON or CSV, optionally gzipped
+
+    Owns its database session so the connection is checked out only while
+    the response body is being produced, and released as soon as the
+    stream ends or the client disconnects.
+    """
+    from app.database import AsyncSessionLocal
+
+    compressor = zlib.compressobj(wbits=31) if compress else None  # 31: gzip container
+    csv_encoder = _CsvEncoder(fields or list(HISTORY_FIELDS)) if export_format == ExportFormat.CSV else None
+
+    pending: List[str] = []
+    pending_size = 0
+
+    def flush() -> bytes:
+        nonlocal pending_size
+        data = "".join(pending).encode()
+        pending.clear()
+        pending_size = 0
+        return compressor.compress(data) if compressor else data
+
+    if csv_encoder:
+        pending.append(csv_encoder.header())
+
+    exported = 0
+    async with AsyncSessionLocal() as db:
+        service = HistoryService(db)
+        async for row in service.iter_history(user_id, task_type, status, fields):
+            if csv_encoder:
+                line = csv_encoder.encode(row)
+            else:
+                line = json.dumps(row, default=str, ensure_ascii=False) + "\n"
+            pending.append(line)
+            pending_size += len(line)
+            exported += 1
+
+            if pending_size >= CHUNK_SIZE:
+                chunk = flush()
+                if chunk:
+                    yield chunk
+
+    chunk = flush()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+    logger.info(f"Exported {exported} history rows for {user_id} as {export_format.value}")
@@ -1,15 +1,75 @@
+import enum
+import re
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
-from app.models.task import Task, TaskStatus, TaskType
+from sqlalchemy import Select, select, update, delete, func, case, or_, literal_column, Text
+from sqlalchemy.orm import load_only
+from app.models.task import Task, TaskStatus, TaskType, TERMINAL_STATUSES, TASK_STATE_COLUMNS, SEARCH_CONFIG
+from app.core.task_cache import get_task_cache, task_state
+from app.core.progress_buffer import get_progress_buffer
+from app.core.task_stats import get_task_stats, aggregate_rows, build_statistics, RECENT_DAYS
+from app.core.pagination import TotalMode, paginate, split_page, count_total, decode_cursor
+from app.services.archive_service import ArchiveService
 from loguru import logger
-from typing import Optional, List, Dict
+from typing import AsyncIterator, Callable, Optional, List, Dict, Tuple
+
+# History row fields and the Task attribute each one is read from
+HISTORY_FIELDS = {
+    "id": "id",
+    "user_id": "user_id",
+    "task_type": "task_type",
+    "status": "status",
+    "progress": "progress",
+    "input_data": "input_data",
+    "output_data": "output_data",
+    "error_message": "error_message",
+    "provider_used": "provider",
+    "created_at": "created_at",
+    "started_at": "started_at",
+    "completed_at": "completed_at",
+}
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated fields= projection; None means every field"""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in HISTORY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return names or None
+
+
+def _projection(fields: Optional[List[str]] = None):
+    """
+    Loader option fetching only the projected columns (plus the keyset sort key)
+
+    Also undefers the payload columns a projection asks for, input_data included.
+    """
+    attrs = {HISTORY_FIELDS[name] for name in (fields or HISTORY_FIELDS)} | {"id", "created_at"}
+    return load_only(*[getattr(Task, attr) for attr in sorted(attrs)])
+
+
+def _input_key(key: str):
+    """input_data ->> 'key' with the key inlined, so it matches the expression indexes"""
+    return Task.input_data.op("->>", return_type=Text)(literal_column(f"'{key}'"))
+
+
+def _serialize(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
 
 
 class HistoryService:
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.cache = get_task_cache()
+        self.stats = get_task_stats()
 
     async def get_user_history(
         self,
@@ -17,9 +77,89 @@ class HistoryService:
         task_type: Optional[TaskType] = None,
         status: Optional[TaskStatus] = None,
         limit: int = 50,
-        offset: int = 0,
+        cursor: Optional[str] = None,
+        total_mode: Optional[TotalMode] = None,
+        model: Optional[str] = None,
+        provider: Optional[str] = None,
+        seed: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+        include_archived: bool = False,
     ) -> Dict:
-        """Get user's generation history with filters"""
+        """
+        Get user's generation history with filters
+
+        Pages are keyset-paginated on (created_at, id): pass the returned
+        next_cursor to fetch the following page. The total is only computed
+        when total_mode asks for it, and only covers the live tables. fields
+        limits both the columns loaded and the keys returned, so compact
+        listings skip the JSONB payloads.
+
+        With include_archived, pages continue into archived months once the
+        live partitions run out; otherwise cold storage is never touched.
+        """
+        query, matches = self._history_filters(user_id, task_type, status, model, provider, seed)
+
+        total = await count_total(self.db, query, total_mode)
+
+        page_query = paginate(query, Task, cursor, limit).options(_projection(fields))
+        result = await self.db.execute(page_query)
+        tasks, next_cursor = split_page(result.scalars().all(), limit)
+
+        if next_cursor is None and include_archived:
+            if tasks:
+                before = (tasks[-1].created_at, tasks[-1].id)
+            else:
+                before = decode_cursor(cursor) if cursor else None
+
+            archived = await ArchiveService(self.db).read_archived_tasks(
+                user_id, limit - len(tasks) + 1, before, matches
+            )
+            tasks, next_cursor = split_page(tasks + archived, limit)
+
+        return {
+            "tasks": [self._to_dict(task, fields) for task in tasks],
+            "total": total,
+            "page_size": limit,
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor,
+        }
+
+    async def iter_history(
+        self,
+        user_id: str = "default_user",
+        task_type: Optional[TaskType] = None,
+        status: Optional[TaskStatus] = None,
+        fields: Optional[List[str]] = None,
+        batch_size: int = 500,
+    ) -> AsyncIterator[Dict]:
+        """
+        Yield a user's whole history, newest first, live rows then archived months
+
+        Live rows come through a server-side cursor fetching batch_size rows
+        at a time, so memory stays flat however long the history is.
+        """
+        query, matches = self._history_filters(user_id, task_type, status)
+        result = await self.db.stream_scalars(
+            query.order_by(Task.created_at.desc(), Task.id.desc())
+            .options(_projection(fields))
+            .execution_options(yield_per=batch_size)
+        )
+        async for task in result:
+            yield self._to_dict(task, fields)
+
+        async for task in ArchiveService(self.db).iter_archived_tasks(user_id, matches):
+            yield self._to_dict(task, fields)
+
+    def _history_filters(
+        self,
+        user_id: str,
+        task_type: Optional[TaskType] = None,
+        status: Optional[TaskStatus] = None,
+        model: Optional[str] = None,
+        provider: Optional[str] = None,
+        seed: Optional[int] = None,
+    ) -> Tuple[Select, Callable[[Task], bool]]:
+        """Build the live-table query and the matching predicate for archived tasks"""
         query = select(Task).where(Task.user_id == user_id)
 
         if task_type:
@@ -28,148 +168,180 @@ class HistoryService:
         if status:
             query = query.where(Task.status == status)
 
-        # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await self.db.execute(count_query)
-        total = total_result.scalar()
+        if model:
+            query = query.where(_input_key("model") == model)
 
-        # Get paginated results
-        query = query.order_by(desc(Task.created_at)).offset(offset).limit(limit)
-        result = await self.db.execute(query)
-        tasks = result.scalars().all()
+        if provider:
+            query = query.where(Task.provider == provider)
 
-        return {
-            "tasks": [self._to_dict(task) for task in tasks],
-            "total": total,
-            "page": offset // limit + 1,
-            "page_size": limit,
-            "has_more": offset + limit < total,
-        }
+        if seed is not None:
+            query = query.where(_input_key("seed") == str(seed))
+
+        def matches(task: Task) -> bool:
+            input_data = task.input_data or {}
+            return (
+                (not task_type or task.task_type == task_type)
+                and (not status or task.status == status)
+                and (not model or input_data.get("model") == model)
+                and (not provider or task.provider == provider)
+                and (seed is None or str(input_data.get("seed")) == str(seed))
+            )
+
+        return query, matches
 
     async def get_task_by_id(self, task_id: str) -> Optional[Dict]:
         """Get task details by ID"""
         result = await self.db.execute(
-            select(Task).where(Task.id == task_id)
+            select(Task).where(Task.id == task_id).options(_projection())
         )
         task = result.scalar_one_or_none()
 
         if not task:
-            return None
+            task = await ArchiveService(self.db).find_archived_task(task_id)
+            if not task:
+                return None
 
         return self._to_dict(task)
 
+    async def get_task_status(self, task_id: str) -> Optional[Dict]:
+        """Get compact task status, served from the status cache when possible"""
+        state = await self.cache.get(task_id)
+        if state is not None:
+            return state
+
+        result = await self.db.execute(
+            select(Task).where(Task.id == task_id)
+        )
+        task = result.scalar_one_or_none()
+
+        if not task:
+            task = await ArchiveService(self.db).find_archived_task(task_id)
+            if not task:
+                return None
+
+        state = task_state(task)
+        # A replica may lag behind writers' cache updates; never cache what it saw
+        if not self.db.info.get("replica"):
+            await self.cache.set(task_id, **state)
+        return state
+
     async def update_task_status(
         self,
         task_id: str,
         status: TaskStatus,
         output_data: Optional[Dict] = None,
         error_message: Optional[str] = None,
+        provider: Optional[str] = None,
     ) -> bool:
-        """Update task status and output data"""
-        result = await self.db.execute(
-            select(Task).where(Task.id == task_id)
+        """
+        Update task status and output data
+
+        A single UPDATE ... RETURNING locks the row, applies the change and
+        hands back both the previous status (for the counters) and the new
+        state (for the status cache), instead of a SELECT then an UPDATE.
+        """
+        previous = (
+            select(Task.id, Task.status.label("old_status"))
+            .where(Task.id == task_id)
+            .with_for_update()
+            .subquery()
         )
-        task = result.scalar_one_or_none()
-
-        if not task:
-            logger.error(f"Task not found: {task_id}")
-            return False
-
-        task.status = status
-        task.updated_at = datetime.utcnow()
 
+        now = datetime.utcnow()
+        values = {"status": status}
         if output_data:
-            task.output_data = output_data
-
+            values["output_data"] = output_data
         if error_message:
-            task.error_message = error_message
+            values["error_message"] = error_message
+        if provider:
+            values["provider"] = provider
+        if status == TaskStatus.RUNNING:
+            values["started_at"] = func.coalesce(Task.started_at, now)
+        if status in TERMINAL_STATUSES:
+            values["completed_at"] = now
+            if status == TaskStatus.SUCCESS:
+                values["progress"] = 100
 
-        if status == TaskStatus.COMPLETED:
-            task.completed_at = datetime.utcnow()
+        result = await self.db.execute(
+            update(Task)
+            .where(Task.id == previous.c.id)
+            # Terminal states are final, e.g. a worker finishing after the task was cancelled
+            .where(or_(Task.status.not_in(TERMINAL_STATUSES), Task.status == status))
+            .values(**values)
+            .returning(previous.c.old_status, *TASK_STATE_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+        task = result.one_or_none()
+        if task is None:
+            await self.db.rollback()
+            logger.info(f"Ignoring {status.value} for task {task_id}: not found or already finished")
+            return False
 
         await self.db.commit()
+        if status in TERMINAL_STATUSES:
+            # Terminal states are written synchronously; buffered progress is stale
+            get_progress_buffer().discard(task_id)
+        await self.cache.set(task_id, **task_state(task))
+        await self.stats.record_transition(task.user_id, task.old_status, status)
         return True
 
     async def delete_task(self, task_id: str) -> bool:
-        """Delete a task from history"""
+        """Delete a task from history in one DELETE ... RETURNING"""
         result = await self.db.execute(
-            select(Task).where(Task.id == task_id)
+            delete(Task)
+            .where(Task.id == task_id)
+            .returning(Task.user_id, Task.task_type, Task.status, Task.created_at)
+            .execution_options(synchronize_session=False)
         )
-        task = result.scalar_one_or_none()
+        task = result.one_or_none()
 
         if not task:
+            await self.db.rollback()
             return False
 
-        await self.db.delete(task)
         await self.db.commit()
+        await self.cache.delete(task_id)
+        await self.stats.record_deleted(task.user_id, task.task_type, task.status, task.created_at)
         logger.info(f"Task deleted: {task_id}")
         return True
 
     async def get_statistics(self, user_id: str = "default_user") -> Dict:
-        """Get user generation statistics"""
-        # Total tasks
-        total_result = await self.db.execute(
-            select(func.count()).where(Task.user_id == user_id)
+        """
+        Get user generation statistics
+
+        Served from incrementally maintained counters; on a miss they are
+        rebuilt from a single GROUP BY over (task_type, status, recent day),
+        plus the per-user totals recorded when months were archived.
+        """
+        stats = await self.stats.get(user_id)
+        if stats is not None:
+            return stats
+
+        since = datetime.utcnow() - timedelta(days=RECENT_DAYS - 1)
+        since = since.replace(hour=0, minute=0, second=0, microsecond=0)
+        recent_day = case(
+            (Task.created_at >= since, func.date(Task.created_at)),
+            else_=None,
         )
-        total_tasks = total_result.scalar()
-
-        # Tasks by type
-        type_stats = {}
-        for task_type in TaskType:
-            result = await self.db.execute(
-                select(func.count()).where(
-                    Task.user_id == user_id,
-                    Task.task_type == task_type
-                )
-            )
-            type_stats[task_type.value] = result.scalar()
-
-        # Tasks by status
-        status_stats = {}
-        for task_status in TaskStatus:
-            result = await self.db.execute(
-                select(func.count()).where(
-                    Task.user_id == user_id,
-                    Task.status == task_status
-                )
-            )
-            status_stats[task_status.value] = result.scalar()
-
-        # Recent activity (last 7 days)
-        seven_days_ago = datetime.utcnow().timestamp() - 7 * 24 * 3600
-        recent_result = await self.db.execute(
-            select(func.count()).where(
-                Task.user_id == user_id,
-                Task.created_at >= datetime.fromtimestamp(seven_days_ago)
-            )
+        result = await self.db.execute(
+            select(Task.task_type, Task.status, recent_day, func.count())
+            .where(Task.user_id == user_id)
+            .group_by(Task.task_type, Task.status, recent_day)
         )
-        recent_tasks = recent_result.scalar()
+        rows = result.all()
+        # Archived months are far older than the recent-days window
+        archived = await ArchiveService(self.db).archived_counts(user_id)
+        rows.extend((task_type, task_status, None, count) for task_type, task_status, count in archived)
+        by_type, by_status, by_day = aggregate_rows(rows)
+        await self.stats.seed(user_id, by_type, by_status, by_day)
 
-        return {
-            "total_tasks": total_tasks,
-            "by_type": type_stats,
-            "by_status": status_stats,
-            "recent_7_days": recent_tasks,
-            "success_rate": (
-                (status_stats.get("completed", 0) / total_tasks * 100)
-                if total_tasks > 0 else 0
-            ),
-        }
+        return build_statistics(by_type, by_status, sum(by_day.values()))
 
-    def _to_dict(self, task: Task) -> Dict:
-        """Convert task model to dictionary"""
+    def _to_dict(self, task: Task, fields: Optional[List[str]] = None) -> Dict:
+        """Convert task model to dictionary, optionally projected to some fields"""
         return {
-            "id": task.id,
-            "user_id": task.user_id,
-            "task_type": task.task_type.value,
-            "status": task.status.value,
-            "input_data": task.input_data,
-            "output_data": task.output_data,
-            "error_message": task.error_message,
-            "provider_used": task.provider_used,
-            "created_at": task.created_at.isoformat() if task.created_at else None,
-            "updated_at": task.updated_at.isoformat() if task.updated_at else None,
-            "completed_at": task.completed_at.isoformat() if task.completed_at else None,
+            name: _serialize(getattr(task, HISTORY_FIELDS[name]))
+            for name in (fields or HISTORY_FIELDS)
         }
 
     async def search_tasks(
@@ -177,30 +349,45 @@ class HistoryService:
         user_id: str = "default_user",
         query: str = "",
         limit: int = 20,
-    ) -> List[Dict]:
-        """Search tasks by prompt or output content"""
-        # Simple search in input_data and output_data
-        tasks = []
-
-        result = await self.db.execute(
-            select(Task)
-            .where(Task.user_id == user_id)
-            .order_by(desc(Task.created_at))
-            .limit(limit * 2)  # Get more to filter
+        offset: int = 0,
+        fields: Optional[List[str]] = None,
+    ) -> Dict:
+        """
+        Search tasks by prompt text, best matches first
+
+        Whole words match through the generated tsvector (GIN index); partial
+        words and CJK text, which the 'simple' parser doesn't split, match
+        through the trigram index. Rank is the better of the two scores.
+        """
+        ts_query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), query)
+        pattern = "%" + re.sub(r"([%_!])", r"!\1", query) + "%"
+        rank = func.greatest(
+            func.ts_rank_cd(Task.search_vector, ts_query),
+            func.word_similarity(query, Task.search_text),
+        ).label("rank")
+
+        search_query = (
+            select(Task, rank)
+            .where(
+                Task.user_id == user_id,
+                or_(
+                    Task.search_vector.op("@@")(ts_query),
+                    Task.search_text.ilike(pattern, escape="!"),
+                ),
+            )
+            .order_by(rank.desc(), Task.created_at.desc(), Task.id.desc())
+            .offset(offset)
+            .limit(limit + 1)
+            .options(_projection(fields))
         )
+        result = await self.db.execute(search_query)
+        rows = result.all()
 
-        for task in result.scalars().all():
-            # Search in input_data (prompt)
-            if task.input_data and query.lower() in str(task.input_data).lower():
-                tasks.append(self._to_dict(task))
-                continue
-
-            # Search in output_data
-            if task.output_data and query.lower() in str(task.output_data).lower():
-                tasks.append(self._to_dict(task))
-                continue
-
-            if len(tasks) >= limit:
-                break
-
-        return tasks
+        return {
+            "results": [
+                {**self._to_dict(task, fields), "rank": round(score, 4)}
+                for task, score in rows[:limit]
+            ],
+            "has_more": len(rows) > limit,
+            "next_offset": offset + limit if len(rows) > limit else None,
+        }
@@ -1,6 +1,8 @@
 import uuid
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.task import Task, TaskStatus, TaskType
+from sqlalchemy import insert
+from app.models.task import Task, TaskStatus, TaskType, TASK_STATE_COLUMNS
 from app.schemas.image import (
     TextToImageRequest,
     ImageToImageRequest,
@@ -8,6 +10,10 @@ from app.schemas.image import (
     ControlNetRequest,
 )
 from app.core.ai_router import AIRouter, TaskType as RouterTaskType
+from app.core.task_cache import get_task_cache, task_state
+from app.core.task_stats import get_task_stats
+from app.core.replicas import get_replica_router
+from app.services.history_service import HistoryService
 from loguru import logger
 
 
@@ -27,54 +33,83 @@ class ImageService:
         self,
         task_type: TaskType,
         input_data: dict,
+        task_id: Optional[str] = None,
     ) -> str:
         """Create a new task"""
-        task = Task(
-            id=str(uuid.uuid4()),
-            user_id="default_user",  # TODO: Get from auth
-            task_type=task_type,
-            status=TaskStatus.PENDING,
-            input_data=input_data,
+        # RETURNING hands back the stored row, no refresh SELECT needed
+        result = await self.db.execute(
+            insert(Task)
+            .values(
+                id=task_id or str(uuid.uuid4()),
+                user_id="default_user",  # TODO: Get from auth
+                task_type=task_type,
+                status=TaskStatus.PENDING,
+                input_data=input_data,
+            )
+            .returning(*TASK_STATE_COLUMNS)
         )
-        self.db.add(task)
+        task = result.one()
         await self.db.commit()
-        await self.db.refresh(task)
+        await get_task_cache().set(str(task.id), **task_state(task))
+        await get_task_stats().record_created(task.user_id, task_type)
+        await get_replica_router().record_write(task.user_id)
         return str(task.id)
 
-    async def text_to_image(self, request: TextToImageRequest) -> str:
-        """Generate image from text using AI Router"""
+    @staticmethod
+    def text_to_image_params(request: TextToImageRequest) -> dict:
+        """Build router parameters for a text-to-image request"""
+        params = {
+            "prompt": request.prompt,
+            "negative_prompt": request.negative_prompt,
+            "width": request.width,
+            "height": request.height,
+            "steps": request.steps,
+            "cfg_scale": request.cfg_scale,
+            "num_images": request.num_images,
+        }
+
+        if request.seed:
+            params["seed"] = request.seed
+
+        return params
+
+    async def text_to_image(self, request: TextToImageRequest, task_id: Optional[str] = None) -> str:
+        """
+        Generate image from text using AI Router
+
+        The PENDING row is committed before routing, so a pre-allocated
+        task_id (Idempotency-Key retries) can be polled while the
+        generation runs; the outcome is then recorded on that row.
+        """
         try:
             router = await self._get_router()
 
-            # Prepare parameters for router
-            params = {
-                "prompt": request.prompt,
-                "negative_prompt": request.negative_prompt,
-                "width": request.width,
-                "height": request.height,
-                "steps": request.steps,
-                "cfg_scale": request.cfg_scale,
-                "num_images": request.num_images,
-            }
+            params = self.text_to_image_params(request)
 
-            if request.seed:
-                params["seed"] = request.seed
-
-            # Route to best provider
-            result = await router.route(
-                task_type=RouterTaskType.IMAGE_GENERATION,
-                params=params,
-                fallback_enabled=True,
-            )
-
-            # Create task record
             task_id = await self._create_task(
                 TaskType.IMAGE_GENERATION,
-                {"type": "text_to_image", **request.model_dump()}
+                {"type": "text_to_image", **request.model_dump()},
+                task_id=task_id,
+            )
+            history_service = HistoryService(self.db)
+
+            try:
+                result = await router.route(
+                    task_type=RouterTaskType.IMAGE_GENERATION,
+                    params=params,
+                    fallback_enabled=True,
+                )
+            except Exception as e:
+                await history_service.update_task_status(task_id, TaskStatus.FAILED, error_message=str(e))
+                raise
+
+            await history_service.update_task_status(
+                task_id,
+                TaskStatus.SUCCESS,
+                output_data=result,
+                provider=result.get("routing", {}).get("provider"),
             )
 
-            # Update task with result (in production, this would be done by Celery)
-            # For now, we're doing synchronous for demonstration
             logger.info(f"Image generation completed: {task_id}")
             logger.info(f"Provider used: {result.get('routing', {}).get('provider')}")
             logger.info(f"Images generated: {len(result.get('images', []))}")
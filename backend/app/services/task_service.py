@@ -1,32 +1,51 @@
+import asyncio
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, and_
-from app.models.task import Task, TaskStatus, TaskType
+from sqlalchemy import select, update, or_, and_
+from app.models.task import Task, TaskStatus, TaskType, TERMINAL_STATUSES, TASK_STATE_COLUMNS
 from app.schemas.task import TaskResponse, TaskListResponse
+from app.core.task_cache import get_task_cache, task_state
+from app.core.progress_buffer import get_progress_buffer
+from app.core.cancellation import get_cancellation_registry
+from app.core.task_stats import get_task_stats
+from app.core.replicas import get_replica_router
+from app.core.exceptions import TaskNotCancellableException
+from app.core.pagination import TotalMode, paginate, split_page, count_total
+from app.services.archive_service import ArchiveService
 
 
 class TaskService:
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.cache = get_task_cache()
 
     async def get_task(self, task_id: str) -> TaskResponse:
-        """Get task by ID"""
-        result = await self.db.execute(
-            select(Task).where(Task.id == task_id)
-        )
-        task = result.scalar_one_or_none()
-        if not task:
-            raise ValueError("Task not found")
-        return self._to_response(task)
+        """Get task by ID, served from the status cache when possible"""
+        state = await self.cache.get(task_id)
+        if state is None:
+            result = await self.db.execute(
+                select(Task).where(Task.id == task_id)
+            )
+            task = result.scalar_one_or_none()
+            if not task:
+                task = await ArchiveService(self.db).find_archived_task(task_id)
+                if not task:
+                    raise ValueError("Task not found")
+            state = task_state(task)
+            # A replica may lag behind writers' cache updates; never cache what it saw
+            if not self.db.info.get("replica"):
+                await self.cache.set(task_id, **state)
+        return self._to_response(state)
 
     async def list_tasks(
         self,
-        skip: int = 0,
         limit: int = 20,
+        cursor: str = None,
         task_type: str = None,
         status: str = None,
+        total_mode: TotalMode = None,
     ) -> TaskListResponse:
-        """List tasks with optional filtering"""
+        """List tasks with optional filtering, keyset-paginated on (created_at, id)"""
         query = select(Task).where(Task.user_id == "default_user")
 
         if task_type:
@@ -34,51 +53,92 @@ class TaskService:
         if status:
             query = query.where(Task.status == TaskStatus(status))
 
-        query = query.order_by(Task.created_at.desc()).offset(skip).limit(limit)
+        total = await count_total(self.db, query, total_mode)
 
-        result = await self.db.execute(query)
-        tasks = result.scalars().all()
+        result = await self.db.execute(paginate(query, Task, cursor, limit))
+        tasks, next_cursor = split_page(result.scalars().all(), limit)
 
         return TaskListResponse(
-            tasks=[self._to_response(task) for task in tasks],
-            total=len(tasks),
-            page=skip // limit + 1,
+            tasks=[self._to_response(task_state(task)) for task in tasks],
+            total=total,
             page_size=limit,
+            has_more=next_cursor is not None,
+            next_cursor=next_cursor,
         )
 
     async def cancel_task(self, task_id: str) -> None:
-        """Cancel a running task"""
+        """
+        Cancel a queued or running task
+
+        Flags the task for running workers, which cancel the router coroutine
+        and its provider poll loop (and the remote job where supported), and
+        revokes the Celery message so queued work never starts.
+
+        A single guarded UPDATE ... RETURNING only moves a task that is not
+        already final, so a worker committing a result at the same moment is
+        never overwritten.
+        """
+        previous = (
+            select(Task.id, Task.status.label("old_status"))
+            .where(Task.id == task_id)
+            .with_for_update()
+            .subquery()
+        )
         result = await self.db.execute(
-            select(Task).where(Task.id == task_id)
+            update(Task)
+            .where(Task.id == previous.c.id)
+            .where(Task.status.not_in(TERMINAL_STATUSES))
+            .values(status=TaskStatus.CANCELLED, completed_at=datetime.utcnow())
+            .returning(previous.c.old_status, Task.celery_task_id, *TASK_STATE_COLUMNS)
+            .execution_options(synchronize_session=False)
         )
-        task = result.scalar_one_or_none()
-        if not task:
-            raise ValueError("Task not found")
+        task = result.one_or_none()
+        if task is None:
+            await self.db.rollback()
+            result = await self.db.execute(
+                select(Task.status).where(Task.id == task_id)
+            )
+            current_status = result.scalar_one_or_none()
+            if current_status is None:
+                raise ValueError("Task not found")
+            raise TaskNotCancellableException(task_id, current_status.value)
 
-        task.status = TaskStatus.CANCELLED
-        task.completed_at = datetime.utcnow()
         await self.db.commit()
-        # TODO: Cancel Celery task if running
+        get_progress_buffer().discard(task_id)
+        await self.cache.set(task_id, **task_state(task))
+        await get_task_stats().record_transition(task.user_id, task.old_status, TaskStatus.CANCELLED)
+        await get_replica_router().record_write(task.user_id)
+
+        await get_cancellation_registry().request_cancel(task_id)
+        if task.celery_task_id:
+            from app.workers.celery_app import celery_app
+            # Broadcasting the revoke is blocking I/O, keep it off the event loop
+            await asyncio.to_thread(celery_app.control.revoke, task.celery_task_id)
 
-    def _to_response(self, task: Task) -> TaskResponse:
-        """Convert task model to response"""
+    def _to_response(self, state: dict) -> TaskResponse:
+        """Convert compact task status to response"""
         estimated_time = None
-        if task.status == TaskStatus.RUNNING:
+        progress = state["progress"] or 0
+        if state["status"] == TaskStatus.RUNNING.value:
             # Simple estimation logic
-            elapsed = (datetime.utcnow() - task.started_at).total_seconds() if task.started_at else 0
-            if task.progress > 0:
-                estimated_time = int((elapsed / task.progress) * (100 - task.progress))
+            started_at = state.get("started_at")
+            elapsed = (
+                (datetime.utcnow() - datetime.fromisoformat(started_at).replace(tzinfo=None)).total_seconds()
+                if started_at else 0
+            )
+            if progress > 0:
+                estimated_time = int((elapsed / progress) * (100 - progress))
 
         return TaskResponse(
-            task_id=str(task.id),
-            task_type=task.task_type.value,
-            status=task.status.value,
-            progress=task.progress,
-            message=task.progress_message,
-            output_data=task.output_data,
-            error_message=task.error_message,
-            created_at=task.created_at,
-            started_at=task.started_at,
-            completed_at=task.completed_at,
+            task_id=state["task_id"],
+            task_type=state["task_type"],
+            status=state["status"],
+            progress=progress,
+            message=state.get("message"),
+            output_data=state.get("output_data"),
+            error_message=state.get("error_message"),
+            created_at=state["created_at"],
+            started_at=state.get("started_at"),
+            completed_at=state.get("completed_at"),
             estimated_time_remaining=estimated_time,
         )
@@ -1,6 +1,8 @@
 import uuid
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.task import Task, TaskStatus, TaskType
+from sqlalchemy import insert
+from app.models.task import Task, TaskStatus, TaskType, TASK_STATE_COLUMNS
 from app.schemas.video import (
     TextToVideoRequest,
     ImageToVideoRequest,
@@ -8,6 +10,10 @@ from app.schemas.video import (
     VideoUpscalingRequest,
 )
 from app.core.ai_router import AIRouter, TaskType as RouterTaskType
+from app.core.task_cache import get_task_cache, task_state
+from app.core.task_stats import get_task_stats
+from app.core.replicas import get_replica_router
+from app.services.history_service import HistoryService
 from loguru import logger
 
 
@@ -23,47 +29,85 @@ class VideoService:
             self.router = await get_router()
         return self.router
 
-    async def _create_task(self, task_type: TaskType, input_data: dict) -> str:
+    async def _create_task(
+        self,
+        task_type: TaskType,
+        input_data: dict,
+        task_id: Optional[str] = None,
+    ) -> str:
         """Create a new task"""
-        task = Task(
-            id=str(uuid.uuid4()),
-            user_id="default_user",
-            task_type=task_type,
-            status=TaskStatus.PENDING,
-            input_data=input_data,
+        # RETURNING hands back the stored row, no refresh SELECT needed
+        result = await self.db.execute(
+            insert(Task)
+            .values(
+                id=task_id or str(uuid.uuid4()),
+                user_id="default_user",
+                task_type=task_type,
+                status=TaskStatus.PENDING,
+                input_data=input_data,
+            )
+            .returning(*TASK_STATE_COLUMNS)
         )
-        self.db.add(task)
+        task = result.one()
         await self.db.commit()
-        await self.db.refresh(task)
+        await get_task_cache().set(str(task.id), **task_state(task))
+        await get_task_stats().record_created(task.user_id, task_type)
+        await get_replica_router().record_write(task.user_id)
         return str(task.id)
 
-    async def text_to_video(self, request: TextToVideoRequest) -> str:
-        """Generate video from text using AI Router"""
+    @staticmethod
+    def text_to_video_params(request: TextToVideoRequest) -> dict:
+        """Build router parameters for a text-to-video request"""
+        params = {
+            "prompt": request.prompt,
+            "negative_prompt": request.negative_prompt,
+            "duration": request.duration,
+            "fps": request.fps,
+            "width": request.width,
+            "height": request.height,
+            "model": request.model.value,
+        }
+
+        if request.seed:
+            params["seed"] = request.seed
+
+        return params
+
+    async def text_to_video(self, request: TextToVideoRequest, task_id: Optional[str] = None) -> str:
+        """
+        Generate video from text using AI Router
+
+        The PENDING row is committed before routing, so a pre-allocated
+        task_id (Idempotency-Key retries) can be polled while the
+        generation runs; the outcome is then recorded on that row.
+        """
         try:
             router = await self._get_router()
 
-            params = {
-                "prompt": request.prompt,
-                "negative_prompt": request.negative_prompt,
-                "duration": request.duration,
-                "fps": request.fps,
-                "width": request.width,
-                "height": request.height,
-                "model": request.model.value,
-            }
-
-            if request.seed:
-                params["seed"] = request.seed
-
-            result = await router.route(
-                task_type=RouterTaskType.VIDEO_GENERATION,
-                params=params,
-                fallback_enabled=True,
-            )
+            params = self.text_to_video_params(request)
 
             task_id = await self._create_task(
                 TaskType.VIDEO_GENERATION,
-                {"type": "text_to_video", **request.model_dump()}
+                {"type": "text_to_video", **request.model_dump()},
+                task_id=task_id,
+            )
+            history_service = HistoryService(self.db)
+
+            try:
+                result = await router.route(
+                    task_type=RouterTaskType.VIDEO_GENERATION,
+                    params=params,
+                    fallback_enabled=True,
+                )
+            except Exception as e:
+                await history_service.update_task_status(task_id, TaskStatus.FAILED, error_message=str(e))
+                raise
+
+            await history_service.update_task_status(
+                task_id,
+                TaskStatus.SUCCESS,
+                output_data=result,
+                provider=result.get("routing", {}).get("provider"),
             )
 
             logger.info(f"Video generation completed: {task_id}")
@@ -1,8 +1,12 @@
 import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.task import Task, TaskStatus, TaskType
+from sqlalchemy import insert
+from app.models.task import Task, TaskStatus, TaskType, TASK_STATE_COLUMNS
 from app.schemas.voice import TTSRequest, VoiceCloneRequest
 from app.core.ai_router import AIRouter, TaskType as RouterTaskType
+from app.core.task_cache import get_task_cache, task_state
+from app.core.task_stats import get_task_stats
+from app.core.replicas import get_replica_router
 from loguru import logger
 
 
@@ -18,19 +22,24 @@ class VoiceService:
             self.router = await get_router()
         return self.router
 
+    @staticmethod
+    def text_to_speech_params(request: TTSRequest) -> dict:
+        """Build router parameters for a TTS request"""
+        return {
+            "text": request.text,
+            "voice": request.voice,
+            "model": request.model.value,
+            "speed": request.speed,
+            "pitch": request.pitch,
+            "output_format": request.output_format,
+        }
+
     async def text_to_speech(self, request: TTSRequest) -> str:
         """Convert text to speech using AI Router"""
         try:
             router = await self._get_router()
 
-            params = {
-                "text": request.text,
-                "voice": request.voice,
-                "model": request.model.value,
-                "speed": request.speed,
-                "pitch": request.pitch,
-                "output_format": request.output_format,
-            }
+            params = self.text_to_speech_params(request)
 
             result = await router.route(
                 task_type=RouterTaskType.TTS,
@@ -78,14 +87,21 @@ class VoiceService:
 
     async def _create_task(self, task_type: TaskType, input_data: dict) -> str:
         """Create a new task"""
-        task = Task(
-            id=str(uuid.uuid4()),
-            user_id="default_user",
-            task_type=task_type,
-            status=TaskStatus.PENDING,
-            input_data=input_data,
+        # RETURNING hands back the stored row, no refresh SELECT needed
+        result = await self.db.execute(
+            insert(Task)
+            .values(
+                id=str(uuid.uuid4()),
+                user_id="default_user",
+                task_type=task_type,
+                status=TaskStatus.PENDING,
+                input_data=input_data,
+            )
+            .returning(*TASK_STATE_COLUMNS)
         )
-        self.db.add(task)
+        task = result.one()
         await self.db.commit()
-        await self.db.refresh(task)
+        await get_task_cache().set(str(task.id), **task_state(task))
+        await get_task_stats().record_created(task.user_id, task_type)
+        await get_replica_router().record_write(task.user_id)
         return str(task.id)
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from app.models.workflow import Workflow, WorkflowStatus, WorkflowStep
 from app.schemas.workflow import (
     CreateWorkflowRequest,
@@ -9,6 +9,8 @@ from app.schemas.workflow import (
     WorkflowStepResponse,
     WorkflowCompleteResponse,
 )
+from app.core.pagination import TotalMode, paginate, split_page, count_total
+from app.core.replicas import get_replica_router
 
 
 class WorkflowService:
@@ -17,17 +19,29 @@ class WorkflowService:
 
     async def create_workflow(self, request: CreateWorkflowRequest) -> WorkflowResponse:
         """Create a new workflow"""
-        workflow = Workflow(
-            id=str(uuid.uuid4()),
-            user_id="default_user",
-            name=request.name,
-            description=request.description,
-            status=WorkflowStatus.DRAFT,
-            current_step=WorkflowStep.STORY,
+        # RETURNING hands back what the response needs, no refresh SELECT
+        result = await self.db.execute(
+            insert(Workflow)
+            .values(
+                id=str(uuid.uuid4()),
+                user_id="default_user",
+                name=request.name,
+                description=request.description,
+                status=WorkflowStatus.DRAFT,
+                current_step=WorkflowStep.STORY,
+            )
+            .returning(
+                Workflow.id,
+                Workflow.user_id,
+                Workflow.name,
+                Workflow.status,
+                Workflow.current_step,
+                Workflow.created_at,
+            )
         )
-        self.db.add(workflow)
+        workflow = result.one()
         await self.db.commit()
-        await self.db.refresh(workflow)
+        await get_replica_router().record_write(workflow.user_id)
         return self._to_response(workflow)
 
     async def get_workflow(self, workflow_id: str) -> WorkflowResponse:
@@ -40,20 +54,24 @@ class WorkflowService:
             raise ValueError("Workflow not found")
         return self._to_response(workflow)
 
-    async def list_workflows(self, skip: int = 0, limit: int = 20) -> dict:
-        """List workflows for user"""
-        result = await self.db.execute(
-            select(Workflow)
-            .where(Workflow.user_id == "default_user")
-            .offset(skip)
-            .limit(limit)
-        )
-        workflows = result.scalars().all()
+    async def list_workflows(
+        self,
+        limit: int = 20,
+        cursor: str = None,
+        total_mode: TotalMode = None,
+    ) -> dict:
+        """List workflows for user, keyset-paginated on (created_at, id)"""
+        query = select(Workflow).where(Workflow.user_id == "default_user")
+        total = await count_total(self.db, query, total_mode)
+
+        result = await self.db.execute(paginate(query, Workflow, cursor, limit))
+        workflows, next_cursor = split_page(result.scalars().all(), limit)
         return {
             "workflows": [self._to_response(w) for w in workflows],
-            "total": len(workflows),
-            "page": skip // limit + 1,
+            "total": total,
             "page_size": limit,
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor,
         }
 
     async def execute_story_step(self, workflow_id: str, idea: str) -> WorkflowStepResponse:
@@ -71,7 +89,7 @@ class WorkflowService:
         }
         workflow.current_step = WorkflowStep.SCRIPT
         workflow.updated_at = datetime.utcnow()
-        await self.db.commit()
+        await self._commit(workflow)
         return WorkflowStepResponse(
             workflow_id=workflow_id,
             step="story",
@@ -97,7 +115,7 @@ class WorkflowService:
         }
         workflow.current_step = WorkflowStep.CONFIG
         workflow.updated_at = datetime.utcnow()
-        await self.db.commit()
+        await self._commit(workflow)
         return WorkflowStepResponse(
             workflow_id=workflow_id,
             step="script",
@@ -116,7 +134,7 @@ class WorkflowService:
         }
         workflow.current_step = WorkflowStep.CHARACTER
         workflow.updated_at = datetime.utcnow()
-        await self.db.commit()
+        await self._commit(workflow)
         return WorkflowStepResponse(
             workflow_id=workflow_id,
             step="config",
@@ -140,7 +158,7 @@ class WorkflowService:
         }
         workflow.current_step = WorkflowStep.SHOTS
         workflow.updated_at = datetime.utcnow()
-        await self.db.commit()
+        await self._commit(workflow)
         return WorkflowStepResponse(
             workflow_id=workflow_id,
             step="character",
@@ -165,7 +183,7 @@ class WorkflowService:
         }
         workflow.current_step = WorkflowStep.EDIT
         workflow.updated_at = datetime.utcnow()
-        await self.db.commit()
+        await self._commit(workflow)
         return WorkflowStepResponse(
             workflow_id=workflow_id,
             step="shots",
@@ -190,7 +208,7 @@ class WorkflowService:
         workflow.status = WorkflowStatus.COMPLETED
         workflow.completed_at = datetime.utcnow()
         workflow.updated_at = datetime.utcnow()
-        await self.db.commit()
+        await self._commit(workflow)
         return WorkflowCompleteResponse(
             workflow_id=workflow_id,
             status="completed",
@@ -209,6 +227,11 @@ class WorkflowService:
             raise ValueError("Workflow not found")
         return workflow
 
+    async def _commit(self, workflow: Workflow) -> None:
+        """Commit a workflow change and keep its owner's reads on the primary"""
+        await self.db.commit()
+        await get_replica_router().record_write(workflow.user_id)
+
     def _to_response(self, workflow: Workflow) -> WorkflowResponse:
         """Convert workflow model to response"""
         return WorkflowResponse(
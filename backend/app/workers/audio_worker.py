@@ -1,6 +1,6 @@
 from app.workers.celery_app import celery_app
+from app.workers.generation_worker import _get_loop, run_simulated_generation
 from loguru import logger
-import time
 
 
 @celery_app.task(bind=True, name="app.workers.audio_worker.generate_music")
@@ -9,22 +9,18 @@ def generate_music_task(self, task_data: dict):
     Celery task for music generation
     """
     logger.info(f"Starting music generation task: {task_data}")
-    task_id = self.request.id
+    status_id = task_data.get("task_id", self.request.id)
 
-    # Simulate music generation
-    for i in range(0, 101, 10):
-        time.sleep(1)
-        self.update_state(
-            state="PROGRESS",
-            meta={
-                "progress": i,
-                "message": f"Generating music... {i}%",
-            }
-        )
+    def on_progress(progress: int, message: str) -> None:
+        self.update_state(state="PROGRESS", meta={"progress": progress, "message": message})
 
-    logger.info(f"Completed music generation task: {task_id}")
-    return {
-        "task_id": task_id,
-        "status": "success",
-        "audio_url": "https://example.com/generated_music.mp3",
-    }
+    # Simulate music generation
+    result = _get_loop().run_until_complete(run_simulated_generation(
+        status_id,
+        "music",
+        {"audio_url": "https://example.com/generated_music.mp3"},
+        step_seconds=1,
+        on_progress=on_progress,
+    ))
+    logger.info(f"Finished music generation task: {status_id} ({result['status']})")
+    return result
@@ -1,5 +1,22 @@
+import os
+import sys
 from celery import Celery
-from app.config import get_settings
+from celery.schedules import crontab
+
+
+def _is_celery_process() -> bool:
+    """Whether this process was started by the celery command (worker, beat, ...)"""
+    entrypoint = sys.argv[0] if sys.argv else ""
+    return os.path.basename(entrypoint) == "celery" or entrypoint.endswith(os.path.join("celery", "__main__.py"))
+
+
+# Celery processes size their connection pools as workers. This must run
+# before settings are first loaded; an explicit PROCESS_ROLE still wins, and
+# a .env file shared with the API can't override it
+if _is_celery_process():
+    os.environ.setdefault("PROCESS_ROLE", "worker")
+
+from app.config import get_settings  # noqa: E402
 
 settings = get_settings()
 
@@ -11,6 +28,8 @@ celery_app = Celery(
         "app.workers.video_worker",
         "app.workers.audio_worker",
         "app.workers.workflow_worker",
+        "app.workers.generation_worker",
+        "app.workers.maintenance_worker",
     ]
 )
 
@@ -24,4 +43,10 @@ celery_app.conf.update(
     task_time_limit=30 * 60,  # 30 minutes
     task_soft_time_limit=25 * 60,  # 25 minutes
     worker_prefetch_multiplier=1,
+    beat_schedule={
+        "maintain-task-partitions": {
+            "task": "app.workers.maintenance_worker.maintain_task_partitions",
+            "schedule": crontab(hour=3, minute=0),
+        },
+    },
 )
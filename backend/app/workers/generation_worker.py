@@ -0,0 +1,183 @@
+from app.workers.celery_app import celery_app
+from loguru import logger
+from typing import Callable, List, Optional, Tuple
+import asyncio
+
+# One event loop per worker process so the router's provider clients and the
+# database engine are reused across tasks instead of rebuilt per job
+_loop = None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+    return _loop
+
+
+async def _run_generation(task_id: str, task_type: str, params: dict, traceparent: Optional[str] = None) -> dict:
+    """Run one generation job in a span continuing the enqueuing request's trace"""
+    from app.core.tracing import KIND_CONSUMER, get_span_exporter, parse_traceparent, span
+
+    try:
+        with span(
+            "generation_job",
+            parse_traceparent(traceparent),
+            KIND_CONSUMER,
+            task_id=task_id,
+            task_type=task_type,
+        ):
+            return await _execute_generation(task_id, task_type, params)
+    finally:
+        # The loop only runs while a task does, so export now rather than on a timer
+        await get_span_exporter().flush()
+
+
+async def _execute_generation(task_id: str, task_type: str, params: dict) -> dict:
+    """Route one generation job and record the outcome on its Task row"""
+    from app.database import AsyncSessionLocal
+    from app.models.task import TaskStatus
+    from app.services.history_service import HistoryService
+    from app.core.ai_router import get_router, TaskType as RouterTaskType
+    from app.core.cancellation import get_cancellation_registry
+    from app.core.progress_buffer import get_progress_buffer, current_task_id
+
+    cancellation = get_cancellation_registry()
+    if await cancellation.is_cancelled(task_id):
+        logger.info(f"Skipping cancelled generation task: {task_id}")
+        return {"task_id": task_id, "status": "cancelled"}
+
+    async with AsyncSessionLocal() as db:
+        history_service = HistoryService(db)
+        if not await history_service.update_task_status(task_id, TaskStatus.RUNNING):
+            # Missing, or cancelled between the flag check and here
+            return {"task_id": task_id, "status": "skipped"}
+
+        progress_buffer = get_progress_buffer()
+        progress_buffer.start()
+
+        router = await get_router()
+        # The route task copies this context, so provider poll loops report
+        # progress against this Task row
+        current_task_id.set(task_id)
+        route = asyncio.ensure_future(router.route(
+            task_type=RouterTaskType(task_type),
+            params=params,
+            fallback_enabled=True,
+        ))
+        # Cancelling the route coroutine unwinds the provider poll loop,
+        # which cancels the remote job and frees this worker slot
+        watcher = asyncio.ensure_future(cancellation.watch(task_id, route))
+
+        try:
+            result = await route
+        except asyncio.CancelledError:
+            if not route.cancelled():
+                raise
+            logger.info(f"Generation task {task_id} cancelled")
+            return {"task_id": task_id, "status": "cancelled"}
+        except Exception as e:
+            logger.error(f"Generation task {task_id} failed: {str(e)}")
+            await history_service.update_task_status(
+                task_id,
+                TaskStatus.FAILED,
+                error_message=str(e),
+            )
+            return {"task_id": task_id, "status": "failed", "error": str(e)}
+        finally:
+            watcher.cancel()
+            await progress_buffer.flush()
+
+        await history_service.update_task_status(
+            task_id,
+            TaskStatus.SUCCESS,
+            output_data=result,
+            provider=result.get("routing", {}).get("provider"),
+        )
+        return {"task_id": task_id, "status": "success"}
+
+
+async def run_simulated_generation(
+    task_id: str,
+    label: str,
+    output_data: dict,
+    step_seconds: float,
+    on_progress: Optional[Callable[[int, str], None]] = None,
+) -> dict:
+    """
+    Run a placeholder job with the same bookkeeping as a routed one
+
+    Used by the audio and video workers until they call real providers.
+    Every status change is written to the Task row first, through the
+    guarded HistoryService update, which then writes it through to the
+    status cache; progress goes through the write-behind buffer.
+    """
+    from app.database import AsyncSessionLocal
+    from app.models.task import TaskStatus
+    from app.services.history_service import HistoryService
+    from app.core.cancellation import get_cancellation_registry
+    from app.core.progress_buffer import get_progress_buffer
+
+    cancellation = get_cancellation_registry()
+    if await cancellation.is_cancelled(task_id):
+        logger.info(f"Skipping cancelled {label} task: {task_id}")
+        return {"task_id": task_id, "status": "cancelled"}
+
+    async with AsyncSessionLocal() as db:
+        history_service = HistoryService(db)
+        if not await history_service.update_task_status(task_id, TaskStatus.RUNNING):
+            # Missing, or cancelled between the flag check and here
+            return {"task_id": task_id, "status": "skipped"}
+
+        progress_buffer = get_progress_buffer()
+        progress_buffer.start()
+        try:
+            for progress in range(0, 101, 10):
+                if await cancellation.is_cancelled(task_id):
+                    logger.info(f"Cancelled {label} task: {task_id}")
+                    return {"task_id": task_id, "status": "cancelled"}
+                await asyncio.sleep(step_seconds)
+                message = f"Generating {label}... {progress}%"
+                if on_progress is not None:
+                    on_progress(progress, message)
+                progress_buffer.record(task_id, progress, message)
+        finally:
+            await progress_buffer.flush()
+
+        await history_service.update_task_status(task_id, TaskStatus.SUCCESS, output_data=output_data)
+        return {"task_id": task_id, "status": "success", **output_data}
+
+
+@celery_app.task(bind=True, name="app.workers.generation_worker.run_generation")
+def run_generation_task(self, task_id: str, task_type: str, params: dict):
+    """
+    Celery task running a single queued generation job through the AI Router
+    """
+    logger.info(f"Starting generation task: {task_id} ({task_type})")
+    return _get_loop().run_until_complete(
+        _run_generation(task_id, task_type, params, self.request.get("traceparent"))
+    )
+
+
+def enqueue_generation_jobs(jobs: List[Tuple[str, str, dict]]) -> List[str]:
+    """
+    Publish generation jobs over a single broker connection
+
+    Args:
+        jobs: (task_id, router task type, router params) tuples
+
+    The Celery task ID is the Task row ID, so callers already know it.
+    """
+    from app.core.tracing import current_traceparent
+
+    # Custom headers show up on the worker's task request
+    headers = {"traceparent": current_traceparent()}
+    with celery_app.producer_or_acquire() as producer:
+        for task_id, task_type, params in jobs:
+            run_generation_task.apply_async(
+                args=(task_id, task_type, params),
+                task_id=task_id,
+                producer=producer,
+                headers=headers,
+            )
+    return [task_id for task_id, _, _ in jobs]
@@ -0,0 +1,27 @@
+from app.workers.celery_app import celery_app
+from app.workers.generation_worker import _get_loop
+from loguru import logger
+
+
+async def _maintain_task_partitions() -> dict:
+    from app.database import AsyncSessionLocal
+    from app.services.archive_service import ArchiveService
+
+    async with AsyncSessionLocal() as db:
+        service = ArchiveService(db)
+        created = await service.ensure_partitions()
+        archived = await service.archive_expired()
+    return {
+        "partitions": created,
+        "archived": [month.isoformat() for month in archived],
+    }
+
+
+@celery_app.task(name="app.workers.maintenance_worker.maintain_task_partitions")
+def maintain_task_partitions():
+    """
+    Create upcoming tasks partitions and archive expired ones (runs daily)
+    """
+    result = _get_loop().run_until_complete(_maintain_task_partitions())
+    logger.info(f"Task partition maintenance: {result}")
+    return result
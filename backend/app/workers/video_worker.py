@@ -1,6 +1,6 @@
 from app.workers.celery_app import celery_app
+from app.workers.generation_worker import _get_loop, run_simulated_generation
 from loguru import logger
-import time
 
 
 @celery_app.task(bind=True, name="app.workers.video_worker.generate_video")
@@ -9,22 +9,18 @@ def generate_video_task(self, task_data: dict):
     Celery task for video generation
     """
     logger.info(f"Starting video generation task: {task_data}")
-    task_id = self.request.id
+    status_id = task_data.get("task_id", self.request.id)
 
-    # Simulate video generation
-    for i in range(0, 101, 10):
-        time.sleep(2)
-        self.update_state(
-            state="PROGRESS",
-            meta={
-                "progress": i,
-                "message": f"Generating video... {i}%",
-            }
-        )
+    def on_progress(progress: int, message: str) -> None:
+        self.update_state(state="PROGRESS", meta={"progress": progress, "message": message})
 
-    logger.info(f"Completed video generation task: {task_id}")
-    return {
-        "task_id": task_id,
-        "status": "success",
-        "video_url": "https://example.com/generated_video.mp4",
-    }
+    # Simulate video generation
+    result = _get_loop().run_until_complete(run_simulated_generation(
+        status_id,
+        "video",
+        {"video_url": "https://example.com/generated_video.mp4"},
+        step_seconds=2,
+        on_progress=on_progress,
+    ))
+    logger.info(f"Finished video generation task: {status_id} ({result['status']})")
+    return result
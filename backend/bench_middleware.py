@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Middleware Stack Benchmark
+Requests per second through the full middleware stack of app.main (security
+headers, rate limiting, error handling, request logging, CORS, GZip) on a
+trivial route, comparing the previous BaseHTTPMiddleware layers with the
+pure ASGI ones
+
+Requests are driven straight through the ASGI app, without a server or
+sockets, and log output is discarded so only the middleware cost is left.
+"""
+
+import asyncio
+import sys
+import os
+import time
+import uuid
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from loguru import logger
+from app.core.middleware import ErrorHandlerMiddleware, RequestLoggingMiddleware
+from app.core.rate_limit import RateLimitMiddleware, RateLimiter, RATE_LIMIT_RULES
+from app.core.security import SecurityMiddleware
+
+REQUESTS = 5000
+STREAM_CHUNKS = 100
+
+
+# Before: the same four layers as BaseHTTPMiddleware, CSP built per request
+
+async def legacy_security(request, call_next):
+    response = await call_next(request)
+    response.headers["Content-Security-Policy"] = (
+        "default-src 'self'; "
+        "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://cdn.jsdelivr.net; "
+        "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com https://cdn.jsdelivr.net; "
+        "img-src 'self' data: blob: https://*.githubusercontent.com; "
+        "font-src 'self' data: https://fonts.gstatic.com; "
+        "connect-src 'self' https://api.openai.com https://*.huggingface.co; "
+        "frame-ancestors 'none'; "
+        "form-action 'self';"
+    )
+    env = os.getenv("APP_ENV", "development")
+    response.headers["Strict-Transport-Security"] = (
+        "max-age=31536000; includeSubDomains; preload" if env == "production" else "max-age=3600"
+    )
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    response.headers["X-Frame-Options"] = "DENY"
+    response.headers["X-XSS-Protection"] = "1; mode=block"
+    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+    response.headers["Permissions-Policy"] = "camera=(), microphone=(), geolocation=(), fullscreen=(self), payment=()"
+    response.headers["Server"] = "AI-Creative-Hub"
+    response.headers.pop("X-Powered-By", None)
+    logger.debug(f"Security headers applied to {request.url.path}")
+    return response
+
+
+def legacy_rate_limit(limiter):
+    async def dispatch(request, call_next):
+        forwarded = request.headers.get("X-Forwarded-For")
+        client_ip = forwarded.split(",")[0].strip() if forwarded else request.client.host
+        rule = RATE_LIMIT_RULES["api"]
+        allowed, info = await limiter.is_allowed(
+            f"api:{client_ip}", rule["limit"], rule["window"], rule["algorithm"]
+        )
+        response = await call_next(request)
+        response.headers["X-RateLimit-Limit"] = str(info["limit"])
+        response.headers["X-RateLimit-Remaining"] = str(info["remaining"])
+        response.headers["X-RateLimit-Reset"] = str(info["reset"])
+        return response
+    return dispatch
+
+
+async def legacy_error_handler(request, call_next):
+    try:
+        return await call_next(request)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"detail": "Internal server error", "error_type": type(e).__name__})
+
+
+async def legacy_request_logging(request, call_next):
+    request_id = str(uuid.uuid4())
+    request.state.request_id = request_id
+    start_time = time.time()
+    forwarded = request.headers.get("X-Forwarded-For")
+    client_ip = forwarded.split(",")[0].strip() if forwarded else request.client.host
+    log_data = {
+        "request_id": request_id,
+        "method": request.method,
+        "path": request.url.path,
+        "query_params": str(request.query_params),
+        "client_ip": client_ip,
+        "user_agent": request.headers.get("user-agent", "unknown"),
+    }
+    logger.info(f"Request [ID: {request_id}]: {request.method} {request.url.path}", extra=log_data)
+    response = await call_next(request)
+    process_time = time.time() - start_time
+    logger.info(f"Response [ID: {request_id}]: {response.status_code}", extra={"request_id": request_id})
+    response.headers["X-Request-ID"] = request_id
+    response.headers["X-Process-Time"] = str(round(process_time, 3))
+    return response
+
+
+def build_app(legacy: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    @app.get("/api/v1/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(STREAM_CHUNKS):
+                yield b"data: progress\n\n"
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    @app.get("/api/v1/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    # Same order as app.main.create_app
+    if legacy:
+        app.add_middleware(BaseHTTPMiddleware, dispatch=legacy_security)
+        app.add_middleware(BaseHTTPMiddleware, dispatch=legacy_rate_limit(RateLimiter(None)))
+        app.add_middleware(BaseHTTPMiddleware, dispatch=legacy_error_handler)
+        app.add_middleware(BaseHTTPMiddleware, dispatch=legacy_request_logging)
+    else:
+        app.add_middleware(SecurityMiddleware)
+        app.add_middleware(RateLimitMiddleware, enabled=True)
+        app.add_middleware(ErrorHandlerMiddleware)
+        app.add_middleware(RequestLoggingMiddleware)
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+    return app
+
+
+async def request(app, path: str):
+    """One GET through the ASGI app; returns (status, headers, body chunks)"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"user-agent", b"bench"), (b"accept", b"*/*")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+    messages = []
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if body_sent:
+            # Like a server: nothing more until the client disconnects
+            await asyncio.Event().wait()
+        body_sent = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        pass  # Unhandled errors escape to the server, which would send a bare 500
+    start = next((m for m in messages if m["type"] == "http.response.start"), None)
+    chunks = [m for m in messages if m["type"] == "http.response.body" and m.get("body")]
+    return (start["status"] if start else None), dict(start["headers"]) if start else {}, chunks
+
+
+async def bench(name: str, app, path: str) -> None:
+    for _ in range(100):
+        await request(app, path)
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        await request(app, path)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10}{path:<18}{REQUESTS / elapsed:>10.0f} req/s{elapsed / REQUESTS * 1e6:>10.1f} us/req")
+
+
+async def check(app) -> None:
+    """Headers, streaming and error handling through the new stack"""
+    status, headers, _ = await request(app, "/api/v1/ping")
+    for header in (b"content-security-policy", b"x-ratelimit-remaining", b"x-request-id", b"server"):
+        assert header in headers, header
+    status, headers, chunks = await request(app, "/api/v1/stream")
+    print(f"stream    {len(chunks)} body messages for {STREAM_CHUNKS} chunks")
+    status, headers, _ = await request(app, "/api/v1/boom")
+    print(f"error     status {status}, security headers {'yes' if b'server' in headers else 'no'}")
+
+
+async def main():
+    """Run both stacks"""
+    logger.remove()
+    # Keep the bench under the limits; rejections would short-circuit the stack
+    for rule in RATE_LIMIT_RULES.values():
+        rule["limit"] = 10 ** 9
+
+    legacy, current = build_app(legacy=True), build_app(legacy=False)
+
+    print("\n" + "=" * 60)
+    print("Middleware stack throughput")
+    print("=" * 60)
+    for path in ("/api/v1/ping", "/api/v1/stream"):
+        await bench("before", legacy, path)
+        await bench("after", current, path)
+
+    print("\n" + "=" * 60)
+    print("Behaviour (after)")
+    print("=" * 60)
+    await check(current)
+
+    print("\n" + "=" * 60)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
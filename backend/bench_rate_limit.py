@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter Benchmark
+Compare the previous multi-command Redis sliding window with the Lua
+sliding window and GCRA scripts: latency per check, how many requests get
+admitted when many arrive at once, and memory per key
+
+Needs a Redis server at REDIS_URL.
+"""
+
+import asyncio
+import sys
+import os
+import time
+import uuid
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import redis.asyncio as redis
+from app.config import get_settings
+from app.core.rate_limit import RateLimiter, RateLimitAlgorithm
+
+settings = get_settings()
+
+SEQUENTIAL_CHECKS = 2000
+CONCURRENT_CHECKS = 200
+CONCURRENT_LIMIT = 50
+
+
+async def legacy_sliding_window(client, key: str, limit: int, window: int) -> bool:
+    """The previous implementation: ZREMRANGEBYSCORE, ZCARD, ZADD, EXPIRE (TTL on reject)"""
+    now = time.time()
+    redis_key = f"rate_limit:{key}"
+    await client.zremrangebyscore(redis_key, 0, now - window)
+    current = await client.zcard(redis_key)
+    if current >= limit:
+        await client.ttl(redis_key)
+        return False
+    await client.zadd(redis_key, {str(now): now})
+    await client.expire(redis_key, window)
+    return True
+
+
+async def lua_sliding_window(limiter: RateLimiter, key: str, limit: int, window: int) -> bool:
+    allowed, _ = await limiter.is_allowed(key, limit, window)
+    return allowed
+
+
+async def lua_gcra(limiter: RateLimiter, key: str, limit: int, window: int) -> bool:
+    allowed, _ = await limiter.is_allowed(key, limit, window, RateLimitAlgorithm.GCRA)
+    return allowed
+
+
+async def bench_sequential(name, check):
+    key = f"bench:{uuid.uuid4().hex}"
+    start = time.perf_counter()
+    for _ in range(SEQUENTIAL_CHECKS):
+        await check(key, 1_000_000, 60)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10}{SEQUENTIAL_CHECKS / elapsed:>12.0f}/s{elapsed / SEQUENTIAL_CHECKS * 1e6:>12.1f} us/check")
+
+
+async def bench_concurrent(name, check):
+    key = f"bench:{uuid.uuid4().hex}"
+    results = await asyncio.gather(*[
+        check(key, CONCURRENT_LIMIT, 60) for _ in range(CONCURRENT_CHECKS)
+    ])
+    admitted = sum(1 for allowed in results if allowed)
+    verdict = "ok" if admitted == CONCURRENT_LIMIT else "WRONG"
+    print(f"{name:<10}{admitted:>5} admitted of {CONCURRENT_CHECKS} (limit {CONCURRENT_LIMIT}) {verdict}")
+
+
+async def bench_memory(client, limiter):
+    """Bytes per key once a client has used its whole limit"""
+    for limit in (10, 100, 1000):
+        usage = []
+        for algorithm, prefix in (
+            (RateLimitAlgorithm.SLIDING_WINDOW, "rate_limit"),
+            (RateLimitAlgorithm.GCRA, "rate_limit_gcra"),
+        ):
+            key = f"bench:{uuid.uuid4().hex}"
+            for _ in range(limit):
+                await limiter.is_allowed(key, limit, 60, algorithm)
+            usage.append(await client.memory_usage(f"{prefix}:{key}"))
+        print(f"limit {limit:<6}sliding window {usage[0]:>8} B    gcra {usage[1]:>4} B")
+
+
+async def main():
+    """Run all implementations"""
+    client = redis.from_url(settings.redis_url)
+    limiter = RateLimiter(client)
+
+    checks = [
+        ("legacy", lambda key, limit, window: legacy_sliding_window(client, key, limit, window)),
+        ("lua", lambda key, limit, window: lua_sliding_window(limiter, key, limit, window)),
+        ("gcra", lambda key, limit, window: lua_gcra(limiter, key, limit, window)),
+    ]
+
+    print("\n" + "=" * 60)
+    print("Sequential checks (one client)")
+    print("=" * 60)
+    for name, check in checks:
+        await bench_sequential(name, check)
+
+    print("\n" + "=" * 60)
+    print("Concurrent burst on one key")
+    print("=" * 60)
+    for name, check in checks:
+        await bench_concurrent(name, check)
+
+    print("\n" + "=" * 60)
+    print("Memory per key")
+    print("=" * 60)
+    await bench_memory(client, limiter)
+
+    await client.delete(*[key async for key in client.scan_iter("rate_limit*:bench:*")])
+    await client.close()
+    print("\n" + "=" * 60)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Database Round Trip Benchmark
+Count the round trips each endpoint's session lifecycle costs, comparing
+the old pattern (commit on every request, commit + refresh after inserts,
+SELECT before UPDATE) with the current one
+
+Needs a migrated database at DATABASE_URL. Each flow issues the same
+statements as its service; pool pre-ping and prepared statement cache
+misses are not counted since they are the same before and after.
+"""
+
+import asyncio
+import sys
+import os
+import time
+import uuid
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, func, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import asyncpg as asyncpg_dialect
+from app.database import engine, AsyncSessionLocal, ReadSessionLocal
+from app.core.pagination import paginate
+from app.models.task import Task, TaskStatus, TaskType, TERMINAL_STATUSES, TASK_STATE_COLUMNS
+from app.models.workflow import Workflow, WorkflowStatus, WorkflowStep
+
+USER_ID = str(uuid.uuid4())
+ITERATIONS = 50
+
+round_trips = 0
+
+
+def install_counters():
+    """Count statements plus the BEGIN / COMMIT / ROLLBACK actually sent"""
+    adapter = asyncpg_dialect.AsyncAdapt_asyncpg_connection
+    start_transaction, commit, rollback = adapter._start_transaction, adapter.commit, adapter.rollback
+
+    async def counted_start_transaction(self):
+        global round_trips
+        if self.isolation_level != "autocommit":
+            round_trips += 1
+        await start_transaction(self)
+
+    def counted(end_transaction):
+        def wrapper(self):
+            global round_trips
+            if self._started:
+                round_trips += 1
+            end_transaction(self)
+        return wrapper
+
+    adapter._start_transaction = counted_start_transaction
+    adapter.commit = counted(commit)
+    adapter.rollback = counted(rollback)
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_statement(*args):
+        global round_trips
+        round_trips += 1
+
+
+def task_values() -> dict:
+    return dict(
+        id=str(uuid.uuid4()),
+        user_id=USER_ID,
+        task_type=TaskType.IMAGE_GENERATION,
+        status=TaskStatus.PENDING,
+        input_data={"type": "text_to_image", "prompt": "benchmark"},
+    )
+
+
+# Before: get_db committed every request, inserts were committed then refreshed,
+# status updates selected the row first
+
+async def create_task_before(task_ids):
+    async with AsyncSessionLocal() as db:
+        task = Task(**task_values())
+        db.add(task)
+        await db.commit()
+        await db.refresh(task)
+        task_ids.append(str(task.id))
+        await db.commit()
+
+
+async def task_status_before(task_ids):
+    async with AsyncSessionLocal() as db:
+        await db.execute(select(Task).where(Task.id == task_ids[0]))
+        await db.commit()
+
+
+async def update_status_before(task_ids):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Task).where(Task.id == task_ids.pop()))
+        task = result.scalar_one()
+        if task.status not in TERMINAL_STATUSES:
+            task.status = TaskStatus.RUNNING
+            task.started_at = task.started_at or datetime.utcnow()
+        await db.commit()
+        await db.commit()
+
+
+async def list_history_before(task_ids):
+    async with AsyncSessionLocal() as db:
+        query = select(Task).where(Task.user_id == USER_ID)
+        await db.execute(paginate(query, Task, None, 20))
+        await db.commit()
+
+
+async def create_workflow_before(task_ids):
+    async with AsyncSessionLocal() as db:
+        workflow = Workflow(
+            id=str(uuid.uuid4()),
+            user_id=USER_ID,
+            name="benchmark",
+            status=WorkflowStatus.DRAFT,
+            current_step=WorkflowStep.STORY,
+        )
+        db.add(workflow)
+        await db.commit()
+        await db.refresh(workflow)
+        await db.commit()
+
+
+# After: reads run in autocommit, writes use RETURNING and commit once
+
+async def create_task_after(task_ids):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(insert(Task).values(**task_values()).returning(*TASK_STATE_COLUMNS))
+        task_ids.append(str(result.one().id))
+        await db.commit()
+
+
+async def task_status_after(task_ids):
+    async with ReadSessionLocal() as db:
+        await db.execute(select(Task).where(Task.id == task_ids[0]))
+
+
+async def update_status_after(task_ids):
+    async with AsyncSessionLocal() as db:
+        previous = (
+            select(Task.id, Task.status.label("old_status"))
+            .where(Task.id == task_ids.pop())
+            .with_for_update()
+            .subquery()
+        )
+        await db.execute(
+            update(Task)
+            .where(Task.id == previous.c.id)
+            .where(or_(Task.status.not_in(TERMINAL_STATUSES), Task.status == TaskStatus.RUNNING))
+            .values(status=TaskStatus.RUNNING, started_at=func.coalesce(Task.started_at, datetime.utcnow()))
+            .returning(previous.c.old_status, *TASK_STATE_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+
+async def list_history_after(task_ids):
+    async with ReadSessionLocal() as db:
+        query = select(Task).where(Task.user_id == USER_ID)
+        await db.execute(paginate(query, Task, None, 20))
+
+
+async def create_workflow_after(task_ids):
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            insert(Workflow)
+            .values(
+                id=str(uuid.uuid4()),
+                user_id=USER_ID,
+                name="benchmark",
+                status=WorkflowStatus.DRAFT,
+                current_step=WorkflowStep.STORY,
+            )
+            .returning(Workflow.id, Workflow.created_at)
+        )
+        await db.commit()
+
+
+FLOWS = [
+    ("POST /image/text-to-image", create_task_before, create_task_after),
+    ("GET  /tasks/{id}", task_status_before, task_status_after),
+    ("worker status update", update_status_before, update_status_after),
+    ("GET  /history", list_history_before, list_history_after),
+    ("POST /workflow/create", create_workflow_before, create_workflow_after),
+]
+
+
+async def measure(flow, task_ids):
+    """Average round trips and latency of one flow"""
+    global round_trips
+    round_trips = 0
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await flow(task_ids)
+    elapsed = time.perf_counter() - start
+    return round_trips / ITERATIONS, elapsed / ITERATIONS * 1000
+
+
+async def cleanup():
+    async with AsyncSessionLocal() as db:
+        await db.execute(Task.__table__.delete().where(Task.user_id == USER_ID))
+        await db.execute(Workflow.__table__.delete().where(Workflow.user_id == USER_ID))
+        await db.commit()
+
+
+async def main():
+    """Run all flows"""
+    print("\n" + "=" * 72)
+    print("Database Round Trips per Request")
+    print("=" * 72)
+
+    install_counters()
+    print(f"\n{'Endpoint':<28}{'Before':>10}{'After':>10}{'Before ms':>12}{'After ms':>12}")
+
+    try:
+        for name, before, after in FLOWS:
+            # Status flows consume task ids produced by the create flows
+            task_ids = []
+            for _ in range(2 * ITERATIONS):
+                await create_task_after(task_ids)
+
+            trips_before, ms_before = await measure(before, task_ids)
+            trips_after, ms_after = await measure(after, task_ids)
+            print(f"{name:<28}{trips_before:>10.1f}{trips_after:>10.1f}{ms_before:>12.2f}{ms_after:>12.2f}")
+    finally:
+        await cleanup()
+        await engine.dispose()
+
+    print("\n" + "=" * 72)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())